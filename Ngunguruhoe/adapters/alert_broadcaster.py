@@ -0,0 +1,148 @@
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Iterable
+from Ngunguruhoe.domain.models.alert import Alert
+from Ngunguruhoe.domain.ports.alert_publisher_port import AlertPublisherPort
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class AlertEvent:
+    """A published alert with its stream position. encoded caches the wire form, shared by all subscribers."""
+    id: int
+    alert: Alert
+    encoded: bytes | None = field(default=None, repr=False, compare=False)
+
+class Subscription:
+    """
+    One subscriber's view of the broadcast: replayed events first, then live ones.
+    Iteration ends when the subscription is closed or evicted.
+    """
+    def __init__(self, broadcaster: "AlertBroadcaster", symbols: frozenset[str] | None,
+                 max_queue: int, backlog: list[AlertEvent]):
+        self.broadcaster = broadcaster
+        self.symbols = symbols
+        self.evicted = False
+        self.closed = False
+        self._backlog = deque(backlog)
+        self._queue: asyncio.Queue[AlertEvent | None] = asyncio.Queue(maxsize=max_queue)
+
+    def wants(self, alert: Alert) -> bool:
+        return self.symbols is None or alert.symbol in self.symbols
+
+    def _offer(self, event: AlertEvent) -> bool:
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def _shutdown(self):
+        self.closed = True
+        # Wake a reader blocked on an empty queue; a busy reader sees `closed` on its next get.
+        if self._queue.empty():
+            self._queue.put_nowait(None)
+
+    async def get(self, timeout: float | None = None) -> AlertEvent | None:
+        """
+        Next event, or None once closed. With a timeout, also returns None if nothing
+        arrives in time (check `closed` to tell the two apart).
+        """
+        if self._backlog:
+            return self._backlog.popleft()
+        if self.closed:
+            return None
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broadcaster.unsubscribe(self)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> AlertEvent:
+        event = await self.get()
+        if event is None:
+            raise StopAsyncIteration
+        return event
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+class AlertBroadcaster(AlertPublisherPort):
+    """
+    In-process fan-out of published alerts to any number of subscribers.
+
+    Each subscriber gets a bounded queue. publish never waits: a subscriber whose
+    queue is full is evicted (its stream ends) instead of slowing everyone else, and
+    can reconnect and resume. The last replay_size events are kept in a ring so a
+    subscriber can resume from the id of the last event it saw. Serving subscribers
+    never touches the alert repository.
+    """
+    def __init__(self, replay_size: int = 1000, max_queue: int = 256):
+        if replay_size < 0 or max_queue < 1:
+            raise ValueError("replay_size must be non-negative and max_queue at least 1.")
+        self.max_queue = max_queue
+        self._ring: deque[AlertEvent] = deque(maxlen=replay_size)
+        self._subscribers: set[Subscription] = set()
+        self._last_id = 0
+        self.published = 0
+        self.evicted = 0
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, symbols: Iterable[str] | None = None, last_event_id: int | None = None,
+                  max_queue: int | None = None) -> Subscription:
+        """
+        Registers a subscriber, optionally limited to symbols. With last_event_id, events
+        after that id still in the replay ring are delivered first; anything older is lost.
+        """
+        symbol_filter = frozenset(symbols) if symbols else None
+        backlog = []
+        if last_event_id is not None:
+            # The ring snapshot and registration happen without yielding, so nothing is missed or repeated.
+            backlog = [event for event in self._ring if event.id > last_event_id
+                       and (symbol_filter is None or event.alert.symbol in symbol_filter)]
+        subscription = Subscription(self, symbol_filter, max_queue or self.max_queue, backlog)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+        if not subscription.closed:
+            subscription._shutdown()
+
+    async def publish(self, alert: Alert):
+        self._last_id += 1
+        event = AlertEvent(self._last_id, alert)
+        self._ring.append(event)
+        self.published += 1
+        slow = [sub for sub in self._subscribers if sub.wants(alert) and not sub._offer(event)]
+        for subscription in slow:
+            subscription.evicted = True
+            self.evicted += 1
+            self.unsubscribe(subscription)
+            logger.warning("AlertBroadcaster: Evicted slow subscriber after %d undelivered alert(s).",
+                           subscription._queue.maxsize)
+
+    def close(self):
+        """Ends every subscription, e.g. at shutdown."""
+        for subscription in list(self._subscribers):
+            self.unsubscribe(subscription)
+
+    def stats(self) -> dict:
+        return {"subscribers": len(self._subscribers), "published": self.published,
+                "evicted": self.evicted, "last_id": self._last_id}
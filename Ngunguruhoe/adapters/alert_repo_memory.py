@@ -0,0 +1,50 @@
+from collections import deque
+from Ngunguruhoe.domain.models.alert import Alert, CompactAlert
+from Ngunguruhoe.domain.models.alert_batch import AlertBatch
+from Ngunguruhoe.domain.models.alert_query import AlertPage, AlertQuery, page_from_scan
+from Ngunguruhoe.domain.ports.alert_port import AlertPort
+
+class InMemoryAlertRepository(AlertPort):
+    """
+    AlertPort kept entirely in process memory, e.g. for backtests.
+
+    Alerts are held as slotted CompactAlert records. With max_alerts set, only the
+    most recent alerts are retained (older ones are dropped), while total_saved still
+    counts every alert.
+    """
+    def __init__(self, max_alerts: int | None = None):
+        self.alerts: deque[CompactAlert] = deque(maxlen=max_alerts)
+        self.total_saved = 0
+        self._latest: CompactAlert | None = None
+        self._latest_by_symbol: dict[str, CompactAlert] = {}
+
+    async def init_db(self):
+        pass
+
+    async def close(self):
+        pass
+
+    def _remember(self, alert: CompactAlert):
+        self.alerts.append(alert)
+        self.total_saved += 1
+        if self._latest is None or alert.timestamp_ns >= self._latest.timestamp_ns:
+            self._latest = alert
+        previous = self._latest_by_symbol.get(alert.symbol)
+        if previous is None or alert.timestamp_ns >= previous.timestamp_ns:
+            self._latest_by_symbol[alert.symbol] = alert
+
+    async def save_alert(self, alert: Alert):
+        self._remember(CompactAlert.from_alert(alert))
+
+    async def save_alerts(self, batch: AlertBatch):
+        for i in range(len(batch)):
+            self._remember(batch.compact(i))
+
+    async def get_latest_alert(self, symbol: str | None = None) -> Alert | None:
+        latest = self._latest if symbol is None else self._latest_by_symbol.get(symbol)
+        return latest.to_alert() if latest else None
+
+    async def query_alerts(self, query: AlertQuery) -> AlertPage:
+        # Ids are 1-based save order; retained alerts are the last len(alerts) saved.
+        first_id = self.total_saved - len(self.alerts) + 1
+        return page_from_scan(query, enumerate(self.alerts, start=first_id))
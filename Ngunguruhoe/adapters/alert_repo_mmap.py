@@ -0,0 +1,477 @@
+import asyncio
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from bisect import bisect_right
+from typing import Iterator
+import numpy as np
+from Ngunguruhoe.domain.models.alert import ACTIONS, Action, Alert, from_epoch_ns, to_epoch_ns
+from Ngunguruhoe.domain.models.alert_batch import AlertBatch
+from Ngunguruhoe.domain.models.alert_query import AlertCursor, AlertPage, AlertQuery
+from Ngunguruhoe.domain.ports.alert_port import AlertPort
+
+logger = logging.getLogger(__name__)
+
+# One alert per fixed-width little-endian record; symbols are ids into the log's symbol table.
+RECORD_DTYPE = np.dtype([("timestamp_ns", "<i8"), ("confidence", "<f8"), ("symbol_id", "<u4"),
+                         ("action_code", "u1"), ("flags", "u1"), ("reserved", "V2")])
+# Set in every record written, so a never-written (zeroed) slot is told apart from any alert.
+RECORD_WRITTEN = 1
+MAGIC = b"NGALOG02"
+# magic, record size, capacity (records), committed record count; records start at HEADER_SIZE.
+_HEADER = struct.Struct("<8sIxxxxQQ")
+_COUNT_OFFSET = 24
+HEADER_SIZE = 64
+SEGMENT_SUFFIX = ".seg"
+SYMBOLS_FILE = "symbols.txt"
+_ACTION_VALUES = np.array([action.value for action in ACTIONS])
+
+class _Segment:
+    """One preallocated segment file, mapped whole, plus its sparse time index."""
+    def __init__(self, path: str, base_id: int, capacity: int, count: int, index_interval: int):
+        self.path = path
+        self.base_id = base_id # id of the first record; ids are 1-based and global
+        self.capacity = capacity
+        self.count = count
+        self.index_interval = index_interval
+        self.created = time.monotonic()
+        self.dirty = False
+        self._file = open(path, "r+b")
+        self._mmap = mmap.mmap(self._file.fileno(), HEADER_SIZE + capacity * RECORD_DTYPE.itemsize)
+        self.records = np.frombuffer(self._mmap, RECORD_DTYPE, capacity, HEADER_SIZE)
+        # Sparse time index: min and max timestamp per block of index_interval records.
+        blocks = -(-capacity // index_interval)
+        self.block_min = np.full(blocks, np.iinfo(np.int64).max, dtype=np.int64)
+        self.block_max = np.full(blocks, np.iinfo(np.int64).min, dtype=np.int64)
+        self.in_order = True # timestamps never decrease, so range reads can binary search
+        if count:
+            timestamps = self.records["timestamp_ns"][:count]
+            starts = np.arange(0, count, index_interval)
+            self.block_min[:len(starts)] = np.minimum.reduceat(timestamps, starts)
+            self.block_max[:len(starts)] = np.maximum.reduceat(timestamps, starts)
+            self.in_order = bool(np.all(timestamps[1:] >= timestamps[:-1]))
+
+    @classmethod
+    def create(cls, path: str, base_id: int, capacity: int, index_interval: int) -> "_Segment":
+        with open(path, "xb") as f:
+            f.write(_HEADER.pack(MAGIC, RECORD_DTYPE.itemsize, capacity, 0).ljust(HEADER_SIZE, b"\0"))
+            f.truncate(HEADER_SIZE + capacity * RECORD_DTYPE.itemsize) # sparse until written
+        return cls(path, base_id, capacity, 0, index_interval)
+
+    @classmethod
+    def open(cls, path: str, base_id: int, index_interval: int, symbol_count: int) -> "_Segment":
+        with open(path, "rb") as f:
+            magic, record_size, capacity, count = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != MAGIC or record_size != RECORD_DTYPE.itemsize:
+            raise RuntimeError(f"{path} is not an alert log segment of this version.")
+        segment = cls(path, base_id, capacity, 0, index_interval)
+        # The count may have reached disk before its records (or the symbols they use) did:
+        # stop at the first record that was never written or names an unknown symbol.
+        records = segment.records[:count]
+        invalid = np.flatnonzero(((records["flags"] & RECORD_WRITTEN) == 0) | (records["symbol_id"] >= symbol_count))
+        del records
+        segment.close()
+        return cls(path, base_id, capacity, int(invalid[0]) if len(invalid) else count, index_interval)
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+    @property
+    def blocks(self) -> int:
+        return -(-self.count // self.index_interval)
+
+    def append(self, rows: np.ndarray) -> int:
+        """Copies as many rows as fit into the mapping; returns how many were written."""
+        n = min(len(rows), self.capacity - self.count)
+        if n <= 0:
+            return 0
+        start, end = self.count, self.count + n
+        self.records[start:end] = rows[:n]
+        timestamps = rows["timestamp_ns"][:n]
+        if start and timestamps[0] < self.records["timestamp_ns"][start - 1] or np.any(timestamps[1:] < timestamps[:-1]):
+            self.in_order = False
+        interval = self.index_interval
+        for block in range(start // interval, (end - 1) // interval + 1):
+            lo, hi = max(start, block * interval) - start, min(end, (block + 1) * interval) - start
+            self.block_min[block] = min(self.block_min[block], timestamps[lo:hi].min())
+            self.block_max[block] = max(self.block_max[block], timestamps[lo:hi].max())
+        self.count = end
+        # Publish the rows by bumping the header count after they are in place.
+        struct.pack_into("<Q", self._mmap, _COUNT_OFFSET, end)
+        self.dirty = True
+        return n
+
+    def sync(self):
+        if self.dirty:
+            self.dirty = False
+            self._mmap.flush() # msync: records and header reach the file
+
+    def close(self):
+        del self.records
+        try:
+            self._mmap.close()
+        except BufferError: # views handed out by read_range are still alive; they keep the mapping valid
+            logger.debug("MmapAlertRepository: %s stays mapped until its views are released.", self.path)
+        self._file.close()
+
+class MmapAlertRepository(AlertPort):
+    """
+    Append-only AlertPort over segmented, memory-mapped log files in log_dir.
+
+    Each alert is one fixed-width binary record (RECORD_DTYPE, 24 bytes) copied into
+    a preallocated segment mapping, so a save is a memory copy: no SQL, no transaction
+    and no system call. A segment rolls to a new file once it holds segment_records
+    alerts or, with segment_seconds, once it has been open that long.
+
+    Symbols are stored as ids into an append-only symbol table (symbols.txt). A
+    per-symbol table of the latest record serves get_latest_alert straight from the
+    mapping. A sparse time index (min and max timestamp per index_interval records)
+    lets time-range reads and query_alerts skip blocks. query_alerts visits blocks
+    newest first and stops once no remaining block can reach the page. read_range
+    returns time ranges as NumPy views of the mapped records.
+
+    Durability follows fsync_interval. With 0, every save is flushed to disk before it
+    returns; with a positive value, a background task flushes dirty segments that
+    often, and also as soon as a segment rolls; with None, flushing is left to
+    the operating system. Alerts survive a crash of the process in every mode, since
+    the mapping is the page cache, but only flushed alerts survive a crash of the
+    machine. Indexes are rebuilt from the segments by init_db.
+    """
+    def __init__(self,
+                 log_dir: str = "alert_log",
+                 segment_records: int = 1 << 20,
+                 segment_seconds: float | None = None,
+                 fsync_interval: float | None = 1.0,
+                 index_interval: int = 1024):
+        if segment_records < 1 or index_interval < 1:
+            raise ValueError("segment_records and index_interval must be at least 1.")
+        if fsync_interval is not None and fsync_interval < 0:
+            raise ValueError("fsync_interval must not be negative.")
+        self.log_dir = log_dir
+        self.segment_records = segment_records
+        self.segment_seconds = segment_seconds
+        self.fsync_interval = fsync_interval
+        self.index_interval = index_interval
+        self._segments: list[_Segment] = []
+        self._base_ids: list[int] = []
+        self._symbols: list[str] = []
+        self._symbol_ids: dict[str, int] = {}
+        self._symbols_file = None
+        # Ids of the newest record overall and per symbol id.
+        self._latest: int | None = None
+        self._latest_by_symbol: dict[int, int] = {}
+        self._open = False
+        self._sync_task: asyncio.Task | None = None
+        # Set when a segment rolls, so the background flusher syncs it without waiting out its interval.
+        self._rolled = asyncio.Event()
+        # Held by each flush, which runs on a worker thread, so close() never unmaps mid-flush.
+        self._sync_lock = threading.Lock()
+
+    @property
+    def healthy(self) -> bool:
+        """True while the log is open (and its background flusher, if any, is running)."""
+        return self._open and (self._sync_task is None or not self._sync_task.done())
+
+    @property
+    def symbols(self) -> list[str]:
+        """Symbol table: a record's symbol is symbols[record["symbol_id"]]."""
+        return self._symbols
+
+    async def init_db(self):
+        if self._open:
+            return
+        await asyncio.to_thread(self._load)
+        self._open = True
+        if self.fsync_interval:
+            self._sync_task = asyncio.create_task(self._sync_loop())
+        logger.info("MmapAlertRepository: Opened %s with %d segment(s) and %d alert(s).",
+                    self.log_dir, len(self._segments), self._next_id() - 1)
+
+    def _load(self):
+        os.makedirs(self.log_dir, exist_ok=True)
+        symbols_path = os.path.join(self.log_dir, SYMBOLS_FILE)
+        if os.path.exists(symbols_path):
+            with open(symbols_path, encoding="utf-8") as f:
+                lines = f.read().split("\n")
+            # A last line without its newline was cut off mid-write.
+            self._symbols = lines[:-1]
+            with open(symbols_path, "r+", encoding="utf-8") as f:
+                f.truncate(sum(len(line.encode()) + 1 for line in self._symbols))
+        self._symbol_ids = {symbol: i for i, symbol in enumerate(self._symbols)}
+        self._symbols_file = open(symbols_path, "a", encoding="utf-8")
+
+        names = sorted(name for name in os.listdir(self.log_dir) if name.endswith(SEGMENT_SUFFIX))
+        next_id = 1
+        for name in names:
+            segment = _Segment.open(os.path.join(self.log_dir, name), int(name.removesuffix(SEGMENT_SUFFIX)),
+                                    self.index_interval, len(self._symbols))
+            if segment.base_id != next_id:
+                segment.close()
+                raise RuntimeError(f"{name} does not continue the alert log at id {next_id}.")
+            self._add_segment(segment)
+            self._index_latest(segment, 0, segment.count)
+            next_id = segment.base_id + segment.count
+            if segment.count < segment.capacity and name != names[-1]:
+                raise RuntimeError(f"{name} is incomplete but not the last segment of the alert log.")
+
+    def _add_segment(self, segment: _Segment):
+        self._segments.append(segment)
+        self._base_ids.append(segment.base_id)
+
+    def _next_id(self) -> int:
+        if not self._segments:
+            return 1
+        return self._segments[-1].base_id + self._segments[-1].count
+
+    def _active_segment(self) -> _Segment:
+        segment = self._segments[-1] if self._segments else None
+        if segment is not None and not segment.full and not (
+                self.segment_seconds is not None and segment.count
+                and time.monotonic() - segment.created >= self.segment_seconds):
+            return segment
+        if segment is not None:
+            # Never msync on the write path: the background flusher picks up the full segment
+            # right away (with fsync_interval 0, the sync after this write does).
+            self._rolled.set()
+        base_id = self._next_id()
+        path = os.path.join(self.log_dir, f"{base_id:020d}{SEGMENT_SUFFIX}")
+        segment = _Segment.create(path, base_id, self.segment_records, self.index_interval)
+        self._add_segment(segment)
+        logger.debug("MmapAlertRepository: Rolled to segment %s.", path)
+        return segment
+
+    def _symbol_id(self, symbol: str) -> int:
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is None:
+            if "\n" in symbol:
+                raise ValueError(f"Symbol {symbol!r} contains a newline.")
+            symbol_id = self._symbol_ids[symbol] = len(self._symbols)
+            self._symbols.append(symbol)
+            # Written (to the OS) before any record refers to it.
+            self._symbols_file.write(symbol + "\n")
+            self._symbols_file.flush()
+        return symbol_id
+
+    def _record(self, record_id: int):
+        segment = self._segments[bisect_right(self._base_ids, record_id) - 1]
+        return segment.records[record_id - segment.base_id]
+
+    def _index_latest(self, segment: _Segment, start: int, end: int):
+        """Folds records [start, end) of segment into the latest-record tables."""
+        records = segment.records[start:end]
+        if not len(records):
+            return
+        timestamps, symbol_ids = records["timestamp_ns"], records["symbol_id"]
+        # Newest timestamp per symbol, the later record winning ties (as for repeated saves).
+        order = np.lexsort((np.arange(len(records)), timestamps, symbol_ids))
+        last_of_symbol = np.flatnonzero(np.append(symbol_ids[order][1:] != symbol_ids[order][:-1], True))
+        for row in order[last_of_symbol].tolist():
+            self._offer_latest(int(symbol_ids[row]), int(timestamps[row]), segment.base_id + start + row)
+
+    def _offer_latest(self, symbol_id: int, timestamp_ns: int, record_id: int):
+        previous = self._latest_by_symbol.get(symbol_id)
+        if previous is None or timestamp_ns >= self._record(previous)["timestamp_ns"]:
+            self._latest_by_symbol[symbol_id] = record_id
+        if self._latest is None or timestamp_ns >= self._record(self._latest)["timestamp_ns"]:
+            self._latest = record_id
+
+    def _append(self, rows: np.ndarray):
+        written = 0
+        while written < len(rows):
+            segment = self._active_segment()
+            start = segment.count
+            n = segment.append(rows[written:])
+            self._index_latest(segment, start, start + n)
+            written += n
+
+    async def _after_write(self):
+        if self.fsync_interval == 0:
+            await asyncio.to_thread(self._sync)
+
+    async def save_alert(self, alert: Alert):
+        """Appends the alert to the active segment."""
+        row = np.zeros(1, RECORD_DTYPE)
+        row["action_code"] = Action(alert.action).code # validates before the symbol is registered
+        row["timestamp_ns"] = to_epoch_ns(alert.timestamp)
+        row["confidence"] = alert.confidence
+        row["symbol_id"] = self._symbol_id(alert.symbol)
+        row["flags"] = RECORD_WRITTEN
+        self._append(row)
+        await self._after_write()
+
+    async def save_alerts(self, batch: AlertBatch):
+        """Appends a whole batch with vectorized copies, one per segment it spans."""
+        if not len(batch):
+            return
+        columns = batch.to_numpy() # action codes were validated when the batch was built
+        symbol_ids = np.array([self._symbol_id(symbol) for symbol in batch.symbols], dtype=np.uint32)
+        rows = np.zeros(len(batch), RECORD_DTYPE)
+        rows["timestamp_ns"] = columns["timestamp_ns"]
+        rows["confidence"] = columns["confidence"]
+        rows["symbol_id"] = symbol_ids[columns["symbol_id"]]
+        rows["action_code"] = columns["action_code"]
+        rows["flags"] = RECORD_WRITTEN
+        self._append(rows)
+        await self._after_write()
+
+    def _sync(self):
+        with self._sync_lock:
+            self._symbols_file.flush()
+            os.fsync(self._symbols_file.fileno()) # symbols first: records must never outlive their symbol
+            for segment in list(self._segments):
+                segment.sync()
+
+    async def _sync_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._rolled.wait(), self.fsync_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._rolled.clear()
+            await asyncio.to_thread(self._sync)
+
+    async def flush(self):
+        """Forces every alert appended so far to disk."""
+        if self._open:
+            await asyncio.to_thread(self._sync)
+
+    async def close(self):
+        """Flushes and unmaps every segment."""
+        if not self._open:
+            return
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            await asyncio.gather(self._sync_task, return_exceptions=True)
+            self._sync_task = None
+        await asyncio.to_thread(self._sync)
+        for segment in self._segments:
+            segment.close()
+        self._symbols_file.close()
+        self._segments, self._base_ids = [], []
+        self._latest, self._latest_by_symbol = None, {}
+        self._open = False
+
+    def _to_alert(self, record_id: int) -> Alert:
+        record = self._record(record_id)
+        return Alert(from_epoch_ns(int(record["timestamp_ns"])), self._symbols[record["symbol_id"]],
+                     ACTIONS[record["action_code"]].value, float(record["confidence"]))
+
+    async def get_latest_alert(self, symbol: str | None = None) -> Alert | None:
+        """Reads the newest alert overall, or for one symbol, from its mapped record."""
+        if symbol is None:
+            record_id = self._latest
+        else:
+            symbol_id = self._symbol_ids.get(symbol)
+            record_id = self._latest_by_symbol.get(symbol_id) if symbol_id is not None else None
+        return self._to_alert(record_id) if record_id is not None else None
+
+    def read_range(self, since: int | None = None, until: int | None = None) -> Iterator[np.ndarray]:
+        """
+        Yields the records with since <= timestamp_ns < until (epoch nanoseconds), segment
+        by segment in append order, as structured RECORD_DTYPE arrays. Segments written in
+        time order (the live pipeline's case) are binary searched and yielded as views of
+        the mapping, without copying; others are filtered block by block into copies. Views
+        stay valid after close().
+        """
+        lo = since if since is not None else np.iinfo(np.int64).min
+        hi = until if until is not None else np.iinfo(np.int64).max
+        for segment in list(self._segments):
+            blocks = segment.blocks
+            if not blocks or segment.block_max[:blocks].max() < lo or segment.block_min[:blocks].min() >= hi:
+                continue
+            records = segment.records[:segment.count]
+            if segment.in_order:
+                start, end = self._bound(segment, lo), self._bound(segment, hi)
+                if end > start:
+                    yield records[start:end]
+                continue
+            for block in np.flatnonzero((segment.block_max[:blocks] >= lo) & (segment.block_min[:blocks] < hi)):
+                chunk = records[block * self.index_interval:(block + 1) * self.index_interval]
+                timestamps = chunk["timestamp_ns"]
+                matches = chunk[(timestamps >= lo) & (timestamps < hi)]
+                if len(matches):
+                    yield matches
+
+    def _bound(self, segment: _Segment, timestamp_ns: int) -> int:
+        """First position in an in-order segment whose timestamp is >= timestamp_ns."""
+        # The sparse index narrows the search to one block, so only that block is read.
+        block = int(np.searchsorted(segment.block_max[:segment.blocks], timestamp_ns))
+        start = block * self.index_interval
+        if start >= segment.count:
+            return segment.count
+        chunk = segment.records["timestamp_ns"][start:min(segment.count, start + self.index_interval)]
+        return start + int(np.searchsorted(chunk, timestamp_ns))
+
+    async def query_alerts(self, query: AlertQuery) -> AlertPage:
+        """
+        Newest-first page with a (timestamp, id) keyset cursor, like the SQLite repository.
+        Blocks overlapping the time filter are scanned in order of their newest alert,
+        stopping once the page is full and no remaining block can hold a newer match.
+        """
+        lo = to_epoch_ns(query.since) if query.since is not None else np.iinfo(np.int64).min
+        hi = to_epoch_ns(query.until) - 1 if query.until is not None else np.iinfo(np.int64).max
+        if query.after is not None:
+            hi = min(hi, query.after.timestamp_ns)
+        symbol_id = action_code = None
+        if query.symbol is not None:
+            symbol_id = self._symbol_ids.get(query.symbol)
+            if symbol_id is None:
+                return AlertPage()
+        if query.action is not None:
+            try:
+                action_code = Action(query.action).code
+            except ValueError:
+                return AlertPage()
+
+        candidates = []
+        for segment in self._segments:
+            blocks = segment.blocks
+            for block in np.flatnonzero((segment.block_max[:blocks] >= lo) & (segment.block_min[:blocks] <= hi)):
+                candidates.append((int(segment.block_max[block]), segment, int(block)))
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+
+        wanted = query.limit + 1 # one extra row tells whether another page follows
+        found, found_ids, threshold = [], [], None
+        for block_max, segment, block in candidates:
+            if threshold is not None and block_max < threshold:
+                break
+            start = block * self.index_interval
+            chunk = segment.records[start:min(segment.count, start + self.index_interval)]
+            timestamps = chunk["timestamp_ns"]
+            ids = np.arange(segment.base_id + start, segment.base_id + start + len(chunk))
+            mask = (timestamps >= lo) & (timestamps <= hi)
+            if symbol_id is not None:
+                mask &= chunk["symbol_id"] == symbol_id
+            if action_code is not None:
+                mask &= chunk["action_code"] == action_code
+            if query.min_confidence is not None:
+                mask &= chunk["confidence"] >= query.min_confidence
+            if query.after is not None:
+                mask &= (timestamps < query.after.timestamp_ns) | (ids < query.after.id)
+            if not mask.any():
+                continue
+            found.append(chunk[mask])
+            found_ids.append(ids[mask])
+            if sum(len(rows) for rows in found) >= wanted:
+                rows, row_ids = np.concatenate(found), np.concatenate(found_ids)
+                keep = np.lexsort((row_ids, rows["timestamp_ns"]))[::-1][:wanted]
+                found, found_ids = [rows[keep]], [row_ids[keep]]
+                threshold = int(rows["timestamp_ns"][keep[-1]])
+
+        if not found:
+            return AlertPage()
+        rows, row_ids = np.concatenate(found), np.concatenate(found_ids)
+        order = np.lexsort((row_ids, rows["timestamp_ns"]))[::-1][:wanted]
+        page = order[:query.limit]
+        batch = AlertBatch.from_columns(rows["timestamp_ns"][page],
+                                        [self._symbols[i] for i in rows["symbol_id"][page].tolist()],
+                                        _ACTION_VALUES[rows["action_code"][page]], rows["confidence"][page])
+        next_cursor = None
+        if len(order) > query.limit:
+            last = page[-1]
+            next_cursor = AlertCursor(int(rows["timestamp_ns"][last]), int(row_ids[last]))
+        return AlertPage(batch, next_cursor)
@@ -0,0 +1,54 @@
+from Ngunguruhoe.domain.models.alert import Alert, from_epoch_ns, to_epoch_ns
+from Ngunguruhoe.domain.models.alert_batch import AlertBatch
+from Ngunguruhoe.domain.models.alert_query import AlertPage, AlertQuery
+from Ngunguruhoe.domain.ports.alert_port import AlertPort
+
+class QueueAlertRepository(AlertPort):
+    """
+    AlertPort for shard worker processes: alerts are not stored locally but sent as
+    (shard_id, rows) messages over a multiprocessing queue to the supervisor, which owns
+    the real repository and broadcaster. Rows are (timestamp_ns, symbol, action,
+    confidence) tuples, and a whole AlertBatch travels as one message.
+
+    Only this shard's latest alerts are known locally, so the repository is not
+    queryable: query_alerts always returns an empty page.
+    """
+    queryable = False
+
+    def __init__(self, alert_queue, shard_id: int = 0):
+        self.alert_queue = alert_queue
+        self.shard_id = shard_id
+        self.sent = 0
+        self._latest: tuple | None = None
+        self._latest_by_symbol: dict[str, tuple] = {}
+
+    async def init_db(self):
+        pass
+
+    async def close(self):
+        pass
+
+    def _send(self, rows: list[tuple]):
+        # multiprocessing queues are unbounded by default, so put hands off to the feeder thread.
+        self.alert_queue.put((self.shard_id, rows))
+        self.sent += len(rows)
+        for row in rows:
+            if self._latest is None or row[0] >= self._latest[0]:
+                self._latest = row
+            previous = self._latest_by_symbol.get(row[1])
+            if previous is None or row[0] >= previous[0]:
+                self._latest_by_symbol[row[1]] = row
+
+    async def save_alert(self, alert: Alert):
+        self._send([(to_epoch_ns(alert.timestamp), alert.symbol, str(alert.action), alert.confidence)])
+
+    async def save_alerts(self, batch: AlertBatch):
+        if len(batch):
+            self._send(list(batch.rows()))
+
+    async def get_latest_alert(self, symbol: str | None = None) -> Alert | None:
+        row = self._latest if symbol is None else self._latest_by_symbol.get(symbol)
+        return Alert(from_epoch_ns(row[0]), row[1], row[2], row[3]) if row else None
+
+    async def query_alerts(self, query: AlertQuery) -> AlertPage:
+        return AlertPage()
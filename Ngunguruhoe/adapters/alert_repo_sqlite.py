@@ -1,38 +1,620 @@
+import asyncio
+import logging
+import os
 import aiosqlite
-from Ngunguruhoe.domain.models.alert import Alert
+import numpy as np
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from Ngunguruhoe.domain.models.alert import ACTIONS, Alert, from_epoch_ns, to_epoch_ns
+from Ngunguruhoe.domain.models.alert_batch import AlertBatch
+from Ngunguruhoe.domain.models.alert_query import AlertCursor, AlertPage, AlertQuery
+from Ngunguruhoe.domain.models.alert_rollup import AlertRollup
 from Ngunguruhoe.domain.ports.alert_port import AlertPort
-from datetime import datetime
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+SYNCHRONOUS_LEVELS = ("OFF", "NORMAL", "FULL", "EXTRA")
+SCHEMA_VERSION = 3
+DAY_NS = 86_400 * 1_000_000_000
+
+class AlertWriteError(RuntimeError):
+    """Queued alerts could not be committed and were dropped; raised by flush() and close()."""
+
+def _iso_to_epoch_ns(value: str) -> int:
+    return to_epoch_ns(datetime.fromisoformat(value))
+
+async def _migrate_to_v1(db: aiosqlite.Connection):
+    # Original layout: untyped ISO-8601 timestamps, no key, no indexes.
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS alerts (
+            timestamp TEXT,
+            symbol TEXT,
+            action TEXT,
+            confidence REAL
+        )
+    """)
+
+async def _migrate_to_v2(db: aiosqlite.Connection):
+    # Rebuild the table with an integer primary key and epoch-nanosecond timestamps,
+    # converting existing ISO rows in place (oldest first, so ids follow insertion order).
+    await db.create_function("iso_to_epoch_ns", 1, _iso_to_epoch_ns, deterministic=True)
+    await db.execute("""
+        CREATE TABLE alerts_v2 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp INTEGER NOT NULL,
+            symbol TEXT NOT NULL,
+            action TEXT NOT NULL,
+            confidence REAL NOT NULL
+        )
+    """)
+    await db.execute("""
+        INSERT INTO alerts_v2 (timestamp, symbol, action, confidence)
+        SELECT iso_to_epoch_ns(timestamp), symbol, action, confidence FROM alerts ORDER BY rowid
+    """)
+    await db.execute("DROP TABLE alerts")
+    await db.execute("ALTER TABLE alerts_v2 RENAME TO alerts")
+    await db.execute("CREATE INDEX idx_alerts_timestamp ON alerts (timestamp)")
+    await db.execute("CREATE INDEX idx_alerts_symbol_timestamp ON alerts (symbol, timestamp)")
+
+async def _migrate_to_v3(db: aiosqlite.Connection):
+    # Retention: aggregates that outlive expired alerts, and per-day progress of expiry.
+    await db.execute("""
+        CREATE TABLE alert_rollups (
+            interval_seconds INTEGER NOT NULL,
+            symbol TEXT NOT NULL,
+            bucket_start INTEGER NOT NULL,
+            alerts INTEGER NOT NULL,
+            buys INTEGER NOT NULL,
+            sells INTEGER NOT NULL,
+            confidence_sum REAL NOT NULL,
+            PRIMARY KEY (interval_seconds, symbol, bucket_start)
+        ) WITHOUT ROWID
+    """)
+    await db.execute("""
+        CREATE TABLE alert_partitions (
+            day INTEGER PRIMARY KEY,
+            archived_through_id INTEGER NOT NULL,
+            parts INTEGER NOT NULL,
+            alerts INTEGER NOT NULL
+        )
+    """)
+
+# user_version -> migration that brings the schema up to that version
+_MIGRATIONS = {
+    1: _migrate_to_v1,
+    2: _migrate_to_v2,
+    3: _migrate_to_v3,
+}
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """
+    How long alerts stay in the alerts table. Alerts are partitioned by UTC day; the
+    current day and the hot_days full days before it are kept. Older partitions are
+    rolled up into per-symbol aggregates for each of rollup_intervals (seconds, each
+    dividing a day), exported to archive_dir (skipped if None) and deleted chunk_size
+    rows per transaction, pausing between chunks so queued alert writes go first.
+    A pass runs every interval seconds.
+    """
+    hot_days: int = 30
+    rollup_intervals: tuple[int, ...] = (3600, 86_400)
+    archive_dir: str | None = None
+    interval: float = 3600.0
+    chunk_size: int = 5000
+    pause: float = 0.01
+    vacuum_pages: int = 256
+
+    def __post_init__(self):
+        if self.hot_days < 0 or self.chunk_size < 1 or self.vacuum_pages < 1:
+            raise ValueError("hot_days must be non-negative; chunk_size and vacuum_pages at least 1.")
+        if any(seconds <= 0 or 86_400 % seconds for seconds in self.rollup_intervals):
+            raise ValueError(f"Rollup intervals must divide a day evenly, got {self.rollup_intervals}.")
+
+@dataclass
+class RetentionReport:
+    """What one retention pass did."""
+    partitions: int = 0
+    archived: int = 0
+    deleted: int = 0
+    archive_files: list[str] = field(default_factory=list)
+
+def write_alert_archive(path: str, batch: AlertBatch):
+    """
+    Writes a batch as a compressed columnar .npz file: the batch's typed columns plus
+    its symbol dictionary. Written to a temporary file first, so path is never partial.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(f, symbols=np.array(batch.symbols, dtype=str), **batch.to_numpy())
+    os.replace(tmp_path, path)
+
+def read_alert_archive(path: str) -> AlertBatch:
+    """Loads a file written by write_alert_archive back into an AlertBatch."""
+    with np.load(path) as columns:
+        symbols = columns["symbols"]
+        actions = np.array([action.value for action in ACTIONS])[columns["action_code"]]
+        return AlertBatch.from_columns(columns["timestamp_ns"], symbols[columns["symbol_id"]].tolist(),
+                                       actions, columns["confidence"])
 
 class SQLiteAlertRepository(AlertPort):
-    def __init__(self, db_path="alerts.db"):
+    """
+    SQLite-backed AlertPort.
+
+    Keeps one long-lived writer connection (WAL mode) and a small pool of reader
+    connections. save_alert only enqueues the alert; a background flusher task drains
+    the queue in batches with executemany and a single commit per batch.
+
+    A batch whose commit fails is rolled back and retried up to write_attempts times,
+    retry_delay seconds apart (doubling); if it still fails it is dropped, and the next
+    flush() or close() raises AlertWriteError.
+
+    The latest alert, globally and per symbol, is kept in an in-memory cache warmed
+    from disk in init_db and updated as each batch commits, so get_latest_alert never
+    touches the database and never returns an alert that did not reach it. Alerts are
+    queued and cached as plain row tuples, and save_alerts takes a columnar AlertBatch
+    without building per-alert objects.
+
+    With a RetentionPolicy, a background task expires old day partitions (see
+    apply_retention); the cache keeps serving a symbol's latest alert even after it
+    has been expired from disk.
+    """
+    def __init__(self,
+                 db_path="alerts.db",
+                 batch_size: int = 500,
+                 flush_interval: float = 0.05,
+                 synchronous: str = "NORMAL",
+                 reader_pool_size: int = 2,
+                 max_pending: int = 10000,
+                 retention: RetentionPolicy | None = None,
+                 write_attempts: int = 3,
+                 retry_delay: float = 0.1):
+        if synchronous.upper() not in SYNCHRONOUS_LEVELS:
+            raise ValueError(f"synchronous must be one of {SYNCHRONOUS_LEVELS}, got {synchronous!r}")
+        if batch_size < 1 or reader_pool_size < 1 or write_attempts < 1:
+            raise ValueError("batch_size, reader_pool_size and write_attempts must be at least 1.")
         self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.synchronous = synchronous.upper()
+        self.reader_pool_size = reader_pool_size
+        self.max_pending = max_pending
+        self.retention = retention
+        self.write_attempts = write_attempts
+        self.retry_delay = retry_delay
+        self.failed_writes = 0
+
+        self._writer: aiosqlite.Connection | None = None
+        self._readers: asyncio.Queue | None = None
+        self._reader_conns: list[aiosqlite.Connection] = []
+        self._queue: asyncio.Queue | None = None
+        self._flusher: asyncio.Task | None = None
+        self._retention_task: asyncio.Task | None = None
+        # Held for each write transaction so retention steps never interleave with a flush.
+        self._write_lock = asyncio.Lock()
+        # Cached rows are (timestamp_ns, symbol, action, confidence).
+        self._latest: tuple | None = None
+        self._latest_by_symbol: dict[str, tuple] = {}
+        # Set while commits are failing; the last error of a dropped batch waits here for flush().
+        self._failing = False
+        self._write_error: Exception | None = None
+        self._dropped = 0
+
+    @property
+    def healthy(self) -> bool:
+        """True while the database is open and its group-commit writer is running and committing."""
+        return self._flusher is not None and not self._flusher.done() and not self._failing
+
+    async def _connect(self) -> aiosqlite.Connection:
+        db = await aiosqlite.connect(self.db_path)
+        await db.execute(f"PRAGMA synchronous={self.synchronous}")
+        return db
 
     async def init_db(self):
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS alerts (
-                    timestamp TEXT,
-                    symbol TEXT,
-                    action TEXT,
-                    confidence REAL
-                )
-            """)
-            await db.commit()
+        if self._writer is not None:
+            return
+        self._writer = await self._connect()
+        if self.retention is not None:
+            await self._enable_incremental_vacuum()
+        await self._writer.execute("PRAGMA journal_mode=WAL")
+        await self._migrate()
+        await self._warm_latest_cache()
+
+        self._readers = asyncio.Queue()
+        for _ in range(self.reader_pool_size):
+            reader = await self._connect()
+            self._reader_conns.append(reader)
+            self._readers.put_nowait(reader)
+
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._flusher = asyncio.create_task(self._flush_loop())
+        if self.retention is not None:
+            self._retention_task = asyncio.create_task(self._retention_loop())
+
+    async def _enable_incremental_vacuum(self):
+        # Lets retention hand freed pages back to the filesystem a few at a time. Switching an
+        # existing database needs one full VACUUM; a new one only needs the pragma.
+        db = self._writer
+        async with db.execute("PRAGMA auto_vacuum") as cursor:
+            if (await cursor.fetchone())[0] == 2:
+                return
+        await db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        await db.execute("VACUUM")
+
+    async def _migrate(self):
+        db = self._writer
+        async with db.execute("PRAGMA user_version") as cursor:
+            version = (await cursor.fetchone())[0]
+        if version == 0:
+            # Databases created before versioning have the v1 table but no user_version.
+            async with db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'alerts'") as cursor:
+                if await cursor.fetchone():
+                    version = 1
+        if version > SCHEMA_VERSION:
+            raise RuntimeError(f"{self.db_path} has schema version {version}, newer than supported {SCHEMA_VERSION}.")
+        for target in range(version + 1, SCHEMA_VERSION + 1):
+            await db.execute("BEGIN IMMEDIATE")
+            try:
+                await _MIGRATIONS[target](db)
+                await db.execute(f"PRAGMA user_version = {target}")
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+            logger.info("SQLiteAlertRepository: Migrated %s to schema version %d.", self.db_path, target)
+
+    async def _warm_latest_cache(self):
+        db = self._writer
+        async with db.execute(
+            "SELECT timestamp, symbol, action, confidence FROM alerts ORDER BY timestamp DESC, id DESC LIMIT 1"
+        ) as cursor:
+            self._latest = await cursor.fetchone()
+        # SQLite returns the other columns from the row holding MAX(timestamp).
+        async with db.execute(
+            "SELECT MAX(timestamp), symbol, action, confidence FROM alerts GROUP BY symbol"
+        ) as cursor:
+            self._latest_by_symbol = {row[1]: tuple(row) async for row in cursor}
+
+    @asynccontextmanager
+    async def _reader(self):
+        reader = await self._readers.get()
+        try:
+            yield reader
+        finally:
+            self._readers.put_nowait(reader)
+
+    @staticmethod
+    def _to_row(alert: Alert) -> tuple:
+        return (to_epoch_ns(alert.timestamp), alert.symbol, str(alert.action), alert.confidence)
+
+    @staticmethod
+    def _from_row(row) -> Alert:
+        return Alert(from_epoch_ns(row[0]), row[1], row[2], row[3])
+
+    async def _flush_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+            try:
+                await self._commit_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _commit_batch(self, batch: list[tuple]):
+        """Writes batch, retrying failed commits; caches its rows once committed, or records the drop."""
+        for attempt in range(1, self.write_attempts + 1):
+            try:
+                async with self._write_lock:
+                    await self._write_batch(batch)
+            except Exception as e:
+                self._failing = True
+                if attempt < self.write_attempts:
+                    delay = self.retry_delay * 2 ** (attempt - 1)
+                    logger.warning("SQLiteAlertRepository: Failed to write %d alert(s) (attempt %d): %s; "
+                                   "retrying in %.2fs.", len(batch), attempt, e, delay)
+                    await asyncio.sleep(delay)
+                    continue
+                logger.error("SQLiteAlertRepository: Dropped %d alert(s) after %d failed attempt(s): %s",
+                             len(batch), attempt, e)
+                self.failed_writes += len(batch)
+                self._dropped += len(batch)
+                self._write_error = e
+                return
+            self._failing = False
+            for row in batch:
+                self._cache_latest(row)
+            return
+
+    async def _write_batch(self, rows: list[tuple]):
+        try:
+            await self._writer.executemany(
+                "INSERT INTO alerts (timestamp, symbol, action, confidence) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            await self._writer.commit()
+        except Exception:
+            await self._writer.rollback()
+            raise
+
+    def _cache_latest(self, row: tuple):
+        if self._latest is None or row[0] >= self._latest[0]:
+            self._latest = row
+        previous = self._latest_by_symbol.get(row[1])
+        if previous is None or row[0] >= previous[0]:
+            self._latest_by_symbol[row[1]] = row
 
     async def save_alert(self, alert: Alert):
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("INSERT INTO alerts VALUES (?, ?, ?, ?)", (
-                alert.timestamp.isoformat(),
-                alert.symbol,
-                alert.action,
-                alert.confidence
-            ))
-            await db.commit()
-
-    async def get_latest_alert(self) -> Alert | None:
-        async with aiosqlite.connect(self.db_path) as db:
-            async with db.execute("SELECT * FROM alerts ORDER BY timestamp DESC LIMIT 1") as cursor:
-                row = await cursor.fetchone()
-                if row:
-                    return Alert(datetime.fromisoformat(row[0]), row[1], row[2], row[3])
-                return None
+        """Queues the alert for the next group commit. Blocks only when max_pending alerts are waiting."""
+        await self._queue.put(self._to_row(alert))
+
+    async def save_alerts(self, batch: AlertBatch):
+        """Queues a whole batch; its rows are written by the same group commits as save_alert."""
+        for row in batch.rows():
+            if self._queue.full():
+                await self._queue.put(row)
+            else:
+                self._queue.put_nowait(row)
+
+    async def flush(self):
+        """
+        Waits until every alert queued so far has been committed. Raises AlertWriteError
+        if alerts were dropped since the previous flush.
+        """
+        if self._queue is not None:
+            await self._queue.join()
+        if self._write_error is not None:
+            error, dropped = self._write_error, self._dropped
+            self._write_error, self._dropped = None, 0
+            raise AlertWriteError(f"{dropped} alert(s) could not be written to {self.db_path}") from error
+
+    async def close(self):
+        """
+        Drains pending writes, stops the flusher and closes all connections; raises
+        AlertWriteError afterwards if alerts were dropped.
+        """
+        if self._writer is None:
+            return
+        if self._retention_task is not None:
+            self._retention_task.cancel()
+            await asyncio.gather(self._retention_task, return_exceptions=True)
+            self._retention_task = None
+        try:
+            await self.flush()
+        finally:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            for reader in self._reader_conns:
+                await reader.close()
+            await self._writer.close()
+            self._writer = None
+            self._reader_conns = []
+            self._readers = None
+            self._queue = None
+            self._flusher = None
+
+    async def get_latest_alert(self, symbol: str | None = None) -> Alert | None:
+        """Returns the newest alert overall, or for one symbol, from the in-memory cache."""
+        row = self._latest if symbol is None else self._latest_by_symbol.get(symbol)
+        return self._from_row(row) if row else None
+
+    async def query_alerts(self, query: AlertQuery) -> AlertPage:
+        """
+        Keyset-paginated read on a pooled reader connection, newest first. The symbol and
+        time filters are served by the (symbol, timestamp) / (timestamp) indexes, whose
+        implicit rowid also orders ties. Only committed alerts are visible, so alerts saved
+        within the last flush_interval may not appear yet.
+        """
+        clauses, params = [], []
+        if query.symbol is not None:
+            clauses.append("symbol = ?")
+            params.append(query.symbol)
+        if query.action is not None:
+            clauses.append("action = ?")
+            params.append(query.action)
+        if query.since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(to_epoch_ns(query.since))
+        if query.until is not None:
+            clauses.append("timestamp < ?")
+            params.append(to_epoch_ns(query.until))
+        if query.min_confidence is not None:
+            clauses.append("confidence >= ?")
+            params.append(query.min_confidence)
+        if query.after is not None:
+            clauses.append("(timestamp, id) < (?, ?)")
+            params.extend(query.after)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = (f"SELECT timestamp, symbol, action, confidence, id FROM alerts {where} "
+               f"ORDER BY timestamp DESC, id DESC LIMIT ?")
+        # One extra row tells whether another page follows without a COUNT query.
+        async with self._reader() as db:
+            async with db.execute(sql, (*params, query.limit + 1)) as cursor:
+                rows = await cursor.fetchall()
+        page = rows[:query.limit]
+        next_cursor = AlertCursor(page[-1][0], page[-1][4]) if len(rows) > query.limit else None
+        batch = AlertBatch()
+        for timestamp_ns, symbol, action, confidence, _ in page:
+            batch.append(timestamp_ns, symbol, action, confidence)
+        return AlertPage(batch, next_cursor)
+
+    async def get_rollups(self,
+                          interval_seconds: int,
+                          symbol: str | None = None,
+                          since: datetime | None = None,
+                          until: datetime | None = None) -> list[AlertRollup]:
+        """Aggregates of expired alerts for one rollup interval, oldest bucket first."""
+        clauses, params = ["interval_seconds = ?"], [interval_seconds]
+        if symbol is not None:
+            clauses.append("symbol = ?")
+            params.append(symbol)
+        if since is not None:
+            clauses.append("bucket_start >= ?")
+            params.append(to_epoch_ns(since))
+        if until is not None:
+            clauses.append("bucket_start < ?")
+            params.append(to_epoch_ns(until))
+        sql = (f"SELECT symbol, bucket_start, alerts, buys, sells, confidence_sum FROM alert_rollups "
+               f"WHERE {' AND '.join(clauses)} ORDER BY bucket_start, symbol")
+        async with self._reader() as db:
+            async with db.execute(sql, params) as cursor:
+                rows = await cursor.fetchall()
+        return [AlertRollup(symbol, bucket_start, interval_seconds, alerts, buys, sells, confidence_sum)
+                for symbol, bucket_start, alerts, buys, sells, confidence_sum in rows]
+
+    async def _retention_loop(self):
+        while True:
+            try:
+                report = await self.apply_retention()
+                if report.partitions:
+                    logger.info("SQLiteAlertRepository: Expired %d partition(s), archived %d and deleted %d alert(s).",
+                                report.partitions, report.archived, report.deleted)
+            except Exception as e:
+                logger.error("SQLiteAlertRepository: Retention pass failed: %s", e)
+            await asyncio.sleep(self.retention.interval)
+
+    async def apply_retention(self, now: datetime | None = None) -> RetentionReport:
+        """
+        Runs one retention pass over every day partition older than the hot window.
+
+        For each one, alerts not handled by an earlier pass are read on a reader
+        connection chunk_size rows at a time, tallied into the rollups and collected as
+        archive columns, and the archive is written; the rollups and
+        the partition's progress in alert_partitions are committed together, so a pass
+        interrupted at any point neither loses nor double-counts alerts. The handled
+        rows are then deleted in chunks and the freed pages released with
+        incremental vacuum.
+        """
+        policy = self.retention or RetentionPolicy()
+        now = now or datetime.now(timezone.utc)
+        cutoff_ns = (to_epoch_ns(now) // DAY_NS - policy.hot_days) * DAY_NS
+        report = RetentionReport()
+        next_ns = -2**63
+        while True:
+            async with self._reader() as db:
+                async with db.execute("SELECT MIN(timestamp) FROM alerts WHERE timestamp >= ?", (next_ns,)) as cursor:
+                    oldest = (await cursor.fetchone())[0]
+            if oldest is None or oldest >= cutoff_ns:
+                break
+            day = oldest // DAY_NS
+            await self._expire_partition(day, policy, report)
+            report.partitions += 1
+            next_ns = (day + 1) * DAY_NS
+        if report.deleted:
+            await self._incremental_vacuum(policy)
+        return report
+
+    async def _expire_partition(self, day: int, policy: RetentionPolicy, report: RetentionReport):
+        start, end = day * DAY_NS, (day + 1) * DAY_NS
+        # Rollup tallies keyed by (interval_seconds, symbol, bucket_start), and the archive's columns.
+        rollups: dict[tuple[int, str, int], list] = {}
+        archive = AlertBatch() if policy.archive_dir is not None else None
+        archived = 0
+        async with self._reader() as db:
+            async with db.execute("SELECT archived_through_id, parts FROM alert_partitions WHERE day = ?",
+                                  (day,)) as cursor:
+                through_id, parts = await cursor.fetchone() or (0, 0)
+            # Alerts saved from here on get larger ids, so this pass handles exactly the ids up to last_id.
+            async with db.execute("SELECT COALESCE(MAX(id), 0) FROM alerts") as cursor:
+                last_id = (await cursor.fetchone())[0]
+            after = (start, through_id)
+            while True:
+                # Keyset scan in timestamp index order, chunk_size rows at a time.
+                async with db.execute(
+                    "SELECT id, timestamp, symbol, action, confidence FROM alerts "
+                    "WHERE timestamp >= ? AND timestamp < ? AND id > ? AND id <= ? AND (timestamp, id) > (?, ?) "
+                    "ORDER BY timestamp, id LIMIT ?",
+                    (start, end, through_id, last_id, *after, policy.chunk_size),
+                ) as cursor:
+                    rows = await cursor.fetchall()
+                for _, timestamp_ns, symbol, action, confidence in rows:
+                    for seconds in policy.rollup_intervals:
+                        interval_ns = seconds * 1_000_000_000
+                        tally = rollups.setdefault((seconds, symbol, timestamp_ns // interval_ns * interval_ns),
+                                                   [0, 0, 0, 0.0])
+                        tally[0] += 1
+                        tally[1] += action == "buy"
+                        tally[2] += action == "sell"
+                        tally[3] += confidence
+                    if archive is not None:
+                        archive.append(timestamp_ns, symbol, action, confidence)
+                archived += len(rows)
+                if len(rows) < policy.chunk_size:
+                    break
+                after = (rows[-1][1], rows[-1][0])
+                await asyncio.sleep(policy.pause)
+
+        if archived:
+            if archive is not None:
+                name = f"alerts-{from_epoch_ns(start).date().isoformat()}.part{parts + 1}.npz"
+                path = os.path.join(policy.archive_dir, name)
+                await asyncio.to_thread(self._archive_batch, path, archive)
+                report.archive_files.append(path)
+            async with self._write_lock:
+                db = self._writer
+                await db.executemany(
+                    "INSERT INTO alert_rollups (interval_seconds, symbol, bucket_start, alerts, buys, sells, confidence_sum) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (interval_seconds, symbol, bucket_start) DO UPDATE SET "
+                    "alerts = alerts + excluded.alerts, buys = buys + excluded.buys, sells = sells + excluded.sells, "
+                    "confidence_sum = confidence_sum + excluded.confidence_sum",
+                    [(*key, *tally) for key, tally in rollups.items()],
+                )
+                await db.execute(
+                    "INSERT INTO alert_partitions (day, archived_through_id, parts, alerts) VALUES (?, ?, 1, ?) "
+                    "ON CONFLICT (day) DO UPDATE SET archived_through_id = excluded.archived_through_id, "
+                    "parts = parts + 1, alerts = alerts + excluded.alerts",
+                    (day, last_id, archived),
+                )
+                await db.commit()
+            through_id = last_id
+            report.archived += archived
+
+        while True:
+            async with self._write_lock:
+                cursor = await self._writer.execute(
+                    "DELETE FROM alerts WHERE id IN (SELECT id FROM alerts "
+                    "WHERE timestamp >= ? AND timestamp < ? AND id <= ? LIMIT ?)",
+                    (start, end, through_id, policy.chunk_size),
+                )
+                deleted = cursor.rowcount
+                await self._writer.commit()
+            report.deleted += deleted
+            if deleted < policy.chunk_size:
+                break
+            await asyncio.sleep(policy.pause)
+
+    @staticmethod
+    def _archive_batch(path: str, batch: AlertBatch):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        write_alert_archive(path, batch)
+
+    async def _incremental_vacuum(self, policy: RetentionPolicy):
+        previous = None
+        while True:
+            async with self._write_lock:
+                # Each result row is one freed page, so the pragma must be stepped to completion.
+                async with self._writer.execute(f"PRAGMA incremental_vacuum({policy.vacuum_pages})") as cursor:
+                    await cursor.fetchall()
+                await self._writer.commit()
+                async with self._writer.execute("PRAGMA freelist_count") as cursor:
+                    remaining = (await cursor.fetchone())[0]
+            # Without auto_vacuum = INCREMENTAL the pragma frees nothing, so stop once it stalls.
+            if not remaining or remaining == previous:
+                break
+            previous = remaining
+            await asyncio.sleep(policy.pause)
@@ -1,9 +1,29 @@
+import asyncio
+import functools
+import logging
 import os
-import alpaca_trade_api as tradeapi
-from alpaca_trade_api.rest import APIError
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable
+from Ngunguruhoe.application.services.request_budget import RateLimited, RequestBudget
+
+logger = logging.getLogger(__name__)
 
 class AlpacaAdapter:
-    def __init__(self):
+    def __init__(self, max_workers: int | None = None, symbols_per_request: int | None = None,
+                 budget: RequestBudget | None = None):
+        """
+        max_workers sizes the thread pool that runs the blocking SDK calls (and the
+        HTTP keep-alive connection pool shared by those threads).
+        symbols_per_request caps how many symbols go into one multi-symbol request.
+        budget, if given, paces every request through its token bucket and is fed the
+        rate-limit headers of every response; a 429 pauses it instead of the SDK
+        sleeping and retrying on a worker thread, and the fetch that got it raises
+        RateLimited so its caller can retry once the pause ends.
+
+        Construction does no network I/O; await connect() to verify the credentials.
+        """
+        self.max_workers = max_workers or int(os.getenv("ALPACA_MAX_WORKERS", "8"))
+        self.symbols_per_request = symbols_per_request or int(os.getenv("ALPACA_SYMBOLS_PER_REQUEST", "200"))
         self.api_key = os.getenv("ALPACA_API_KEY")
         self.secret_key = os.getenv("ALPACA_SECRET_KEY")
         self.paper_trading = os.getenv("ALPACA_PAPER", "True").lower() == "true"
@@ -11,38 +31,123 @@ class AlpacaAdapter:
         if not self.api_key or not self.secret_key:
             raise ValueError("Alpaca API key and secret key must be set as environment variables.")
 
-        base_url = "https://paper-api.alpaca.markets" if self.paper_trading else "https://api.alpaca.markets"
+        # The SDK (and pandas, which it pulls in) is imported on first use, not when this module is.
+        import alpaca_trade_api as tradeapi
+        from alpaca_trade_api.rest import APIError
+        from requests.adapters import HTTPAdapter
+        self._api_error = APIError
+        self.connected = False
+
+        base_url = os.getenv("ALPACA_BASE_URL") or (
+            "https://paper-api.alpaca.markets" if self.paper_trading else "https://api.alpaca.markets")
         self.api = tradeapi.REST(self.api_key, self.secret_key, base_url, api_version='v2')
+        # The SDK keeps a single requests.Session; give it one pooled keep-alive connection
+        # per worker thread so concurrent calls reuse sockets instead of reconnecting.
+        http_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_workers)
+        self.api._session.mount("https://", http_adapter)
+        self.api._session.mount("http://", http_adapter)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="alpaca")
+        self.budget = budget
+        if budget is not None:
+            self.api._retry = 0
+            self.api._session.hooks["response"].append(self._observe_response)
 
-        try:
-            # Check if the API connection is valid
-            self.api.get_account()
-            print("Successfully connected to Alpaca API.")
-        except APIError as e:
-            print(f"Error connecting to Alpaca API: {e}")
-            # Depending on the desired behavior, you might want to raise the exception
-            # or handle it by setting a state that indicates the adapter is not functional.
-            raise
+    def _observe_response(self, response, *args, **kwargs):
+        headers = response.headers
+        if response.status_code == 429:
+            retry_after = headers.get("Retry-After")
+            self.budget.throttle(float(retry_after) if retry_after and retry_after.isdigit() else None)
+            return
+        limit, remaining, reset = (headers.get(f"X-RateLimit-{name}") for name in ("Limit", "Remaining", "Reset"))
+        if limit or remaining:
+            self.budget.observe(int(limit) if limit else None, int(remaining) if remaining else None,
+                                float(reset) if reset else None)
+
+    def _raise_if_rate_limited(self, error: Exception, what: str):
+        # The SDK raises APIError or a bare HTTPError depending on the body; both carry the response.
+        response = getattr(error, "response", None)
+        if self.budget is not None and getattr(response, "status_code", None) == 429:
+            raise RateLimited(f"Rate limited fetching {what}") from error
+
+    async def connect(self, initial_delay: float = 1.0, max_delay: float = 30.0, max_attempts: int | None = None) -> bool:
+        """
+        Checks the API connection with get_account on the thread pool, retrying with
+        exponential backoff (initial_delay doubling up to max_delay). Returns True once
+        connected, or False after max_attempts failures (None retries forever).
+        """
+        delay = initial_delay
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                await self._run_blocking(self.api.get_account)
+            except Exception as e:
+                if max_attempts is not None and attempt >= max_attempts:
+                    logger.error("Error connecting to Alpaca API after %d attempt(s): %s", attempt, e)
+                    return False
+                logger.warning("Error connecting to Alpaca API (attempt %d): %s; retrying in %.1fs.", attempt, e, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, max_delay)
+            else:
+                self.connected = True
+                logger.info("Successfully connected to Alpaca API.")
+                return True
+
+    async def _run_blocking(self, fn, *args):
+        """Runs a synchronous SDK call on the adapter's thread pool so the event loop keeps running."""
+        if self.budget is not None:
+            await self.budget.acquire()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args))
 
     async def get_latest_trade(self, symbol: str):
         """Fetches the latest trade for a given symbol."""
         try:
-            # Alpaca API uses REST, which is synchronous by default.
-            # For async usage in FastAPI/asyncio, it's common to run sync SDK calls
-            # in a thread pool executor to avoid blocking the event loop.
-            # However, the alpaca-trade-api v1.x SDK itself is not inherently async.
-            # For simplicity in this step, we'll make a synchronous call.
-            # In a production system, consider using asyncio.to_thread (Python 3.9+)
-            # or an async-compatible Alpaca library if available.
-            trade = self.api.get_latest_trade(symbol)
+            # The alpaca-trade-api SDK is synchronous, so the HTTP round trip runs on the thread pool.
+            trade = await self._run_blocking(self.api.get_latest_trade, symbol)
             return trade
-        except APIError as e:
-            print(f"Error fetching latest trade for {symbol} from Alpaca: {e}")
+        except self._api_error as e:
+            self._raise_if_rate_limited(e, symbol)
+            logger.warning("Error fetching latest trade for %s from Alpaca: %s", symbol, e, extra={"symbol": symbol})
             return None
         except Exception as e:
-            print(f"An unexpected error occurred while fetching latest trade for {symbol}: {e}")
+            self._raise_if_rate_limited(e, symbol)
+            logger.exception("An unexpected error occurred while fetching latest trade for %s: %s", symbol, e,
+                             extra={"symbol": symbol})
             return None
 
+    async def get_latest_trades(self, symbols: Iterable[str]) -> dict[str, Any]:
+        """
+        Fetches the latest trade for many symbols using multi-symbol requests.
+        Returns a {symbol: trade} dict; symbols with no data or in a failed request are omitted.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        chunks = [symbols[i:i + self.symbols_per_request]
+                  for i in range(0, len(symbols), self.symbols_per_request)]
+        results = await asyncio.gather(*(self._fetch_trades_chunk(chunk) for chunk in chunks))
+        trades: dict[str, Any] = {}
+        for chunk_trades in results:
+            trades.update(chunk_trades)
+        return trades
+
+    async def _fetch_trades_chunk(self, symbols: list[str]) -> dict[str, Any]:
+        try:
+            return dict(await self._run_blocking(self.api.get_latest_trades, symbols))
+        except self._api_error as e:
+            self._raise_if_rate_limited(e, f"{len(symbols)} symbol(s)")
+            logger.warning("Error fetching latest trades for %d symbol(s) from Alpaca: %s", len(symbols), e)
+            return {}
+        except Exception as e:
+            self._raise_if_rate_limited(e, f"{len(symbols)} symbol(s)")
+            logger.exception("An unexpected error occurred while fetching latest trades for %d symbol(s): %s",
+                             len(symbols), e)
+            return {}
+
+    def close(self):
+        """Stops the worker threads and closes pooled HTTP connections."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.api._session.close()
+
 # Example usage (for testing purposes, can be removed later)
 if __name__ == '__main__':
     # Ensure you have ALPACA_API_KEY, ALPACA_SECRET_KEY, and optionally ALPACA_PAPER set as env vars
@@ -50,22 +155,25 @@ if __name__ == '__main__':
     # export ALPACA_API_KEY='YOUR_KEY_ID'
     # export ALPACA_SECRET_KEY='YOUR_SECRET_KEY'
     # export ALPACA_PAPER='True'
+    logging.basicConfig(level=logging.INFO)
+    from alpaca_trade_api.rest import APIError
     try:
         adapter = AlpacaAdapter()
+        asyncio.run(adapter.connect(max_attempts=1))
         # Example: Fetch latest trade for BTC/USD (ensure symbol format is correct for Alpaca)
         # Alpaca uses symbols like 'BTCUSD' for crypto or 'AAPL' for stocks.
         # The exact symbol format might depend on your Alpaca account and what they support.
         # For this example, let's assume 'BTCUSD' is a valid symbol.
-        # trade_data = asyncio.run(adapter.get_latest_trade('BTCUSD')) # if get_latest_trade were async
-        # Since it's sync now:
-        trade_data = adapter.get_latest_trade('AAPL') # Using a common stock symbol for example
+        trade_data = asyncio.run(adapter.get_latest_trade('AAPL')) # Using a common stock symbol for example
         if trade_data:
-            print(f"Latest trade for AAPL: Price={trade_data.p}, Timestamp={trade_data.t}")
+            logger.info("Latest trade for AAPL: Price=%s, Timestamp=%s", trade_data.p, trade_data.t)
         else:
-            print("Could not retrieve trade data for AAPL.")
+            logger.info("Could not retrieve trade data for AAPL.")
     except ValueError as ve:
-        print(ve)
+        logger.error("%s", ve)
     except APIError as apie:
-        print(f"Alpaca API Error during example usage: {apie}")
+        logger.error("Alpaca API Error during example usage: %s", apie)
     except Exception as ex:
-        print(f"Unexpected error during example usage: {ex}")
+        logger.error("Unexpected error during example usage: %s", ex)
+    else:
+        adapter.close()
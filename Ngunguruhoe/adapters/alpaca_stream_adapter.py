@@ -0,0 +1,157 @@
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass
+from typing import Iterable
+import websockets
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STREAM_URL = "wss://stream.data.alpaca.markets/v2/iex"
+
+@dataclass
+class StreamTick:
+    """
+    One trade or quote update from the market data stream.
+    Field names follow Alpaca's trade entity (S=symbol, p=price, s=size, t=timestamp),
+    so strategies written against AlpacaAdapter trades work on ticks unchanged.
+    """
+    S: str
+    p: float
+    s: float
+    t: str
+    kind: str = "trade" # 'trade' or 'quote'
+
+class ConflatingTickQueue:
+    """
+    Async queue of ticks that keeps only the newest pending tick per symbol.
+
+    If consumers fall behind, newer ticks overwrite the pending tick for that symbol
+    instead of piling up, so memory is bounded by the number of symbols. A symbol is
+    handed to at most one consumer at a time; call task_done(symbol) when finished.
+    put() blocks (backpressure) once max_pending distinct symbols are waiting.
+    """
+    def __init__(self, max_pending: int = 10000):
+        self.max_pending = max_pending
+        self._pending: dict[str, StreamTick] = {}
+        self._ready: asyncio.Queue[str] = asyncio.Queue()
+        self._in_progress: set[str] = set()
+        self._space = asyncio.Condition()
+        self.received = 0
+        self.conflated = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    async def put(self, tick: StreamTick):
+        self.received += 1
+        symbol = tick.S
+        if symbol in self._pending:
+            self._pending[symbol] = tick
+            self.conflated += 1
+            return
+        if len(self._pending) >= self.max_pending:
+            async with self._space:
+                await self._space.wait_for(lambda: len(self._pending) < self.max_pending or symbol in self._pending)
+            if symbol in self._pending:
+                self._pending[symbol] = tick
+                self.conflated += 1
+                return
+        self._pending[symbol] = tick
+        if symbol not in self._in_progress:
+            self._ready.put_nowait(symbol)
+
+    async def get(self) -> StreamTick:
+        symbol = await self._ready.get()
+        tick = self._pending.pop(symbol)
+        self._in_progress.add(symbol)
+        async with self._space:
+            self._space.notify_all()
+        return tick
+
+    def task_done(self, symbol: str):
+        self._in_progress.discard(symbol)
+        if symbol in self._pending:
+            # A newer tick arrived while this symbol was being processed.
+            self._ready.put_nowait(symbol)
+
+class AlpacaStreamAdapter:
+    """
+    Subscribes to Alpaca's real-time trade (and optionally quote) stream over websocket
+    and feeds every update into a ConflatingTickQueue.
+
+    The connection is re-established with exponential backoff whenever it drops, and
+    the subscription is sent again on every new connection.
+    """
+    def __init__(self,
+                 symbols: Iterable[str],
+                 queue: ConflatingTickQueue,
+                 url: str | None = None,
+                 subscribe_quotes: bool = False,
+                 reconnect_delay: float = 1.0,
+                 max_reconnect_delay: float = 30.0):
+        self.symbols = list(dict.fromkeys(symbols))
+        self.queue = queue
+        self.url = url or os.getenv("ALPACA_STREAM_URL", DEFAULT_STREAM_URL)
+        self.subscribe_quotes = subscribe_quotes
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.api_key = os.getenv("ALPACA_API_KEY", "")
+        self.secret_key = os.getenv("ALPACA_SECRET_KEY", "")
+        self.connections = 0
+
+    async def run(self):
+        """Streams until cancelled, reconnecting and resubscribing after any disconnect."""
+        delay = self.reconnect_delay
+        while True:
+            try:
+                async with websockets.connect(self.url, max_queue=1024) as ws:
+                    await self._handshake(ws)
+                    self.connections += 1
+                    delay = self.reconnect_delay
+                    logger.info("AlpacaStreamAdapter: Subscribed to %d symbol(s) at %s.", len(self.symbols), self.url)
+                    async for raw in ws:
+                        await self._dispatch(json.loads(raw))
+                logger.warning("AlpacaStreamAdapter: Stream closed by server.")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("AlpacaStreamAdapter: Stream error: %s", e)
+            logger.info("AlpacaStreamAdapter: Reconnecting in %.1fs...", delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _handshake(self, ws):
+        await self._expect(ws, "success", "connected")
+        await ws.send(json.dumps({"action": "auth", "key": self.api_key, "secret": self.secret_key}))
+        await self._expect(ws, "success", "authenticated")
+        subscription = {"action": "subscribe", "trades": self.symbols}
+        if self.subscribe_quotes:
+            subscription["quotes"] = self.symbols
+        await ws.send(json.dumps(subscription))
+        await self._expect(ws, "subscription")
+
+    @staticmethod
+    async def _expect(ws, message_type: str, msg: str | None = None):
+        for message in json.loads(await ws.recv()):
+            if message.get("T") == "error":
+                raise ConnectionError(f"Stream error {message.get('code')}: {message.get('msg')}")
+            if message.get("T") == message_type and (msg is None or message.get("msg") == msg):
+                return message
+        raise ConnectionError(f"Unexpected stream handshake reply, wanted {message_type} {msg or ''}".strip())
+
+    async def _dispatch(self, messages: list[dict]):
+        for message in messages:
+            kind = message.get("T")
+            if kind == "t":
+                await self.queue.put(StreamTick(S=message["S"], p=message["p"], s=message.get("s", 0),
+                                                t=message.get("t", ""), kind="trade"))
+            elif kind == "q":
+                bid, ask = message.get("bp", 0), message.get("ap", 0)
+                mid = (bid + ask) / 2 if bid and ask else (bid or ask)
+                if mid:
+                    await self.queue.put(StreamTick(S=message["S"], p=mid, s=message.get("bs", 0),
+                                                    t=message.get("t", ""), kind="quote"))
+            elif kind == "error":
+                logger.error("AlpacaStreamAdapter: Stream error %s: %s", message.get("code"), message.get("msg"))
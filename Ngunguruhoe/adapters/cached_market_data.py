@@ -0,0 +1,135 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Mapping
+
+class CachedMarketDataProvider:
+    """
+    Caching layer in front of a market data provider such as AlpacaAdapter.
+
+    Latest trades are cached per symbol for a TTL (with optional per-symbol overrides)
+    in a bounded LRU. Concurrent requests for a symbol that is already being fetched
+    wait on that single in-flight call instead of issuing their own, so bursts of
+    identical lookups cost one upstream request. Empty (None) results are not cached.
+    """
+    def __init__(self,
+                 provider,
+                 ttl: float = 1.0,
+                 max_size: int = 10000,
+                 ttl_overrides: Mapping[str, float] | None = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1.")
+        self.provider = provider
+        self.ttl = ttl
+        self.max_size = max_size
+        self.ttl_overrides = dict(ttl_overrides or {})
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict() # symbol -> (expires_at, trade)
+        self._in_flight: dict[str, asyncio.Task] = {} # symbol -> task resolving to {symbol: trade}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def ttl_for(self, symbol: str) -> float:
+        return self.ttl_overrides.get(symbol, self.ttl)
+
+    def stats(self) -> dict[str, float]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
+
+    def invalidate(self, symbol: str | None = None):
+        if symbol is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(symbol, None)
+
+    async def get_latest_trade(self, symbol: str):
+        found, trade = self._lookup(symbol)
+        if found:
+            self.hits += 1
+            return trade
+        task = self._in_flight.get(symbol)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = self._start_fetch([symbol], self._fetch_one(symbol))
+        # shield: a cancelled caller must not cancel the fetch other callers are waiting on.
+        return (await asyncio.shield(task)).get(symbol)
+
+    async def get_latest_trades(self, symbols: Iterable[str]) -> dict[str, Any]:
+        trades: dict[str, Any] = {}
+        waiting: dict[str, asyncio.Task] = {}
+        missing: list[str] = []
+        for symbol in dict.fromkeys(symbols):
+            found, trade = self._lookup(symbol)
+            if found:
+                self.hits += 1
+                trades[symbol] = trade
+            elif symbol in self._in_flight:
+                self.coalesced += 1
+                waiting[symbol] = self._in_flight[symbol]
+            else:
+                self.misses += 1
+                missing.append(symbol)
+        if missing:
+            task = self._start_fetch(missing, self._fetch_many(missing))
+            waiting.update((symbol, task) for symbol in missing)
+        for task in set(waiting.values()):
+            await asyncio.shield(task)
+        for symbol, task in waiting.items():
+            trade = task.result().get(symbol)
+            if trade is not None:
+                trades[symbol] = trade
+        return trades
+
+    def _lookup(self, symbol: str) -> tuple[bool, Any]:
+        entry = self._entries.get(symbol)
+        if entry is None:
+            return False, None
+        expires_at, trade = entry
+        if expires_at <= self._clock():
+            del self._entries[symbol]
+            return False, None
+        self._entries.move_to_end(symbol)
+        return True, trade
+
+    def _store(self, symbol: str, trade: Any):
+        if trade is None:
+            return
+        self._entries[symbol] = (self._clock() + self.ttl_for(symbol), trade)
+        self._entries.move_to_end(symbol)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _start_fetch(self, symbols: list[str], fetch) -> asyncio.Task:
+        task = asyncio.ensure_future(fetch)
+        for symbol in symbols:
+            self._in_flight[symbol] = task
+
+        def _done(done_task):
+            for symbol in symbols:
+                if self._in_flight.get(symbol) is done_task:
+                    del self._in_flight[symbol]
+            if not done_task.cancelled() and done_task.exception() is None:
+                for symbol, trade in done_task.result().items():
+                    self._store(symbol, trade)
+
+        task.add_done_callback(_done)
+        return task
+
+    async def _fetch_one(self, symbol: str) -> dict[str, Any]:
+        return {symbol: await self.provider.get_latest_trade(symbol)}
+
+    async def _fetch_many(self, symbols: list[str]) -> dict[str, Any]:
+        return await self.provider.get_latest_trades(symbols)
@@ -0,0 +1,80 @@
+import os
+from dataclasses import dataclass
+from typing import Iterator
+import numpy as np
+import pandas as pd
+from Ngunguruhoe.domain.models.market_snapshot import MarketSnapshot
+
+_UNIT_TO_NS = {"s": 1_000_000_000, "ms": 1_000_000, "us": 1_000, "ns": 1}
+
+@dataclass
+class ColumnMapping:
+    """Names of the source columns holding each snapshot field. size may be absent from the file."""
+    symbol: str = "symbol"
+    price: str = "price"
+    size: str = "size"
+    timestamp: str = "timestamp"
+
+TRADE_COLUMNS = ColumnMapping()
+BAR_COLUMNS = ColumnMapping(price="close", size="volume")
+
+def _timestamps_to_ns(values, unit: str) -> np.ndarray:
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.number):
+        return values.astype(np.int64) * _UNIT_TO_NS[unit]
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[ns]").astype(np.int64)
+    return pd.to_datetime(values, utc=True, format="mixed").as_unit("ns").asi8
+
+def _to_snapshot(symbol, price, size, timestamp, unit: str) -> MarketSnapshot:
+    price = np.asarray(price, dtype=np.float64)
+    return MarketSnapshot(
+        symbol=np.asarray(symbol, dtype=str),
+        price=price,
+        size=np.zeros(len(price)) if size is None else np.asarray(size, dtype=np.float64),
+        timestamp=_timestamps_to_ns(timestamp, unit),
+    )
+
+def _iter_csv(path: str, chunksize: int, columns: ColumnMapping, unit: str) -> Iterator[MarketSnapshot]:
+    header = pd.read_csv(path, nrows=0).columns
+    has_size = columns.size in header
+    usecols = [columns.symbol, columns.price, columns.timestamp] + ([columns.size] if has_size else [])
+    reader = pd.read_csv(path, usecols=usecols, chunksize=chunksize, dtype={columns.symbol: str})
+    for chunk in reader:
+        yield _to_snapshot(chunk[columns.symbol], chunk[columns.price],
+                           chunk[columns.size] if has_size else None, chunk[columns.timestamp], unit)
+
+def _iter_parquet(path: str, chunksize: int, columns: ColumnMapping, unit: str) -> Iterator[MarketSnapshot]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Reading Parquet files requires pyarrow: pip install pyarrow") from e
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    has_size = columns.size in parquet_file.schema_arrow.names
+    names = [columns.symbol, columns.price, columns.timestamp] + ([columns.size] if has_size else [])
+    for batch in parquet_file.iter_batches(batch_size=chunksize, columns=names):
+        column = lambda name: batch.column(name).to_numpy(zero_copy_only=False)
+        yield _to_snapshot(column(columns.symbol), column(columns.price),
+                           column(columns.size) if has_size else None, column(columns.timestamp), unit)
+
+def iter_historical_snapshots(path: str,
+                              chunksize: int = 500_000,
+                              columns: ColumnMapping = TRADE_COLUMNS,
+                              file_format: str | None = None,
+                              timestamp_unit: str = "ns") -> Iterator[MarketSnapshot]:
+    """
+    Streams a historical trades/bars file as MarketSnapshot chunks of at most chunksize rows,
+    so files far larger than memory can be replayed. CSV is read in chunks with pandas;
+    Parquet is memory-mapped and read batch by batch (requires pyarrow).
+
+    Timestamps may be ISO strings, datetimes, or numbers in timestamp_unit ('s', 'ms', 'us', 'ns').
+    Rows are expected in time order.
+    """
+    if timestamp_unit not in _UNIT_TO_NS:
+        raise ValueError(f"timestamp_unit must be one of {sorted(_UNIT_TO_NS)}, got {timestamp_unit!r}")
+    file_format = (file_format or os.path.splitext(path)[1].lstrip(".")).lower()
+    if file_format == "csv":
+        return _iter_csv(path, chunksize, columns, timestamp_unit)
+    if file_format in ("parquet", "pq"):
+        return _iter_parquet(path, chunksize, columns, timestamp_unit)
+    raise ValueError(f"Unsupported historical data format: {file_format!r} (expected csv or parquet)")
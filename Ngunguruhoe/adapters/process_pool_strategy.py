@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import multiprocessing
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Tuple
+import numpy as np
+from Ngunguruhoe.domain.models.market_snapshot import MarketSnapshot
+from Ngunguruhoe.domain.ports.strategy_port import StrategyPort
+
+logger = logging.getLogger(__name__)
+
+DEGRADE_REASONS = ("timeout", "crashed", "error")
+
+# Per worker process: the strategy built once by the initializer, and a loop to run it on.
+_strategy: StrategyPort | None = None
+_loop: asyncio.AbstractEventLoop | None = None
+
+def _init_worker(strategy_factory: Callable[[], StrategyPort]):
+    global _strategy, _loop
+    _strategy = strategy_factory()
+    _loop = asyncio.new_event_loop()
+
+def _evaluate(columns: tuple) -> tuple[np.ndarray, np.ndarray]:
+    actions, confidences = _loop.run_until_complete(_strategy.decide_actions(MarketSnapshot(*columns)))
+    return np.asarray(actions, dtype=str), np.asarray(confidences, dtype=np.float64)
+
+def _ping() -> bool:
+    return _strategy is not None
+
+class ProcessPoolStrategy(StrategyPort):
+    """
+    Runs a CPU-heavy strategy in warm worker processes, so a slow evaluation never
+    stalls the event loop (and with it every other symbol and the API).
+
+    Each worker process builds its own strategy once with strategy_factory
+    (a picklable top-level callable, e.g. the strategy class) and keeps it, with any
+    per-symbol state, for its lifetime. A symbol is always evaluated by the same
+    worker, picked by a stable hash, so stateful strategies see every tick of their
+    symbols. decide_action takes the symbol for market data that does not name one
+    (Alpaca's v2 trades); rows still without a symbol are spread over the workers in
+    turn rather than all hashed to one. A snapshot is split by worker and each part
+    crosses the process boundary as four NumPy columns.
+
+    Every call is bounded by timeout. Rows whose evaluation timed out, crashed its
+    worker or raised become hold with confidence 0.0 instead of failing the cycle; a
+    worker that timed out or crashed is replaced (a running evaluation cannot be
+    cancelled otherwise), losing that worker's strategy state.
+    """
+    def __init__(self,
+                 strategy_factory: Callable[[], StrategyPort],
+                 workers: int = 2,
+                 timeout: float = 5.0,
+                 start_method: str = "spawn"):
+        if workers < 1 or timeout <= 0:
+            raise ValueError("workers must be at least 1 and timeout positive.")
+        self.strategy_factory = strategy_factory
+        self.workers = workers
+        self.timeout = timeout
+        self._context = multiprocessing.get_context(start_method)
+        self._pools: list[ProcessPoolExecutor | None] = [None] * workers
+        self.evaluated = 0
+        self.degraded = dict.fromkeys(DEGRADE_REASONS, 0)
+        self.restarts = 0
+        self._next_unkeyed = 0
+
+    def _pool(self, worker: int) -> ProcessPoolExecutor:
+        pool = self._pools[worker]
+        if pool is None:
+            pool = self._pools[worker] = ProcessPoolExecutor(
+                max_workers=1, mp_context=self._context,
+                initializer=_init_worker, initargs=(self.strategy_factory,))
+        return pool
+
+    def _replace(self, worker: int, pool: ProcessPoolExecutor):
+        if self._pools[worker] is not pool:
+            return # already replaced by another call that failed on the same process
+        self._pools[worker] = None
+        self.restarts += 1
+        # The executor API cannot stop a task that is already running, so end the process itself.
+        for process in list(getattr(pool, "_processes", {}).values()):
+            process.kill()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def worker_for(self, symbol: str) -> int:
+        return zlib.crc32(symbol.encode()) % self.workers
+
+    def _dispatch(self, symbol: str) -> int:
+        if symbol:
+            return self.worker_for(symbol)
+        self._next_unkeyed = (self._next_unkeyed + 1) % self.workers
+        return self._next_unkeyed
+
+    async def start(self):
+        """Starts every worker and waits until each has built its strategy."""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._pool(worker), _ping) for worker in range(self.workers)))
+
+    def close(self):
+        for worker in range(self.workers):
+            pool, self._pools[worker] = self._pools[worker], None
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> dict[str, Any]:
+        return {"evaluated": self.evaluated, "degraded": dict(self.degraded), "restarts": self.restarts}
+
+    def bind_metrics(self, registry):
+        """Serves evaluation and degradation counts from a MetricsRegistry."""
+        registry.gauge("strategy_rows_evaluated", "Snapshot rows evaluated by strategy workers.").set_function(
+            lambda: self.evaluated)
+        degraded = registry.gauge("strategy_rows_degraded", "Snapshot rows turned into hold, by reason.", ("reason",))
+        for reason in DEGRADE_REASONS:
+            degraded.labels(reason).set_function(lambda reason=reason: self.degraded[reason])
+        registry.gauge("strategy_worker_restarts", "Strategy workers replaced after a timeout or crash.").set_function(
+            lambda: self.restarts)
+
+    async def decide_action(self, market_data: Any, symbol: str | None = None) -> Tuple[str, float]:
+        """symbol labels (and routes) market data that does not name its own symbol."""
+        actions, confidences = await self.decide_actions(MarketSnapshot.from_market_data(market_data, symbol=symbol))
+        return str(actions[0]), float(confidences[0])
+
+    async def decide_actions(self, snapshot: MarketSnapshot) -> Tuple[np.ndarray, np.ndarray]:
+        n = len(snapshot)
+        actions = np.full(n, "hold", dtype=object)
+        confidences = np.zeros(n)
+        by_worker = np.fromiter((self._dispatch(symbol) for symbol in snapshot.symbol.tolist()), np.int64, n)
+        parts = [(worker, np.flatnonzero(by_worker == worker)) for worker in np.unique(by_worker).tolist()]
+        results = await asyncio.gather(*(self._evaluate_part(worker, snapshot, rows) for worker, rows in parts))
+        for (_, rows), result in zip(parts, results):
+            if result is not None:
+                actions[rows], confidences[rows] = result
+        return actions.astype(str), confidences
+
+    async def _evaluate_part(self, worker: int, snapshot: MarketSnapshot, rows: np.ndarray):
+        columns = (snapshot.symbol[rows], snapshot.price[rows], snapshot.size[rows], snapshot.timestamp[rows])
+        pool = self._pool(worker)
+        try:
+            future = pool.submit(_evaluate, columns)
+            result = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            reason = "timeout"
+            self._replace(worker, pool)
+        except BrokenProcessPool:
+            reason = "crashed"
+            self._replace(worker, pool)
+        except Exception as e:
+            reason = "error"
+            logger.exception("ProcessPoolStrategy: Strategy raised for %d symbol(s): %s", len(rows), e)
+        else:
+            self.evaluated += len(rows)
+            return result
+        self.degraded[reason] += len(rows)
+        logger.warning("ProcessPoolStrategy: Evaluation of %d symbol(s) on worker %d degraded to hold (%s).",
+                       len(rows), worker, reason)
+        return None
@@ -1,12 +1,225 @@
-from fastapi import FastAPI
-from Ngunguruhoe.domain.models.alert import Alert
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+import numpy as np
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from Ngunguruhoe.adapters.alert_broadcaster import AlertBroadcaster, AlertEvent
+from Ngunguruhoe.application.metrics import MetricsRegistry
+from Ngunguruhoe.application.readiness import Readiness
+from Ngunguruhoe.application.services.alert_stats import AlertStats
+from Ngunguruhoe.domain.models.alert import ACTIONS, Alert, from_epoch_ns
+from Ngunguruhoe.domain.models.alert_batch import AlertBatch
+from Ngunguruhoe.domain.models.alert_query import AlertCursor, AlertQuery
 from Ngunguruhoe.domain.ports.alert_port import AlertPort
 
-def create_app(alert_repo: AlertPort):
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError: # orjson is optional; the stdlib encoder produces the same document, just slower.
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+SSE_KEEPALIVE_SECONDS = 15.0
+
+def _alert_to_dict(alert: Alert) -> dict:
+    return {
+        "timestamp": _as_utc(alert.timestamp).isoformat(timespec="microseconds"),
+        "symbol": alert.symbol,
+        "action": str(alert.action),
+        "confidence": alert.confidence,
+    }
+
+def _batch_to_dicts(batch: AlertBatch) -> list[dict]:
+    """Same records as _alert_to_dict, built column-wise without per-row Alert or datetime objects."""
+    columns = batch.to_numpy()
+    timestamps = np.datetime_as_string(columns["timestamp_ns"].view("datetime64[ns]"), unit="us")
+    symbols, actions = batch.symbols, [action.value for action in ACTIONS]
+    return [
+        {"timestamp": f"{ts}+00:00", "symbol": symbols[symbol_id], "action": actions[code], "confidence": confidence}
+        for ts, symbol_id, code, confidence in zip(timestamps.tolist(), batch.symbol_ids, batch.action_codes,
+                                                   batch.confidence)
+    ]
+
+def _encode_event(event: AlertEvent) -> bytes:
+    # Encoded once per alert and shared by every subscriber.
+    if event.encoded is None:
+        event.encoded = _dumps({"id": event.id, **_alert_to_dict(event.alert)})
+    return event.encoded
+
+def _parse_symbols(symbols: str | None) -> list[str] | None:
+    return [s.strip() for s in symbols.split(",") if s.strip()] if symbols else None
+
+def _parse_event_id(value: str | None) -> int | None:
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid event id: {value!r}")
+
+def _as_utc(ts: datetime) -> datetime:
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison, as required for If-None-Match.
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+def _not_modified_since(if_modified_since: str, last_modified: datetime) -> bool:
+    try:
+        since = _as_utc(parsedate_to_datetime(if_modified_since))
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have one-second resolution.
+    return last_modified.replace(microsecond=0) <= since
+
+def create_app(alert_repo: AlertPort, broadcaster: AlertBroadcaster | None = None,
+               metrics_registry: MetricsRegistry | None = None, readiness: Readiness | None = None,
+               alert_stats: AlertStats | None = None):
+    """
+    broadcaster, if given, enables the live /alerts/stream (SSE) and /ws/alerts (WebSocket) endpoints.
+    metrics_registry is rendered at /metrics in Prometheus text format; pass the one the
+    pipeline records into (see PipelineMetrics).
+    readiness backs /ready: 200 once every check passes, 503 with the failing checks until then.
+    alert_stats, if given, serves /alerts/stats from its in-memory sliding-window aggregates.
+    """
     app = FastAPI()
+    registry = metrics_registry if metrics_registry is not None else MetricsRegistry()
+    if broadcaster is not None:
+        registry.gauge("stream_subscribers", "Connected live alert stream subscribers.").set_function(
+            lambda: len(broadcaster))
+
+    @app.get("/metrics")
+    async def metrics():
+        return Response(content=registry.render(), media_type=MetricsRegistry.CONTENT_TYPE)
+
+    @app.get("/ready")
+    async def ready():
+        checks = readiness.status() if readiness is not None else {}
+        ok = all(checks.values())
+        return Response(content=_dumps({"ready": ok, "checks": checks}), status_code=200 if ok else 503,
+                        media_type="application/json")
+
+    if alert_stats is not None:
+        @app.get("/alerts/stats")
+        async def get_alert_stats(symbol: str | None = None):
+            """
+            Alert counts, buy/sell ratio and average confidence per window (1h, 24h, 7d by
+            default), overall and per symbol. Served from memory, whatever the table size.
+            """
+            return Response(content=_dumps(alert_stats.snapshot(symbol)), media_type="application/json")
 
     @app.get("/latest-alert", response_model=Alert | None)
-    async def latest_alert():
-        return await alert_repo.get_latest_alert()
+    async def latest_alert(symbol: str | None = None):
+        return await alert_repo.get_latest_alert(symbol=symbol)
+
+    @app.get("/alerts")
+    async def list_alerts(request: Request,
+                          symbol: str | None = None,
+                          action: str | None = None,
+                          since: datetime | None = None,
+                          until: datetime | None = None,
+                          min_confidence: float | None = Query(None, ge=0.0, le=1.0),
+                          limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                          cursor: str | None = None):
+        """
+        Alert history, newest first, in pages of at most MAX_PAGE_SIZE. Pass the returned
+        next_cursor back as cursor to fetch the following page. Responses carry an ETag
+        and Last-Modified so unchanged pages can be revalidated with a 304.
+        """
+        try:
+            after = AlertCursor.decode(cursor) if cursor else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        page = await alert_repo.query_alerts(AlertQuery(
+            symbol=symbol, action=action, since=since, until=until,
+            min_confidence=min_confidence, limit=limit, after=after,
+        ))
+        body = _dumps({
+            "alerts": _batch_to_dicts(page.batch),
+            "next_cursor": page.next_cursor.encode() if page.next_cursor else None,
+        })
+        headers = {
+            "ETag": f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"',
+            "Cache-Control": "no-cache",
+        }
+        last_modified = from_epoch_ns(max(page.batch.timestamp_ns)) if len(page.batch) else None
+        if last_modified is not None:
+            headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+        if_none_match = request.headers.get("if-none-match")
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_none_match is not None:
+            not_modified = _etag_matches(if_none_match, headers["ETag"])
+        else:
+            not_modified = (if_modified_since is not None and last_modified is not None
+                            and _not_modified_since(if_modified_since, last_modified))
+        if not_modified:
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    if broadcaster is None:
+        return app
+
+    @app.get("/alerts/stream")
+    async def stream_alerts(symbols: str | None = None,
+                            last_event_id: str | None = None,
+                            last_event_id_header: str | None = Header(None, alias="Last-Event-ID")):
+        """
+        Server-Sent Events feed of new alerts, optionally for a comma-separated list of
+        symbols. Browsers reconnect with Last-Event-ID automatically and resume from the
+        broadcaster's replay buffer; last_event_id does the same for other clients.
+        """
+        resume_from = _parse_event_id(last_event_id_header or last_event_id)
+        subscription = broadcaster.subscribe(_parse_symbols(symbols), resume_from)
+
+        async def events():
+            try:
+                yield b"retry: 3000\n\n"
+                while True:
+                    event = await subscription.get(timeout=SSE_KEEPALIVE_SECONDS)
+                    if event is not None:
+                        yield b"id: %d\nevent: alert\ndata: %s\n\n" % (event.id, _encode_event(event))
+                    elif subscription.closed:
+                        break
+                    else:
+                        yield b": keepalive\n\n" # keeps idle connections open through proxies
+            finally:
+                subscription.close()
+
+        return StreamingResponse(events(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    @app.websocket("/ws/alerts")
+    async def websocket_alerts(websocket: WebSocket, symbols: str | None = None, last_event_id: int | None = None):
+        """WebSocket feed of new alerts as JSON text messages; same filters and resume semantics as /alerts/stream."""
+        await websocket.accept()
+        subscription = broadcaster.subscribe(_parse_symbols(symbols), last_event_id)
+
+        async def close_on_disconnect():
+            try:
+                while (await websocket.receive())["type"] != "websocket.disconnect":
+                    pass
+            finally:
+                subscription.close()
+
+        watcher = asyncio.create_task(close_on_disconnect())
+        try:
+            async for event in subscription:
+                await websocket.send_text(_encode_event(event).decode())
+            if subscription.evicted:
+                await websocket.close(code=1013, reason="Too slow; reconnect with last_event_id")
+        except (WebSocketDisconnect, RuntimeError):
+            pass # client went away mid-send
+        finally:
+            subscription.close()
+            watcher.cancel()
 
     return app
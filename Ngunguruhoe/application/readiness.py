@@ -0,0 +1,33 @@
+from typing import Callable
+
+class Readiness:
+    """
+    Named readiness checks served at /ready. Each check is a cheap callable returning
+    True when its dependency can serve traffic; the process is ready when all are.
+    Liveness is separate: the API answers as soon as it starts, ready or not.
+    """
+    def __init__(self):
+        self._checks: dict[str, Callable[[], bool]] = {}
+
+    def add_check(self, name: str, check: Callable[[], bool]):
+        self._checks[name] = check
+
+    def status(self) -> dict[str, bool]:
+        return {name: self._passes(check) for name, check in self._checks.items()}
+
+    @staticmethod
+    def _passes(check: Callable[[], bool]) -> bool:
+        try:
+            return bool(check())
+        except Exception:
+            return False
+
+    @property
+    def ready(self) -> bool:
+        return all(self.status().values())
+
+    def bind_metrics(self, registry):
+        """Serves readiness as a 0/1 gauge per check from a MetricsRegistry."""
+        gauge = registry.gauge("ready", "Whether each readiness check passes (1) or not (0).", ("check",))
+        for name, check in self._checks.items():
+            gauge.labels(name).set_function(lambda check=check: float(self._passes(check)))
@@ -1,62 +1,274 @@
-from Ngunguruhoe.domain.models.alert import Alert
+from Ngunguruhoe.domain.models.alert import Alert, to_epoch_ns
+from Ngunguruhoe.domain.models.alert_batch import AlertBatch
 from Ngunguruhoe.domain.ports.alert_port import AlertPort
+from Ngunguruhoe.domain.ports.alert_publisher_port import AlertPublisherPort
 from Ngunguruhoe.domain.ports.strategy_port import StrategyPort
-from Ngunguruhoe.adapters.alpaca_adapter import AlpacaAdapter # Assuming direct use of AlpacaAdapter
-from datetime import datetime
-import random # Keep for now if simple strategy still needs it
-from typing import Any, Tuple
+from Ngunguruhoe.domain.models.market_snapshot import MarketSnapshot
+from Ngunguruhoe.domain.indicators import IndicatorEngine, SMA, VOLATILITY
+from Ngunguruhoe.application.metrics import PipelineMetrics
+from Ngunguruhoe.application.services.alert_stats import AlertStats
+from Ngunguruhoe.application.services.alert_suppressor import AlertSuppressor
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Callable, List, Tuple
+import logging
+import numpy as np
+
+if TYPE_CHECKING: # type hint only; importing the adapter at runtime would load the Alpaca SDK
+    from Ngunguruhoe.adapters.alpaca_adapter import AlpacaAdapter
+
+logger = logging.getLogger(__name__)
 
 # Placeholder Simple Strategy (can be moved to its own file/adapter later)
 class SimpleMarketTrendStrategy(StrategyPort):
+    """
+    Trend-following placeholder strategy built on rolling indicators.
+
+    Once a symbol has a full window of trades, it buys when the price is above its
+    simple moving average and sells when it is at or below it, with a confidence
+    that grows with the distance from the average measured in units of recent
+    volatility. Until then (cold start) it falls back to comparing the price with
+    price_threshold, with a random confidence.
+    """
+    def __init__(self,
+                 price_threshold: float = 100.0,
+                 indicators: IndicatorEngine | None = None,
+                 rng: np.random.Generator | None = None):
+        self.price_threshold = price_threshold
+        self.indicators = indicators if indicators is not None else IndicatorEngine()
+        self.rng = rng or np.random.default_rng()
+
     async def decide_action(self, market_data: Any) -> Tuple[str, float]:
         """
-        A very simple strategy: if market_data (price) is not None, buy with 60% confidence.
-        This is a placeholder and should be replaced with a real strategy.
+        Per-item entry point, evaluated through decide_actions on a one-row snapshot.
         Assumes market_data is the trade object from AlpacaAdapter.get_latest_trade
+        (or anything else with a 'p' price attribute).
         """
         if market_data and hasattr(market_data, 'p'): # 'p' is price in Alpaca trade object
-            # Dummy logic: if price is above some arbitrary threshold, suggest buy, else sell.
-            # This is not a real trading strategy.
-            action = "buy" if market_data.p > 100 else "sell" # Example: BTC/USD price > 100 -> buy
-            confidence = round(random.uniform(0.55, 0.75), 2) # Random confidence
-            print(f"SimpleStrategy: Market price {market_data.p}, Action: {action}, Confidence: {confidence}")
+            actions, confidences = await self.decide_actions(MarketSnapshot.from_market_data(market_data))
+            action, confidence = str(actions[0]), float(confidences[0])
+            logger.debug("SimpleStrategy: Market price %s, Action: %s, Confidence: %s", market_data.p, action, confidence,
+                         extra={"symbol": getattr(market_data, "S", None)})
             return action, confidence
-        print("SimpleStrategy: No market data received or price attribute missing.")
+        logger.debug("SimpleStrategy: No market data received or price attribute missing.")
         return "hold", 0.1 # Default action if no data
 
+    async def decide_actions(self, snapshot: MarketSnapshot) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized decision over a snapshot. Each priced row is first folded into the
+        symbol's indicators (O(1)); rows without a price hold.
+        This is a placeholder and should be replaced with a real strategy.
+        """
+        n = len(snapshot)
+        sma = np.full(n, np.nan)
+        volatility = np.full(n, np.nan)
+        for i in np.flatnonzero(~np.isnan(snapshot.price)):
+            values = self.indicators.update(str(snapshot.symbol[i]), snapshot.price[i],
+                                            snapshot.size[i], int(snapshot.timestamp[i])).values
+            sma[i], volatility[i] = values[SMA], values[VOLATILITY]
+
+        price = snapshot.price
+        has_price = ~np.isnan(price)
+        warm = ~np.isnan(sma)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Distance from the SMA in log terms, scaled by per-trade volatility.
+            z = np.abs(np.log(price / sma)) / np.maximum(volatility, 1e-9)
+        warm_confidence = np.round(0.55 + 0.2 * np.clip(np.nan_to_num(z) / 3.0, 0.0, 1.0), 2)
+        cold_confidence = np.round(self.rng.uniform(0.55, 0.75, n), 2)
+
+        reference = np.where(warm, sma, self.price_threshold)
+        actions = np.where(has_price, np.where(price > reference, "buy", "sell"), "hold")
+        confidences = np.where(has_price, np.where(warm, warm_confidence, cold_confidence), 0.1)
+        return actions, confidences
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
 class AlertService:
     def __init__(self,
                  alert_repo: AlertPort,
-                 market_data_provider: AlpacaAdapter, # Specific adapter for now
-                 strategy: StrategyPort):
+                 market_data_provider: "AlpacaAdapter", # Specific adapter for now
+                 strategy: StrategyPort,
+                 clock: Callable[[], datetime] = utc_now,
+                 publisher: AlertPublisherPort | None = None,
+                 metrics: PipelineMetrics | None = None,
+                 suppressor: AlertSuppressor | None = None,
+                 alert_stats: AlertStats | None = None):
+        """
+        clock supplies alert timestamps; backtests pass a simulated clock.
+        publisher, if given, receives every alert right after it is stored.
+        metrics records per-stage latencies and per-symbol outcomes; pass one bound
+        to the registry served at /metrics, otherwise a private one is used.
+        suppressor, if given, drops repeated or debounced buy/sell decisions before
+        they are stored; they are counted as the "suppressed" outcome.
+        alert_stats, if given, folds every stored alert into its sliding-window aggregates.
+        """
         self.alert_repo = alert_repo
         self.market_data_provider = market_data_provider
         self.strategy = strategy
+        self.clock = clock
+        self.publisher = publisher
+        self.metrics = metrics if metrics is not None else PipelineMetrics()
+        self.suppressor = suppressor
+        self.alert_stats = alert_stats
+
+    async def _store(self, alert: Alert):
+        await self.alert_repo.save_alert(alert)
+        if self.suppressor is not None:
+            # Only alerts that were stored become the baseline for suppressing repeats.
+            self.suppressor.mark_emitted(alert.symbol, alert.action, alert.confidence, to_epoch_ns(alert.timestamp))
+        if self.alert_stats is not None:
+            self.alert_stats.record_alert(alert)
+        if self.publisher is not None:
+            await self.publisher.publish(alert)
 
     async def run_strategy_and_store(self, symbol: str = "AAPL"):
         """Fetches market data, runs the strategy, and stores the resulting alert."""
-        print(f"AlertService: Fetching market data for {symbol}...")
-        market_data = await self.market_data_provider.get_latest_trade(symbol)
+        logger.debug("AlertService: Fetching market data for %s...", symbol, extra={"symbol": symbol})
+        started = perf_counter()
+        try:
+            market_data = await self.market_data_provider.get_latest_trade(symbol)
+        except Exception:
+            self.metrics.record_event(symbol, "errored")
+            raise
+        self.metrics.observe_stage("single", "fetch", perf_counter() - started)
+        alert = await self.process_market_data(symbol, market_data)
+        self.metrics.observe_stage("single", "total", perf_counter() - started)
+        return alert
 
+    async def run_batch_and_store(self, symbols: List[str]) -> List[Alert]:
+        """
+        Fetches market data for a batch of symbols in one round trip and evaluates the
+        whole batch with a single strategy.decide_actions call. Returns the stored alerts.
+        """
+        logger.debug("AlertService: Fetching market data for %d symbol(s)...", len(symbols))
+        started = perf_counter()
+        try:
+            trades = await self.market_data_provider.get_latest_trades(symbols)
+        except Exception:
+            for symbol in symbols:
+                self.metrics.record_event(symbol, "errored")
+            raise
+        self.metrics.observe_stage("batch", "fetch", perf_counter() - started)
+        alerts = (await self.process_snapshot(MarketSnapshot.from_trades(symbols, trades))).to_alerts()
+        self.metrics.observe_stage("batch", "total", perf_counter() - started)
+        logger.info("AlertService: Evaluated %d symbol(s), stored %d alert(s).", len(symbols), len(alerts))
+        return alerts
+
+    async def process_snapshot(self, snapshot: MarketSnapshot) -> AlertBatch:
+        """
+        Runs the batch strategy over a columnar snapshot and stores an alert for every
+        non-hold row as one AlertBatch, without building per-alert objects.
+        """
+        metrics = self.metrics
+        started = perf_counter()
+        actions, confidences = await self.strategy.decide_actions(snapshot)
+        decided = perf_counter()
+        metrics.observe_stage("batch", "decide", decided - started)
+        is_alert = actions != "hold"
+        timestamp_ns = to_epoch_ns(self.clock())
+        suppressor = self.suppressor
+        if suppressor is not None:
+            for i in np.flatnonzero(is_alert):
+                reason = suppressor.check(str(snapshot.symbol[i]), str(actions[i]), float(confidences[i]), timestamp_ns)
+                if reason is not None:
+                    suppressor.mark_suppressed(reason)
+                    is_alert[i] = False
+        rows = np.flatnonzero(is_alert)
+        batch = AlertBatch.from_columns(timestamp_ns, snapshot.symbol[rows], actions[rows], confidences[rows])
+        if len(batch):
+            try:
+                await self.alert_repo.save_alerts(batch)
+            except Exception:
+                for symbol in batch.symbols:
+                    metrics.record_event(symbol, "errored")
+                raise
+            if suppressor is not None:
+                # Only alerts that were stored become the baseline for suppressing repeats.
+                for i in rows.tolist():
+                    suppressor.mark_emitted(str(snapshot.symbol[i]), str(actions[i]), float(confidences[i]), timestamp_ns)
+            if self.alert_stats is not None:
+                self.alert_stats.record_batch(batch)
+            if self.publisher is not None:
+                for alert in batch:
+                    await self.publisher.publish(alert)
+            metrics.observe_stage("batch", "persist", perf_counter() - decided)
+        self._record_snapshot_events(snapshot, actions != "hold", is_alert)
+        return batch
+
+    _SNAPSHOT_OUTCOMES = ("no_data", "held", "suppressed", "stored")
+
+    def _record_snapshot_events(self, snapshot: MarketSnapshot, decided: np.ndarray, is_alert: np.ndarray):
+        # Outcome codes index _SNAPSHOT_OUTCOMES; every priced row is also counted as fetched.
+        has_price = ~np.isnan(snapshot.price)
+        outcomes = has_price.astype(np.int8) + decided + is_alert
+        record = self.metrics.record_event
+        names = self._SNAPSHOT_OUTCOMES
+        for symbol, outcome in zip(snapshot.symbol.tolist(), outcomes.tolist()):
+            if outcome:
+                record(symbol, "fetched")
+            record(symbol, names[outcome])
+
+    async def process_market_data(self, symbol: str, market_data: Any):
+        """
+        Runs the strategy on market data that has already been obtained (polled or pushed
+        by a stream) and stores the resulting alert. Returns the alert, or None.
+        """
+        metrics = self.metrics
         if market_data:
-            print(f"AlertService: Market data for {symbol} received: Price={market_data.p}")
-            action, confidence = await self.strategy.decide_action(market_data)
-            print(f"AlertService: Strategy decided action {action} with confidence {confidence} for {symbol}")
+            metrics.record_event(symbol, "fetched")
+            logger.debug("AlertService: Market data for %s received: Price=%s", symbol, market_data.p,
+                         extra={"symbol": symbol})
+            started = perf_counter()
+            try:
+                if type(self.strategy).decide_actions is StrategyPort.decide_actions:
+                    # Per-item strategies get the market data object itself, as they always have.
+                    action, confidence = await self.strategy.decide_action(market_data)
+                else:
+                    # Alpaca's v2 trades carry no symbol, so the row is labelled with the one we fetched for;
+                    # indicators and dedupe are keyed by it.
+                    actions, confidences = await self.strategy.decide_actions(
+                        MarketSnapshot.from_market_data(market_data, symbol=symbol))
+                    action, confidence = str(actions[0]), float(confidences[0])
+            except Exception:
+                metrics.record_event(symbol, "errored")
+                raise
+            decided = perf_counter()
+            metrics.observe_stage("single", "decide", decided - started)
+            logger.debug("AlertService: Strategy decided action %s with confidence %s for %s", action, confidence, symbol,
+                         extra={"symbol": symbol})
 
             if action != "hold": # Only store alerts for buy/sell actions
                 alert = Alert(
-                    timestamp=datetime.utcnow(),
+                    timestamp=self.clock(),
                     symbol=symbol,
                     action=action,
                     confidence=confidence
                 )
-                await self.alert_repo.save_alert(alert)
-                print(f"AlertService: Alert stored: {alert}")
+                suppressor = self.suppressor
+                if suppressor is not None:
+                    reason = suppressor.check(symbol, action, confidence, to_epoch_ns(alert.timestamp))
+                    if reason is not None:
+                        suppressor.mark_suppressed(reason)
+                        metrics.record_event(symbol, "suppressed")
+                        logger.debug("AlertService: Suppressed %s alert for %s (%s).", action, symbol, reason,
+                                     extra={"symbol": symbol})
+                        return None
+                try:
+                    await self._store(alert)
+                except Exception:
+                    metrics.record_event(symbol, "errored")
+                    raise
+                metrics.observe_stage("single", "persist", perf_counter() - decided)
+                metrics.record_event(symbol, "stored")
+                logger.info("AlertService: Alert stored: %s", alert, extra={"symbol": symbol})
                 return alert
             else:
-                print(f"AlertService: Strategy decided 'hold' for {symbol}. No alert stored.")
+                metrics.record_event(symbol, "held")
+                logger.debug("AlertService: Strategy decided 'hold' for %s. No alert stored.", symbol, extra={"symbol": symbol})
                 return None
         else:
-            print(f"AlertService: Could not retrieve market data for {symbol}. No action taken.")
+            metrics.record_event(symbol, "no_data")
+            logger.info("AlertService: Could not retrieve market data for %s. No action taken.", symbol, extra={"symbol": symbol})
             # Optionally, create a different type of alert or notification here
             return None
@@ -0,0 +1,184 @@
+import logging
+import time
+from collections import deque
+from typing import Callable, Iterable
+from Ngunguruhoe.domain.models.alert import Action, Alert, from_epoch_ns, to_epoch_ns
+from Ngunguruhoe.domain.models.alert_batch import AlertBatch
+from Ngunguruhoe.domain.models.alert_query import AlertQuery
+from Ngunguruhoe.domain.ports.alert_port import AlertPort
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOWS = (3600, 86_400, 7 * 86_400)
+
+# A tally is [alerts, buys, sells, confidence_sum].
+_ALERTS, _BUYS, _SELLS, _CONFIDENCE = range(4)
+
+def window_label(seconds: int) -> str:
+    """3600 -> '1h', 86400 -> '24h', 604800 -> '7d'."""
+    if seconds % 86_400 == 0 and seconds > 86_400:
+        return f"{seconds // 86_400}d"
+    if seconds % 3600 == 0:
+        return f"{seconds // 3600}h"
+    if seconds % 60 == 0:
+        return f"{seconds // 60}m"
+    return f"{seconds}s"
+
+def _tally_to_dict(tally: list) -> dict:
+    alerts, buys, sells, confidence_sum = tally
+    return {"alerts": alerts, "buys": buys, "sells": sells,
+            "buy_sell_ratio": buys / sells if sells else None,
+            "avg_confidence": confidence_sum / alerts if alerts else None}
+
+class _Bucket:
+    __slots__ = ("key", "tallies")
+
+    def __init__(self, key: int):
+        self.key = key
+        self.tallies: dict[str, list] = {}
+
+class _Window:
+    """One sliding window: time buckets, oldest first, plus running totals over them."""
+    def __init__(self, seconds: int, resolution: int):
+        self.seconds = seconds
+        self.label = window_label(seconds)
+        self.width_ns = seconds * 1_000_000_000 // resolution
+        self.span_ns = seconds * 1_000_000_000
+        self.buckets: deque[_Bucket] = deque()
+        self.by_symbol: dict[str, list] = {}
+        self.total = [0, 0, 0, 0.0]
+
+    def _bucket(self, key: int) -> _Bucket:
+        buckets = self.buckets
+        # Live alerts arrive in time order and a rebuild from newest-first pages in reverse
+        # order, so the bucket is almost always at one end.
+        if not buckets or key > buckets[-1].key:
+            buckets.append(_Bucket(key))
+            return buckets[-1]
+        if key == buckets[-1].key:
+            return buckets[-1]
+        if key < buckets[0].key:
+            buckets.appendleft(_Bucket(key))
+            return buckets[0]
+        for i in range(len(buckets) - 1, -1, -1):
+            if buckets[i].key == key:
+                return buckets[i]
+            if buckets[i].key < key:
+                buckets.insert(i + 1, _Bucket(key))
+                return buckets[i + 1]
+
+    def add(self, timestamp_ns: int, symbol: str, is_buy: bool, is_sell: bool, confidence: float, now_ns: int):
+        key = timestamp_ns // self.width_ns
+        if (key + 1) * self.width_ns <= now_ns - self.span_ns:
+            return # already outside the window
+        for tally in (self._bucket(key).tallies.setdefault(symbol, [0, 0, 0, 0.0]),
+                      self.by_symbol.setdefault(symbol, [0, 0, 0, 0.0]), self.total):
+            tally[_ALERTS] += 1
+            tally[_BUYS] += is_buy
+            tally[_SELLS] += is_sell
+            tally[_CONFIDENCE] += confidence
+
+    def expire(self, now_ns: int):
+        """Drops buckets that ended before the window start; each bucket is dropped once."""
+        cutoff = now_ns - self.span_ns
+        buckets, by_symbol, total = self.buckets, self.by_symbol, self.total
+        while buckets and (buckets[0].key + 1) * self.width_ns <= cutoff:
+            for symbol, tally in buckets.popleft().tallies.items():
+                running = by_symbol[symbol]
+                for i in range(4):
+                    running[i] -= tally[i]
+                    total[i] -= tally[i]
+                if running[_ALERTS] <= 0:
+                    del by_symbol[symbol] # also discards accumulated float error
+        if total[_ALERTS] <= 0:
+            self.total = [0, 0, 0, 0.0]
+
+class AlertStats:
+    """
+    Per-symbol alert counts, buy/sell ratios and average confidence over sliding
+    windows (by default the last 1h, 24h and 7d), maintained as alerts are stored.
+
+    Each window is split into resolution time buckets holding per-symbol tallies, next
+    to running totals per symbol and overall. Recording an alert adds it to the current
+    bucket and the totals of every window; a bucket leaving its window is subtracted
+    once, so expiry costs O(1) per alert and a read never scans alerts. Windows are
+    accurate to one bucket (window / resolution): an alert counts until the end of the
+    bucket it fell into has left the window.
+
+    Alert timestamps place alerts in buckets; clock (epoch nanoseconds) decides what
+    has expired. rebuild() reloads the windows from a repository on startup.
+    """
+    def __init__(self,
+                 windows: Iterable[int] = DEFAULT_WINDOWS,
+                 resolution: int = 60,
+                 clock: Callable[[], int] = time.time_ns):
+        windows = tuple(sorted(set(windows)))
+        if not windows or windows[0] <= 0 or resolution < 1:
+            raise ValueError("windows must be positive and resolution at least 1.")
+        self.resolution = resolution
+        self.clock = clock
+        self._windows = [_Window(seconds, resolution) for seconds in windows]
+
+    @property
+    def windows(self) -> tuple[int, ...]:
+        return tuple(window.seconds for window in self._windows)
+
+    def record(self, timestamp_ns: int, symbol: str, action: str, confidence: float):
+        now_ns = self.clock()
+        is_buy, is_sell = action == Action.BUY, action == Action.SELL
+        for window in self._windows:
+            window.expire(now_ns) # one comparison unless a bucket is due, so memory stays bounded without reads
+            window.add(timestamp_ns, symbol, is_buy, is_sell, confidence, now_ns)
+
+    def record_alert(self, alert: Alert):
+        self.record(to_epoch_ns(alert.timestamp), alert.symbol, alert.action, alert.confidence)
+
+    def record_batch(self, batch: AlertBatch):
+        for timestamp_ns, symbol, action, confidence in batch.rows():
+            self.record(timestamp_ns, symbol, action, confidence)
+
+    def expire(self):
+        now_ns = self.clock()
+        for window in self._windows:
+            window.expire(now_ns)
+
+    def snapshot(self, symbol: str | None = None) -> dict:
+        """
+        Stats per window: the overall tally and, per symbol, alerts, buys, sells,
+        buy_sell_ratio (None without sells) and avg_confidence. With symbol, only that
+        symbol's tally is included.
+        """
+        self.expire()
+        now_ns = self.clock()
+        result = {"as_of": from_epoch_ns(now_ns).isoformat(timespec="microseconds"), "windows": {}}
+        for window in self._windows:
+            if symbol is None:
+                symbols = {name: _tally_to_dict(tally) for name, tally in window.by_symbol.items()}
+            else:
+                symbols = {symbol: _tally_to_dict(window.by_symbol.get(symbol, [0, 0, 0, 0.0]))}
+            result["windows"][window.label] = {"seconds": window.seconds, "total": _tally_to_dict(window.total),
+                                               "symbols": symbols}
+        return result
+
+    async def rebuild(self, alert_repo: AlertPort, page_size: int = 10_000) -> int:
+        """
+        Replaces the windows with the alerts alert_repo holds from within the longest
+        window, read newest first in pages (a range scan on the timestamp index for
+        SQLite). Returns the number of alerts loaded.
+        """
+        self._windows = [_Window(window.seconds, self.resolution) for window in self._windows]
+        since = from_epoch_ns(self.clock() - self._windows[-1].span_ns - self._windows[-1].width_ns)
+        query = AlertQuery(since=since, limit=page_size)
+        loaded = 0
+        if not alert_repo.queryable:
+            logger.warning("AlertStats: %s cannot be queried; statistics start empty.", type(alert_repo).__name__)
+            return loaded
+        while True:
+            page = await alert_repo.query_alerts(query)
+            self.record_batch(page.batch)
+            loaded += len(page.batch)
+            if page.next_cursor is None:
+                break
+            query = AlertQuery(since=query.since, limit=page_size, after=page.next_cursor)
+        logger.info("AlertStats: Rebuilt statistics from %d stored alert(s).", loaded)
+        return loaded
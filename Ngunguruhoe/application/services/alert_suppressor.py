@@ -0,0 +1,81 @@
+from dataclasses import dataclass
+
+@dataclass
+class _SymbolState:
+    """The last alert emitted for a symbol."""
+    action: str
+    confidence: float
+    timestamp_ns: int
+
+class AlertSuppressor:
+    """
+    Decides, between the strategy and the repository, whether a buy/sell decision is
+    worth a new alert. State is the last alert emitted per symbol:
+
+    * cooldown: nothing is emitted for a symbol within cooldown seconds of its last
+      alert (debounces flip-flopping decisions).
+    * on_change_only: a repeat of the last emitted action is suppressed...
+    * min_confidence_delta: ...unless confidence moved by at least this much since the
+      last alert. Given without on_change_only, it still suppresses repeats that moved less.
+
+    check() only decides; the caller reports the outcome with mark_emitted (after the
+    alert is stored, so a failed write never becomes the baseline) or mark_suppressed.
+    Timestamps come from the alerts themselves, so simulated clocks work unchanged.
+    """
+    REASONS = ("cooldown", "duplicate")
+
+    def __init__(self,
+                 on_change_only: bool = True,
+                 min_confidence_delta: float | None = None,
+                 cooldown: float = 0.0):
+        if cooldown < 0 or (min_confidence_delta is not None and min_confidence_delta < 0):
+            raise ValueError("cooldown and min_confidence_delta must not be negative.")
+        self.on_change_only = on_change_only
+        self.min_confidence_delta = min_confidence_delta
+        self.cooldown_ns = int(cooldown * 1_000_000_000)
+        self.emitted = 0
+        self.suppressed = dict.fromkeys(self.REASONS, 0)
+        self._last: dict[str, _SymbolState] = {}
+
+    def check(self, symbol: str, action: str, confidence: float, timestamp_ns: int) -> str | None:
+        """
+        Returns None if the alert should be stored, otherwise the reason it is suppressed
+        ("cooldown" or "duplicate"), without changing any state.
+        """
+        last = self._last.get(symbol)
+        if last is not None:
+            if timestamp_ns - last.timestamp_ns < self.cooldown_ns:
+                return "cooldown"
+            if action == last.action and self._is_repeat(abs(confidence - last.confidence)):
+                return "duplicate"
+        return None
+
+    def mark_emitted(self, symbol: str, action: str, confidence: float, timestamp_ns: int):
+        """Makes a stored alert the one later decisions for symbol are compared with."""
+        self._last[symbol] = _SymbolState(action, confidence, timestamp_ns)
+        self.emitted += 1
+
+    def mark_suppressed(self, reason: str):
+        self.suppressed[reason] += 1
+
+    def _is_repeat(self, confidence_delta: float) -> bool:
+        if self.min_confidence_delta is not None:
+            return confidence_delta < self.min_confidence_delta
+        return self.on_change_only
+
+    def reset(self, symbol: str | None = None):
+        """Forgets the last alert for one symbol, or for all of them."""
+        if symbol is None:
+            self._last.clear()
+        else:
+            self._last.pop(symbol, None)
+
+    def stats(self) -> dict:
+        """Emitted and suppressed totals, with the share of alerts that were not written."""
+        suppressed = sum(self.suppressed.values())
+        total = self.emitted + suppressed
+        return {
+            "emitted": self.emitted,
+            "suppressed": dict(self.suppressed),
+            "suppressed_ratio": suppressed / total if total else 0.0,
+        }
@@ -0,0 +1,235 @@
+import asyncio
+import contextlib
+import logging
+import random
+from dataclasses import dataclass
+from typing import Callable, Iterable, Mapping
+from Ngunguruhoe.application.services.request_budget import RateLimited, RequestBudget
+
+logger = logging.getLogger(__name__)
+
+def parse_symbol_config(value: str, default_interval: float = 60.0) -> dict[str, float]:
+    """
+    Parses a symbol universe such as "AAPL,MSFT:30,TSLA:15" into {symbol: interval_seconds}.
+    Symbols without an explicit interval get default_interval.
+    """
+    symbols: dict[str, float] = {}
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        symbol, _, interval = entry.partition(":")
+        symbol = symbol.strip().upper()
+        symbols[symbol] = float(interval) if interval.strip() else default_interval
+    return symbols
+
+@dataclass(frozen=True)
+class AdaptiveIntervals:
+    """
+    How poll intervals follow activity. After a cycle that stored an alert, or saw a
+    relative price move of at least move_threshold, a schedule's interval is multiplied
+    by speedup; after a quiet cycle by slowdown. Intervals stay within min_factor and
+    max_factor times the configured one.
+    """
+    min_factor: float = 0.25
+    max_factor: float = 4.0
+    speedup: float = 0.5
+    slowdown: float = 1.25
+    move_threshold: float = 0.002
+
+    def __post_init__(self):
+        if not 0 < self.min_factor <= 1 <= self.max_factor or not 0 < self.speedup <= 1 <= self.slowdown:
+            raise ValueError("Need 0 < min_factor <= 1 <= max_factor and 0 < speedup <= 1 <= slowdown.")
+
+@dataclass
+class SymbolSchedule:
+    """Polling state and counters for one symbol, or one batch of symbols fetched together."""
+    symbols: tuple[str, ...]
+    interval: float
+    start_delay: float
+    base_interval: float = 0.0
+    runs: int = 0
+    skipped: int = 0
+    timeouts: int = 0
+    errors: int = 0
+    throttled: int = 0
+
+    def __post_init__(self):
+        self.base_interval = self.base_interval or self.interval
+
+    @property
+    def name(self) -> str:
+        return self.symbols[0] if len(self.symbols) == 1 else f"{self.symbols[0]}+{len(self.symbols) - 1}"
+
+class PollScheduler:
+    """
+    Runs AlertService cycles for a universe of symbols concurrently.
+
+    Each symbol has its own loop with its own interval and a random start delay, so
+    requests are spread out instead of all firing together. A semaphore bounds the
+    number of cycles in flight, and every cycle is capped by a timeout so one slow
+    symbol cannot hold a slot (or delay other symbols) indefinitely. If a cycle
+    overruns its interval, the missed ticks are skipped rather than queued up.
+
+    With batch_size > 1, symbols sharing an interval are grouped and each group is
+    fetched in one round trip through AlertService.run_batch_and_store.
+
+    With adaptive set, each schedule's interval shortens while its symbols are active
+    and lengthens while they are quiet (see AdaptiveIntervals). price_move(symbol), if
+    given, reports the symbol's recent relative price move; a batch counts as active
+    when any of its symbols is. With a budget (the RequestBudget the market data
+    adapter draws from), intervals are also stretched so the planned request rate fits
+    the quota, and each cycle reserves the token for its first request before its
+    timeout starts, so cycles wait out an empty bucket or a rate-limit pause instead of
+    timing out. A cycle whose own fetch was throttled (it raised RateLimited) is
+    retried as soon as the pause ends rather than skipped.
+    """
+    def __init__(self,
+                 service,
+                 symbols: Mapping[str, float] | Iterable[str],
+                 default_interval: float = 60.0,
+                 max_concurrency: int = 32,
+                 max_jitter: float | None = None,
+                 cycle_timeout: float | None = None,
+                 batch_size: int = 1,
+                 rng: random.Random | None = None,
+                 adaptive: AdaptiveIntervals | None = None,
+                 price_move: Callable[[str], float | None] | None = None,
+                 budget: RequestBudget | None = None):
+        if max_concurrency < 1 or batch_size < 1:
+            raise ValueError("max_concurrency and batch_size must be at least 1.")
+        if not isinstance(symbols, Mapping):
+            symbols = {symbol: default_interval for symbol in symbols}
+        if any(interval <= 0 for interval in symbols.values()):
+            raise ValueError("Poll intervals must be positive.")
+
+        self.service = service
+        self.max_concurrency = max_concurrency
+        self.cycle_timeout = cycle_timeout
+        self.batch_size = batch_size
+        self.adaptive = adaptive
+        self.price_move = price_move
+        self.budget = budget
+        rng = rng or random.Random()
+
+        by_interval: dict[float, list[str]] = {}
+        for symbol, interval in symbols.items():
+            by_interval.setdefault(interval, []).append(symbol)
+        self.schedules: dict[str, SymbolSchedule] = {}
+        for interval, group in by_interval.items():
+            for i in range(0, len(group), batch_size):
+                schedule = SymbolSchedule(
+                    symbols=tuple(group[i:i + batch_size]),
+                    interval=interval,
+                    # Default jitter spreads each first run across the whole interval.
+                    start_delay=rng.uniform(0, interval if max_jitter is None else min(max_jitter, interval)),
+                )
+                self.schedules[schedule.name] = schedule
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: list[asyncio.Task] = []
+        # Requests per second the current intervals add up to.
+        self._planned_rate = sum(1 / s.interval for s in self.schedules.values())
+
+    async def run(self):
+        """Starts one polling loop per symbol and runs until stop() is called or the task is cancelled."""
+        symbol_count = sum(len(s.symbols) for s in self.schedules.values())
+        logger.info("PollScheduler: Scheduling %d symbol(s) in %d job(s), max %d in flight.",
+                    symbol_count, len(self.schedules), self.max_concurrency)
+        self._tasks = [
+            asyncio.create_task(self._symbol_loop(schedule), name=f"poll-{schedule.name}")
+            for schedule in self.schedules.values()
+        ]
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Counters and current interval per symbol; symbols polled in the same batch share their batch's."""
+        return {
+            symbol: {
+                "runs": s.runs,
+                "skipped": s.skipped,
+                "timeouts": s.timeouts,
+                "errors": s.errors,
+                "throttled": s.throttled,
+                "interval": s.interval,
+            }
+            for s in self.schedules.values()
+            for symbol in s.symbols
+        }
+
+    async def _symbol_loop(self, schedule: SymbolSchedule):
+        loop = asyncio.get_running_loop()
+        next_run = loop.time() + schedule.start_delay
+        while True:
+            delay = next_run - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if self.budget is not None:
+                await self.budget.wait_ready()
+            try:
+                result = await self._run_cycle(schedule)
+            except RateLimited:
+                # This cycle's request was rate limited: try the tick again once the budget reopens.
+                schedule.throttled += 1
+                next_run = loop.time()
+                continue
+            if self.adaptive is not None:
+                self._adapt(schedule, bool(result) or self._moved(schedule))
+            next_run += schedule.interval
+            now = loop.time()
+            if next_run < now:
+                # The cycle (or waiting for a slot) overran: drop the missed ticks.
+                missed = int((now - next_run) // schedule.interval) + 1
+                schedule.skipped += missed
+                next_run += missed * schedule.interval
+
+    def _moved(self, schedule: SymbolSchedule) -> bool:
+        if self.price_move is None:
+            return False
+        for symbol in schedule.symbols:
+            move = self.price_move(symbol)
+            if move is not None and move >= self.adaptive.move_threshold:
+                return True
+        return False
+
+    def _adapt(self, schedule: SymbolSchedule, active: bool):
+        policy = self.adaptive
+        factor = schedule.interval / schedule.base_interval * (policy.speedup if active else policy.slowdown)
+        interval = schedule.base_interval * min(max(factor, policy.min_factor), policy.max_factor)
+        others = self._planned_rate - 1 / schedule.interval
+        if self.budget is not None:
+            # Use what the quota has left, but never less than an equal share of it.
+            allowed = max(self.budget.rate - others, self.budget.rate / len(self.schedules))
+            interval = max(interval, min(1 / allowed, schedule.base_interval * policy.max_factor))
+        self._planned_rate = others + 1 / interval
+        schedule.interval = interval
+
+    async def _run_cycle(self, schedule: SymbolSchedule):
+        timeout = self.cycle_timeout if self.cycle_timeout is not None else schedule.base_interval
+        if len(schedule.symbols) == 1:
+            cycle = lambda: self.service.run_strategy_and_store(symbol=schedule.symbols[0])
+        else:
+            cycle = lambda: self.service.run_batch_and_store(list(schedule.symbols))
+        reservation = self.budget.reserve() if self.budget is not None else contextlib.nullcontext()
+        async with self._semaphore, reservation:
+            try:
+                result = await asyncio.wait_for(cycle(), timeout)
+                schedule.runs += 1
+                return result
+            except RateLimited:
+                raise
+            except asyncio.TimeoutError:
+                schedule.timeouts += 1
+                logger.warning("PollScheduler: Cycle for %s exceeded %ss and was cancelled.", schedule.name, timeout,
+                               extra={"symbol": schedule.name})
+            except Exception as e:
+                schedule.errors += 1
+                logger.error("Error during polling cycle for %s: %s", schedule.name, e, extra={"symbol": schedule.name})
@@ -0,0 +1,196 @@
+import asyncio
+import contextlib
+import contextvars
+import logging
+import threading
+import time
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+class RateLimited(Exception):
+    """A request was answered with HTTP 429; the budget it drew from is already paused."""
+
+class _Reservation:
+    __slots__ = ("tokens",)
+
+    def __init__(self, tokens: float):
+        self.tokens = tokens
+
+# Tokens reserve() took for the task running the block (and the tasks it starts).
+_reservation: contextvars.ContextVar[_Reservation | None] = contextvars.ContextVar("request_budget_reservation",
+                                                                                   default=None)
+
+class RequestBudget:
+    """
+    Token bucket sized to the account's REST request quota (Alpaca allows 200 requests
+    per minute by default).
+
+    The bucket refills at safety * share * limit / period tokens per second and holds
+    up to burst tokens; share is this process's fraction of the account quota (for
+    example 1/n with n shard workers). observe() feeds it the quota headers of each response: a changed
+    limit resizes the bucket, and a server-side remaining count below the local one
+    (the quota is shared with other clients of the account) drains it to match.
+    throttle() reacts to HTTP 429 by pausing every request until Retry-After, or for
+    backoff seconds doubling per consecutive throttle up to max_backoff.
+
+    reserve() takes tokens ahead of the requests a block of work will make, so a caller
+    can wait for the quota before starting a timeout; acquire() inside the block draws
+    from the reservation first, and whatever is left over goes back to the bucket.
+
+    observe() and throttle() are called from the adapter's worker threads, so state
+    is guarded by a lock; acquire(), reserve() and wait_ready() sleep on the event loop.
+    """
+    def __init__(self,
+                 limit: int = 200,
+                 period: float = 60.0,
+                 burst: float | None = None,
+                 safety: float = 0.9,
+                 share: float = 1.0,
+                 backoff: float = 1.0,
+                 max_backoff: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic,
+                 wall_clock: Callable[[], float] = time.time):
+        if limit < 1 or period <= 0 or not 0 < safety <= 1 or not 0 < share <= 1:
+            raise ValueError("limit must be at least 1, period positive, and safety and share in (0, 1].")
+        self.period = period
+        self.safety = safety
+        self.share = share
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._burst = burst
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._lock = threading.Lock()
+        self._set_limit(limit)
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._consecutive_throttles = 0
+        self.remaining: int | None = None
+        self.acquired = 0
+        self.throttles = 0
+
+    def _set_limit(self, limit: int):
+        self.limit = limit
+        self.rate = self.safety * self.share * limit / self.period
+        # Default burst: a tenth of our quota, so a restart cannot spend it all at once.
+        self.capacity = max(1.0, self._burst if self._burst is not None else self.rate * self.period / 10)
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, cost: float = 1.0):
+        """
+        Waits until cost tokens are available (and any throttle pause is over), then takes
+        them, from the current reservation if it still holds enough.
+        """
+        reservation = _reservation.get()
+        if reservation is not None and reservation.tokens >= cost:
+            await self.wait_ready()
+            reservation.tokens -= cost
+        else:
+            await self._take(cost)
+        with self._lock:
+            self.acquired += 1
+
+    @contextlib.asynccontextmanager
+    async def reserve(self, cost: float = 1.0):
+        """
+        Waits for and takes cost tokens, then runs the block with them set aside for its
+        acquire() calls. Tokens the block did not use are returned when it exits.
+        """
+        await self._take(cost)
+        reservation = _Reservation(cost)
+        token = _reservation.set(reservation)
+        try:
+            yield
+        finally:
+            _reservation.reset(token)
+            if reservation.tokens > 0:
+                with self._lock:
+                    self._refill(self._clock())
+                    self._tokens = min(self.capacity, self._tokens + reservation.tokens)
+
+    async def _take(self, cost: float):
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._tokens >= cost:
+                        self._tokens -= cost
+                        return
+                    wait = (cost - self._tokens) / self.rate
+            await asyncio.sleep(wait)
+
+    async def wait_ready(self):
+        """Waits out a throttle pause without taking a token."""
+        while True:
+            with self._lock:
+                wait = self._paused_until - self._clock()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    @property
+    def paused(self) -> bool:
+        return self._paused_until > self._clock()
+
+    def observe(self, limit: int | None = None, remaining: int | None = None, reset_at: float | None = None):
+        """
+        Applies the quota headers of a successful response (X-RateLimit-Limit,
+        -Remaining and -Reset, the last as a Unix timestamp).
+        """
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._consecutive_throttles = 0
+            if limit and limit != self.limit:
+                logger.info("RequestBudget: Rate limit changed from %d to %d requests per %ss.",
+                            self.limit, limit, self.period)
+                self._set_limit(limit)
+                self._tokens = min(self._tokens, self.capacity)
+            if remaining is not None:
+                self.remaining = remaining
+                # Keep the safety margin of what the server says is left, never more.
+                self._tokens = min(self._tokens, max(0.0, remaining - (1 - self.safety) * self.limit))
+                if remaining <= 0 and reset_at is not None:
+                    self._paused_until = max(self._paused_until, now + max(0.0, reset_at - self._wall_clock()))
+
+    def throttle(self, retry_after: float | None = None):
+        """Pauses every request after an HTTP 429, for retry_after seconds or an exponential backoff."""
+        with self._lock:
+            now = self._clock()
+            self._consecutive_throttles += 1
+            self.throttles += 1
+            delay = retry_after if retry_after is not None else min(
+                self.backoff * 2 ** (self._consecutive_throttles - 1), self.max_backoff)
+            self._paused_until = max(self._paused_until, now + delay)
+            self._tokens = 0.0
+            self._updated = now
+        logger.warning("RequestBudget: Rate limited; pausing requests for %.1fs.", delay)
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            self._refill(self._clock())
+            return {
+                "limit": self.limit,
+                "rate": self.rate,
+                "tokens": self._tokens,
+                "remaining": self.remaining if self.remaining is not None else self.limit,
+                "acquired": self.acquired,
+                "throttles": self.throttles,
+            }
+
+    def bind_metrics(self, registry):
+        """Serves the quota state from a MetricsRegistry."""
+        registry.gauge("request_budget_tokens", "Requests that may be sent right now.").set_function(
+            lambda: self.stats()["tokens"])
+        registry.gauge("request_budget_remaining",
+                       "Requests left in the quota window per the last response (the limit until one arrives).").set_function(
+            lambda: self.remaining if self.remaining is not None else self.limit)
+        registry.gauge("request_budget_throttles", "HTTP 429 responses since startup.").set_function(
+            lambda: self.throttles)
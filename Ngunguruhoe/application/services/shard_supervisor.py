@@ -0,0 +1,283 @@
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import queue
+from bisect import bisect
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Mapping
+from Ngunguruhoe.application.services.alert_stats import AlertStats
+from Ngunguruhoe.domain.models.alert_batch import AlertBatch
+from Ngunguruhoe.domain.ports.alert_port import AlertPort
+from Ngunguruhoe.domain.ports.alert_publisher_port import AlertPublisherPort
+
+logger = logging.getLogger(__name__)
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+class ConsistentHashRing:
+    """
+    Maps keys (symbols) to nodes (shard ids) on a hash ring with replicas virtual points
+    per node. Adding or removing one of n nodes only moves about 1/n of the keys.
+    """
+    def __init__(self, nodes: Iterable[int], replicas: int = 128):
+        points = sorted((_hash(f"{node}:{i}"), node) for node in nodes for i in range(replicas))
+        if not points:
+            raise ValueError("A hash ring needs at least one node.")
+        self._hashes = [h for h, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def node_for(self, key: str) -> int:
+        return self._nodes[bisect(self._hashes, _hash(key)) % len(self._nodes)]
+
+def shard_symbols(symbols: Mapping[str, float], workers: int, replicas: int = 128) -> list[dict[str, float]]:
+    """Splits {symbol: interval} into one dict per worker by consistent hashing."""
+    ring = ConsistentHashRing(range(workers), replicas)
+    shards: list[dict[str, float]] = [{} for _ in range(workers)]
+    for symbol, interval in symbols.items():
+        shards[ring.node_for(symbol)][symbol] = interval
+    return shards
+
+def quota_share(shard: Mapping[str, float], symbols: Mapping[str, float]) -> float:
+    """A shard's fraction of the account request quota: its share of the universe's polls per second."""
+    total = sum(1 / interval for interval in symbols.values())
+    return sum(1 / interval for interval in shard.values()) / total if total else 0.0
+
+@dataclass
+class _Shard:
+    shard_id: int
+    symbols: dict[str, float]
+    quota_share: float = 0.0
+    process: Any = None
+    started_at: float = 0.0
+    failures: int = 0
+    restart_at: float | None = None
+    restarts: int = 0
+
+class ShardSupervisor:
+    """
+    Runs ingestion in worker processes, one per shard of the symbol universe.
+
+    Symbols are assigned by consistent hashing and each worker runs
+    worker_target(shard_id, symbols, alert_queue, quota_share) in its own process,
+    typically its own AlertService over a QueueAlertRepository; quota_share is the
+    fraction of the request quota its symbols' polls need (see quota_share), so the
+    workers' shares always add up to the whole quota. The supervisor relays every alert
+    message from alert_queue into the one alert_repo (the single writer), publisher
+    and alert_stats, polling every relay_interval and storing everything that arrived
+    as one batch. Alerts whose save fails are kept and retried first on the next pass,
+    retry_delay later; beyond max_unsaved of them the oldest are dropped.
+
+    A worker that exits is restarted after restart_delay, doubling per consecutive
+    failure up to max_restart_delay; a worker that stays up for stable_after seconds
+    counts as healthy again. resize() rebalances the universe over a new worker count,
+    restarting only the workers whose symbols changed.
+    """
+    def __init__(self,
+                 worker_target: Callable[[int, dict[str, float], Any, float], None],
+                 symbols: Mapping[str, float],
+                 workers: int,
+                 alert_repo: AlertPort,
+                 publisher: AlertPublisherPort | None = None,
+                 alert_stats: AlertStats | None = None,
+                 check_interval: float = 1.0,
+                 relay_interval: float = 0.02,
+                 restart_delay: float = 1.0,
+                 max_restart_delay: float = 30.0,
+                 stable_after: float = 60.0,
+                 stop_timeout: float = 5.0,
+                 retry_delay: float = 1.0,
+                 max_unsaved: int = 100_000,
+                 start_method: str = "spawn"):
+        if workers < 1:
+            raise ValueError("workers must be at least 1.")
+        self.worker_target = worker_target
+        self.symbols = dict(symbols)
+        self.alert_repo = alert_repo
+        self.publisher = publisher
+        self.alert_stats = alert_stats
+        self.check_interval = check_interval
+        self.relay_interval = relay_interval
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.stable_after = stable_after
+        self.stop_timeout = stop_timeout
+        self.retry_delay = retry_delay
+        self.max_unsaved = max_unsaved
+        self.relayed = 0
+        self.save_failures = 0
+        self.dropped = 0
+        self._unsaved = AlertBatch()
+        self._context = multiprocessing.get_context(start_method)
+        self.alert_queue = self._context.Queue()
+        self._shards = [self._shard(i, symbols) for i, symbols in enumerate(shard_symbols(self.symbols, workers))]
+        self._lock = asyncio.Lock() # serializes monitor passes and resizes
+
+    def _shard(self, shard_id: int, symbols: dict[str, float]) -> _Shard:
+        return _Shard(shard_id, symbols, quota_share(symbols, self.symbols))
+
+    @property
+    def workers(self) -> int:
+        return len(self._shards)
+
+    def assignment(self) -> list[dict[str, float]]:
+        return [dict(shard.symbols) for shard in self._shards]
+
+    def bind_metrics(self, registry):
+        """Serves worker liveness and restart counts from a MetricsRegistry."""
+        registry.gauge("shard_workers", "Shard worker processes currently alive.").set_function(
+            lambda: sum(1 for shard in self._shards if shard.process is not None and shard.process.is_alive()))
+        registry.gauge("shard_worker_restarts", "Shard worker restarts since startup.").set_function(
+            lambda: sum(shard.restarts for shard in self._shards))
+        registry.gauge("shard_alerts_relayed", "Alerts received from shard workers.").set_function(lambda: self.relayed)
+
+    async def run(self):
+        """Starts every worker, then relays alerts and supervises workers until cancelled."""
+        async with self._lock:
+            for shard in self._shards:
+                self._start(shard)
+        logger.info("ShardSupervisor: Started %d worker(s) for %d symbol(s).", self.workers, len(self.symbols))
+        tasks = [asyncio.create_task(self._relay_loop(), name="shard-relay"),
+                 asyncio.create_task(self._monitor_loop(), name="shard-monitor")]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.stop()
+
+    async def stop(self):
+        """Stops every worker and relays the alerts they sent before exiting."""
+        async with self._lock:
+            await asyncio.gather(*(self._stop(shard) for shard in self._shards))
+        if not await self._drain():
+            logger.error("ShardSupervisor: %d relayed alert(s) could not be stored before stopping.", len(self._unsaved))
+
+    async def resize(self, workers: int):
+        """Rebalances the symbol universe over workers processes."""
+        if workers < 1:
+            raise ValueError("workers must be at least 1.")
+        async with self._lock:
+            assignment = shard_symbols(self.symbols, workers)
+            # A worker keeping its symbols also keeps its quota share, which depends only on them.
+            kept = {shard.shard_id: shard for shard in self._shards
+                    if shard.shard_id < workers and shard.symbols == assignment[shard.shard_id]}
+            # Stop every changed worker before starting replacements, so no symbol is polled twice.
+            await asyncio.gather(*(self._stop(shard) for shard in self._shards if shard.shard_id not in kept))
+            self._shards = []
+            for shard_id, symbols in enumerate(assignment):
+                shard = kept.get(shard_id)
+                if shard is None:
+                    shard = self._shard(shard_id, symbols)
+                    self._start(shard)
+                self._shards.append(shard)
+        logger.info("ShardSupervisor: Rebalanced to %d worker(s); %d kept their symbols.", workers, len(kept))
+
+    def stats(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "shard": shard.shard_id,
+                "symbols": len(shard.symbols),
+                "quota_share": shard.quota_share,
+                "alive": shard.process is not None and shard.process.is_alive(),
+                "restarts": shard.restarts,
+            }
+            for shard in self._shards
+        ]
+
+    def _start(self, shard: _Shard):
+        if not shard.symbols:
+            return # more workers than symbols: nothing for this shard to do
+        shard.process = self._context.Process(
+            target=self.worker_target,
+            args=(shard.shard_id, shard.symbols, self.alert_queue, shard.quota_share),
+            name=f"shard-{shard.shard_id}",
+            daemon=True,
+        )
+        shard.process.start()
+        shard.started_at = asyncio.get_running_loop().time()
+        shard.restart_at = None
+
+    async def _stop(self, shard: _Shard):
+        process, shard.process = shard.process, None
+        if process is None:
+            return
+        if process.is_alive():
+            process.terminate()
+            await asyncio.to_thread(process.join, self.stop_timeout)
+            if process.is_alive():
+                process.kill()
+                await asyncio.to_thread(process.join)
+        process.close()
+
+    async def _monitor_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.check_interval)
+            async with self._lock:
+                now = loop.time()
+                for shard in self._shards:
+                    self._check(shard, now)
+
+    def _check(self, shard: _Shard, now: float):
+        process = shard.process
+        if not shard.symbols or (process is not None and process.is_alive()):
+            if shard.failures and now - shard.started_at >= self.stable_after:
+                shard.failures = 0
+            return
+        if shard.restart_at is None:
+            shard.failures += 1
+            delay = min(self.restart_delay * 2 ** (shard.failures - 1), self.max_restart_delay)
+            shard.restart_at = now + delay
+            logger.warning("ShardSupervisor: Worker %d exited with code %s; restarting in %.1fs.",
+                           shard.shard_id, process.exitcode if process is not None else None, delay)
+        elif now >= shard.restart_at:
+            if process is not None:
+                process.close()
+            shard.restarts += 1
+            self._start(shard)
+
+    async def _relay_loop(self):
+        # Polling keeps every read on the event loop, so no message is ever in flight on a
+        # thread when the relay is cancelled.
+        while True:
+            saved = await self._drain()
+            await asyncio.sleep(self.relay_interval if saved else self.retry_delay)
+
+    async def _drain(self) -> bool:
+        """
+        Stores and publishes every alert message waiting in alert_queue, after any alerts
+        a failed save left behind. Returns False if the save failed; they are kept for the next pass.
+        """
+        batch, self._unsaved = self._unsaved, AlertBatch()
+        while True:
+            try:
+                _, rows = self.alert_queue.get_nowait()
+            except queue.Empty:
+                break
+            for timestamp_ns, symbol, action, confidence in rows:
+                batch.append(timestamp_ns, symbol, action, confidence)
+        if not len(batch):
+            return True
+        try:
+            await self.alert_repo.save_alerts(batch)
+        except Exception as e:
+            self.save_failures += 1
+            excess = len(batch) - self.max_unsaved
+            if excess > 0:
+                for column in (batch.timestamp_ns, batch.symbol_ids, batch.action_codes, batch.confidence):
+                    del column[:excess]
+                self.dropped += excess
+            self._unsaved = batch
+            logger.error("ShardSupervisor: Failed to store %d relayed alert(s), retrying in %.1fs%s: %s",
+                         len(batch), self.retry_delay, f" ({excess} oldest dropped)" if excess > 0 else "", e)
+            return False
+        self.relayed += len(batch)
+        if self.alert_stats is not None:
+            self.alert_stats.record_batch(batch)
+        if self.publisher is not None:
+            for alert in batch:
+                await self.publisher.publish(alert)
+        return True
@@ -0,0 +1,41 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+class StreamIngestor:
+    """
+    Drives AlertService from a push-based tick queue (e.g. ConflatingTickQueue fed by
+    AlpacaStreamAdapter). A fixed pool of workers takes the newest pending tick per
+    symbol and runs the strategy on it, so a slow strategy only ever sees fresh data.
+    """
+    def __init__(self, service, queue, workers: int = 4):
+        if workers < 1:
+            raise ValueError("workers must be at least 1.")
+        self.service = service
+        self.queue = queue
+        self.workers = workers
+        self.processed = 0
+        self.errors = 0
+
+    async def run(self):
+        """Runs the worker pool until cancelled."""
+        tasks = [asyncio.create_task(self._worker(), name=f"stream-worker-{i}") for i in range(self.workers)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _worker(self):
+        while True:
+            tick = await self.queue.get()
+            try:
+                await self.service.process_market_data(tick.S, tick)
+                self.processed += 1
+            except Exception as e:
+                self.errors += 1
+                logger.error("StreamIngestor: Error processing tick for %s: %s", tick.S, e, extra={"symbol": tick.S})
+            finally:
+                self.queue.task_done(tick.S)
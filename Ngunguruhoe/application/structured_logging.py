@@ -0,0 +1,175 @@
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Mapping, TextIO
+
+# Attributes every LogRecord has; anything else on a record came from extra= and is emitted as a field.
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+def parse_sample_rates(value: str) -> dict[int, float]:
+    """
+    Parses per-level sample rates such as "DEBUG=0.1,INFO=0.5" into {levelno: rate}.
+    A rate is the fraction of records at that level that are kept.
+    """
+    rates: dict[int, float] = {}
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        level, _, rate = entry.partition("=")
+        levelno = logging.getLevelName(level.strip().upper())
+        if not isinstance(levelno, int):
+            raise ValueError(f"Unknown log level in sample rates: {level!r}")
+        rates[levelno] = float(rate)
+    return rates
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats a record as one JSON line: ts (UTC, ISO 8601), level, logger, msg, every
+    field passed through extra= (e.g. symbol), and exc when an exception is attached.
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class SamplingFilter(logging.Filter):
+    """
+    Drops records before they are queued, so suppressed records cost the caller a few
+    comparisons. Records at max_level and above always pass. Below it, sample_rates
+    keeps that fraction of each level, and per_symbol_rate caps records carrying a
+    symbol field to that many per second per symbol (a token bucket allowing bursts of
+    per_symbol_burst).
+    """
+    def __init__(self,
+                 sample_rates: Mapping[int, float] | None = None,
+                 per_symbol_rate: float | None = None,
+                 per_symbol_burst: float | None = None,
+                 max_level: int = logging.WARNING,
+                 clock: Callable[[], float] = time.monotonic,
+                 rng: Callable[[], float] = random.random):
+        super().__init__()
+        self.sample_rates = dict(sample_rates or {})
+        self.per_symbol_rate = per_symbol_rate
+        self.per_symbol_burst = per_symbol_burst if per_symbol_burst is not None else max(per_symbol_rate or 0.0, 1.0)
+        self.max_level = max_level
+        self.clock = clock
+        self.rng = rng
+        self.sampled = 0
+        self.rate_limited = 0
+        self._buckets: dict[str, list[float]] = {} # symbol -> [tokens, last refill]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.max_level:
+            return True
+        rate = self.sample_rates.get(record.levelno)
+        if rate is not None and self.rng() >= rate:
+            self.sampled += 1
+            return False
+        symbol = record.__dict__.get("symbol")
+        if symbol is None or self.per_symbol_rate is None:
+            return True
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.get(symbol)
+            if bucket is None:
+                bucket = self._buckets[symbol] = [self.per_symbol_burst, now]
+            bucket[0] = min(self.per_symbol_burst, bucket[0] + (now - bucket[1]) * self.per_symbol_rate)
+            bucket[1] = now
+            if bucket[0] < 1.0:
+                self.rate_limited += 1
+                return False
+            bucket[0] -= 1.0
+        return True
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread without formatting them, so %-style arguments
+    are only rendered off the event loop; arguments must not be mutated after logging.
+    Records are dropped (and counted) rather than blocking when the queue is full.
+    """
+    def __init__(self, record_queue: queue.Queue):
+        super().__init__(record_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class LoggingPipeline:
+    """
+    Structured logging for the whole process: loggers hand records to a bounded queue
+    and a background thread formats them as JSON lines and writes them to stream.
+    Sampling and per-symbol rate limits run in the caller before a record is queued.
+    """
+    def __init__(self,
+                 level: int | str = logging.INFO,
+                 stream: TextIO | None = None,
+                 sample_rates: Mapping[int, float] | None = None,
+                 per_symbol_rate: float | None = None,
+                 per_symbol_burst: float | None = None,
+                 queue_size: int = 10000,
+                 formatter: logging.Formatter | None = None):
+        self.level = logging.getLevelName(level.upper()) if isinstance(level, str) else level
+        if not isinstance(self.level, int):
+            raise ValueError(f"Unknown log level: {level!r}")
+        self.filter = SamplingFilter(sample_rates, per_symbol_rate, per_symbol_burst)
+        self.handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+        self.handler.addFilter(self.filter)
+        output = logging.StreamHandler(stream if stream is not None else sys.stdout)
+        output.setFormatter(formatter or JsonFormatter())
+        self._listener = QueueListener(self.handler.queue, output, respect_handler_level=True)
+        self._previous: tuple[list[logging.Handler], int] | None = None
+
+    def dropped(self) -> dict[str, int]:
+        """Records suppressed so far, by reason."""
+        return {
+            "sampled": self.filter.sampled,
+            "rate_limited": self.filter.rate_limited,
+            "queue_full": self.handler.dropped,
+        }
+
+    def bind_metrics(self, registry):
+        """Serves the drop counters from a MetricsRegistry (e.g. the one behind /metrics)."""
+        gauge = registry.gauge("log_records_dropped", "Log records suppressed before output, by reason.", ("reason",))
+        for reason in ("sampled", "rate_limited", "queue_full"):
+            gauge.labels(reason).set_function(lambda reason=reason: self.dropped()[reason])
+
+    def start(self):
+        """Routes the root logger through the pipeline and starts the writer thread."""
+        root = logging.getLogger()
+        self._previous = (root.handlers[:], root.level)
+        root.handlers = [self.handler]
+        root.setLevel(self.level)
+        self._listener.start()
+
+    def stop(self):
+        """Writes out every queued record, stops the writer thread and restores the root logger."""
+        if self._previous is None:
+            return
+        self._listener.stop()
+        root = logging.getLogger()
+        root.handlers, level = self._previous
+        root.setLevel(level)
+        self._previous = None
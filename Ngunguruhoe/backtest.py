@@ -0,0 +1,41 @@
+import argparse
+import asyncio
+import json
+from Ngunguruhoe.adapters.alert_repo_memory import InMemoryAlertRepository
+from Ngunguruhoe.adapters.historical_data_source import BAR_COLUMNS, TRADE_COLUMNS, iter_historical_snapshots
+from Ngunguruhoe.application.services.alert_service import SimpleMarketTrendStrategy
+from Ngunguruhoe.application.services.backtest_service import BacktestEngine
+from Ngunguruhoe.domain.indicators import IndicatorEngine
+
+# Replays a historical trades/bars file through the strategy and prints a JSON report, e.g.
+#   python -m Ngunguruhoe.backtest minute_bars.parquet --bars
+# Expected columns: symbol, price, timestamp[, size] for trades; symbol, close, timestamp[, volume] for bars.
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest the alert strategy on historical data.")
+    parser.add_argument("path", help="CSV or Parquet file with historical trades or bars")
+    parser.add_argument("--bars", action="store_true", help="input holds bars (close/volume) instead of trades")
+    parser.add_argument("--format", dest="file_format", choices=["csv", "parquet"], help="override detection by file extension")
+    parser.add_argument("--chunksize", type=int, default=500_000, help="rows read per chunk")
+    parser.add_argument("--timestamp-unit", default="ns", choices=["s", "ms", "us", "ns"],
+                        help="unit of numeric timestamps (ISO strings are parsed regardless)")
+    parser.add_argument("--window", type=int, default=20, help="indicator window in ticks")
+    parser.add_argument("--price-threshold", type=float, default=100.0, help="cold-start price threshold")
+    parser.add_argument("--max-alerts", type=int, default=100_000, help="alerts retained in memory (0 keeps all)")
+    return parser.parse_args(argv)
+
+async def run_backtest(args) -> dict:
+    strategy = SimpleMarketTrendStrategy(price_threshold=args.price_threshold,
+                                         indicators=IndicatorEngine(window=args.window))
+    repo = InMemoryAlertRepository(max_alerts=args.max_alerts or None)
+    engine = BacktestEngine(strategy, repo)
+    chunks = iter_historical_snapshots(args.path,
+                                       chunksize=args.chunksize,
+                                       columns=BAR_COLUMNS if args.bars else TRADE_COLUMNS,
+                                       file_format=args.file_format,
+                                       timestamp_unit=args.timestamp_unit)
+    report = await engine.run(chunks)
+    return report.to_dict()
+
+if __name__ == "__main__":
+    print(json.dumps(asyncio.run(run_backtest(parse_args())), indent=2))
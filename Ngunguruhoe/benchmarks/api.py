@@ -0,0 +1,38 @@
+import os
+import tempfile
+from Ngunguruhoe.adapters.alert_repo_sqlite import SQLiteAlertRepository
+from Ngunguruhoe.adapters.webserver_fastapi import create_app
+from Ngunguruhoe.benchmarks.asgi_client import asgi_get
+from Ngunguruhoe.benchmarks.harness import BenchmarkResult, quiet, run_load
+from Ngunguruhoe.benchmarks.storage import SYMBOLS, _fill
+
+async def bench_endpoint(app, path: str, params_for, requests: int, concurrency: int) -> dict:
+    """Drives the ASGI app in process (no sockets), so the numbers are framework + handler cost."""
+    async def request(i):
+        response = await asgi_get(app, path, params_for(i))
+        if response.status != 200:
+            raise RuntimeError(f"GET {path} returned {response.status}")
+    return await run_load(request, requests, concurrency)
+
+async def run(quick: bool = False, rows: int = 10_000, concurrency_levels=(1, 16, 64)) -> list[BenchmarkResult]:
+    requests = 500 if quick else 5000
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = SQLiteAlertRepository(db_path=os.path.join(tmp, "bench.db"))
+        with quiet():
+            await repo.init_db()
+        try:
+            await _fill(repo, rows)
+            app = create_app(repo)
+            for concurrency in concurrency_levels:
+                params = {"rows": rows, "concurrency": concurrency}
+                results.append(BenchmarkResult("api.latest_alert", params, await bench_endpoint(
+                    app, "/latest-alert", lambda i: {}, requests, concurrency)))
+                results.append(BenchmarkResult("api.latest_alert_by_symbol", params, await bench_endpoint(
+                    app, "/latest-alert", lambda i: {"symbol": str(SYMBOLS[i % len(SYMBOLS)])}, requests, concurrency)))
+                results.append(BenchmarkResult("api.alerts_page", params, await bench_endpoint(
+                    app, "/alerts", lambda i: {"symbol": str(SYMBOLS[i % len(SYMBOLS)]), "limit": 100},
+                    requests // 5, concurrency)))
+        finally:
+            await repo.close()
+    return results
@@ -0,0 +1,40 @@
+from dataclasses import dataclass, field
+from urllib.parse import urlencode
+
+@dataclass
+class ASGIResponse:
+    status: int
+    headers: dict = field(default_factory=dict)
+    body: bytes = b""
+
+async def asgi_get(app, path: str, params: dict | None = None, headers: dict | None = None) -> ASGIResponse:
+    """Sends one GET request straight to an ASGI app, without a server or HTTP client library."""
+    query = urlencode({k: v for k, v in (params or {}).items() if v is not None})
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    response = ASGIResponse(status=0)
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response.status = message["status"]
+            response.headers = {k.decode().lower(): v.decode() for k, v in message.get("headers", [])}
+        elif message["type"] == "http.response.body":
+            response.body += message.get("body", b"")
+
+    await app(scope, receive, send)
+    return response
@@ -0,0 +1,246 @@
+"""
+Local exchange simulator serving synthetic market data over Alpaca's REST API.
+
+Prices follow geometric Brownian motion per symbol, with random volatility bursts, and
+every tick produces a new latest trade for every symbol. The endpoints AlpacaAdapter
+uses are served with Alpaca's JSON shapes and rate-limit headers:
+    GET /v2/account
+    GET /v2/stocks/{symbol}/trades/latest
+    GET /v2/stocks/trades/latest?symbols=AAPL,MSFT
+Latency, failures (HTTP 500) and a request quota (HTTP 429) can be injected.
+
+Run standalone to develop against the polling pipeline offline:
+    python -m Ngunguruhoe.benchmarks.exchange_simulator --symbols 2000 --port 8766
+    ALPACA_BASE_URL=http://127.0.0.1:8766 APCA_API_DATA_URL=http://127.0.0.1:8766 \\
+        ALPACA_API_KEY=sim ALPACA_SECRET_KEY=sim TRADING_SYMBOLS=SIM0000,SIM0001 python -m Ngunguruhoe.main
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, unquote, urlsplit
+import numpy as np
+
+REASONS = {200: "OK", 404: "Not Found", 429: "Too Many Requests", 500: "Internal Server Error"}
+
+def simulated_symbols(count: int) -> list[str]:
+    width = max(4, len(str(count - 1)))
+    return [f"SIM{i:0{width}d}" for i in range(count)]
+
+class PricePaths:
+    """
+    Geometric Brownian motion price paths for many symbols, advanced together in vectorized steps.
+
+    volatility is per square root of a second. Each symbol enters a burst with probability
+    burst_rate per second; for burst_duration seconds its volatility is multiplied by
+    burst_multiplier.
+    """
+    def __init__(self, symbols: list[str], start_price: float = 100.0, drift: float = 0.0,
+                 volatility: float = 0.0005, burst_rate: float = 0.01, burst_multiplier: float = 10.0,
+                 burst_duration: float = 5.0, seed: int | None = None):
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        n = len(self.symbols)
+        self.rng = np.random.default_rng(seed)
+        self.drift = drift
+        self.volatility = volatility
+        self.burst_rate = burst_rate
+        self.burst_multiplier = burst_multiplier
+        self.burst_duration = burst_duration
+        # Spread starting prices around start_price so symbols sit on both sides of any threshold.
+        self.price = start_price * np.exp(self.rng.normal(0.0, 0.5, n))
+        self.size = np.ones(n)
+        self.trade_id = np.zeros(n, dtype=np.int64)
+        self.timestamp_ns = np.full(n, time.time_ns(), dtype=np.int64)
+        self.burst_left = np.zeros(n)
+
+    def advance(self, dt: float, now_ns: int | None = None):
+        n = len(self.symbols)
+        starting = (self.burst_left <= 0) & (self.rng.random(n) < self.burst_rate * dt)
+        self.burst_left[starting] = self.burst_duration
+        sigma = self.volatility * np.where(self.burst_left > 0, self.burst_multiplier, 1.0)
+        self.burst_left -= dt
+        shocks = self.rng.standard_normal(n)
+        self.price *= np.exp((self.drift - 0.5 * sigma ** 2) * dt + sigma * math.sqrt(dt) * shocks)
+        self.size = self.rng.integers(1, 500, n).astype(np.float64)
+        self.trade_id += 1
+        self.timestamp_ns[:] = now_ns if now_ns is not None else time.time_ns()
+
+    @property
+    def bursting(self) -> int:
+        return int(np.count_nonzero(self.burst_left > 0))
+
+    def trade(self, i: int) -> dict:
+        """Symbol i's latest trade in Alpaca's v2 trade shape."""
+        seconds, nanos = divmod(int(self.timestamp_ns[i]), 1_000_000_000)
+        stamp = datetime.fromtimestamp(seconds, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+        return {"t": f"{stamp}.{nanos:09d}Z", "x": "V", "p": round(float(self.price[i]), 4),
+                "s": int(self.size[i]), "c": ["@"], "i": int(self.trade_id[i]), "z": "C"}
+
+class ExchangeSimulator:
+    """
+    Serves PricePaths over HTTP/1.1 (with keep-alive) in Alpaca's latest-trade REST format.
+
+    Prices advance every tick_interval seconds of wall time. Each request waits
+    latency plus an exponentially distributed jitter (mean jitter) before it is
+    answered, fails with HTTP 500 with probability error_rate, and, with rate_limit
+    set, counts against a quota of rate_limit requests per minute; requests beyond it
+    get HTTP 429 with Retry-After until the window resets.
+    """
+    def __init__(self, symbols: list[str] | int, host: str = "127.0.0.1", port: int = 0,
+                 tick_interval: float = 0.1, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, rate_limit: int | None = None, seed: int | None = None, **path_options):
+        if isinstance(symbols, int):
+            symbols = simulated_symbols(symbols)
+        self.paths = PricePaths(symbols, seed=seed, **path_options)
+        self.host = host
+        self.port = port
+        self.tick_interval = tick_interval
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rng = np.random.default_rng(None if seed is None else seed + 1)
+        self.requests = 0
+        self.trades_served = 0
+        self.errors_injected = 0
+        self.throttled = 0
+        self._window_start = time.time()
+        self._window_requests = 0
+        self._server = None
+        self._ticker = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ticker = asyncio.create_task(self._tick_loop())
+        return self
+
+    async def stop(self):
+        self._ticker.cancel()
+        await asyncio.gather(self._ticker, return_exceptions=True)
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "trades_served": self.trades_served,
+                "errors_injected": self.errors_injected, "throttled": self.throttled,
+                "bursting_symbols": self.paths.bursting}
+
+    async def _tick_loop(self):
+        loop = asyncio.get_running_loop()
+        previous = loop.time()
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            now = loop.time()
+            self.paths.advance(now - previous)
+            previous = now
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if int(headers.get("content-length", 0) or 0):
+                    await reader.readexactly(int(headers["content-length"]))
+                method, target, *_ = request_line.decode("latin-1").split()
+                status, body, extra = await self._respond(method, target)
+                payload = json.dumps(body, separators=(",", ":")).encode()
+                head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", "Content-Type: application/json",
+                        f"Content-Length: {len(payload)}", *(f"{k}: {v}" for k, v in extra.items())]
+                close = headers.get("connection", "").lower() == "close"
+                if close:
+                    head.append("Connection: close")
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + payload)
+                await writer.drain()
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def _quota_headers(self, now: float) -> dict:
+        if now - self._window_start >= 60:
+            self._window_start, self._window_requests = now, 0
+        self._window_requests += 1
+        return {"X-RateLimit-Limit": self.rate_limit,
+                "X-RateLimit-Remaining": max(0, self.rate_limit - self._window_requests),
+                "X-RateLimit-Reset": int(self._window_start + 60)}
+
+    async def _respond(self, method: str, target: str) -> tuple[int, dict, dict]:
+        self.requests += 1
+        delay = self.latency + (self.rng.exponential(self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        extra = {}
+        if self.rate_limit is not None:
+            now = time.time()
+            extra = self._quota_headers(now)
+            if self._window_requests > self.rate_limit:
+                self.throttled += 1
+                extra["Retry-After"] = max(1, math.ceil(self._window_start + 60 - now))
+                return 429, {"code": 42910000, "message": "rate limit exceeded"}, extra
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.errors_injected += 1
+            return 500, {"code": 50010000, "message": "internal server error"}, extra
+
+        parts = urlsplit(target)
+        path = unquote(parts.path).rstrip("/")
+        if method != "GET":
+            return 404, {"code": 40410000, "message": "not found"}, extra
+        if path == "/v2/account":
+            return 200, {"id": "simulated", "account_number": "SIM", "status": "ACTIVE", "currency": "USD"}, extra
+        if path == "/v2/stocks/trades/latest":
+            symbols = ",".join(parse_qs(parts.query).get("symbols", [])).split(",")
+            trades = {s: self.paths.trade(self.paths.index[s]) for s in symbols if s in self.paths.index}
+            self.trades_served += len(trades)
+            return 200, {"trades": trades}, extra
+        segments = path.split("/")
+        if len(segments) == 6 and segments[1:3] == ["v2", "stocks"] and segments[4:] == ["trades", "latest"]:
+            i = self.paths.index.get(segments[3])
+            if i is not None:
+                self.trades_served += 1
+                return 200, {"symbol": segments[3], "trade": self.paths.trade(i)}, extra
+        return 404, {"code": 40410000, "message": "not found"}, extra
+
+async def _serve_forever(args):
+    simulator = ExchangeSimulator(args.symbols, host=args.host, port=args.port, tick_interval=args.tick_interval,
+                                  latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                  rate_limit=args.rate_limit, seed=args.seed)
+    async with simulator:
+        print(f"Simulating {len(simulator.paths.symbols)} symbol(s) at {simulator.url}")
+        await asyncio.Future()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve synthetic market data over Alpaca's latest-trade REST API.")
+    parser.add_argument("--symbols", type=int, default=1000)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--tick-interval", type=float, default=0.1, help="Seconds between price steps.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fixed seconds added to every response.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Mean of extra exponential latency, in seconds.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of an HTTP 500 per request.")
+    parser.add_argument("--rate-limit", type=int, default=None, help="Requests per minute before HTTP 429.")
+    parser.add_argument("--seed", type=int, default=None)
+    asyncio.run(_serve_forever(parser.parse_args()))
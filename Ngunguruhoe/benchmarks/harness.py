@@ -0,0 +1,107 @@
+import asyncio
+import contextlib
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Callable
+import numpy as np
+
+@dataclass
+class BenchmarkResult:
+    """One measurement. Higher-is-better metrics end in _per_second, lower-is-better ones in _ms."""
+    name: str
+    params: dict = field(default_factory=dict)
+    metrics: dict = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+def latency_summary(latencies_s) -> dict:
+    """p50/p90/p99/max/mean of per-operation latencies, in milliseconds."""
+    ms = np.asarray(latencies_s, dtype=np.float64) * 1000.0
+    if ms.size == 0:
+        return {}
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    return {"p50_ms": round(p50, 4), "p90_ms": round(p90, 4), "p99_ms": round(p99, 4),
+            "max_ms": round(ms.max(), 4), "mean_ms": round(ms.mean(), 4)}
+
+async def run_load(operation: Callable[[int], Awaitable], total: int, concurrency: int = 1) -> dict:
+    """
+    Calls operation(i) total times from concurrency workers and returns throughput plus
+    per-call latency percentiles.
+    """
+    latencies = np.empty(total)
+    next_index = iter(range(total))
+
+    async def worker():
+        for i in next_index:
+            started = time.perf_counter()
+            await operation(i)
+            latencies[i] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {"operations": total, "elapsed_s": round(elapsed, 4),
+            "ops_per_second": round(total / elapsed, 1), **latency_summary(latencies)}
+
+@contextlib.contextmanager
+def quiet(level: int = logging.WARNING):
+    """Raises the package logger to level while timing, so the services' per-alert logs don't dominate the timings."""
+    package_logger = logging.getLogger("Ngunguruhoe")
+    previous = package_logger.level
+    package_logger.setLevel(level)
+    try:
+        yield
+    finally:
+        package_logger.setLevel(previous)
+
+def parse_count(value: str) -> int:
+    """Parses row counts such as 10000, 10k, 1m or 10M."""
+    value = value.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    return int(float(value.rstrip("km")) * multiplier)
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                timeout=5, cwd=os.path.dirname(__file__)).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    import sqlite3
+    return {"python": sys.version.split()[0], "platform": platform.platform(), "cpus": os.cpu_count(),
+            "sqlite": sqlite3.sqlite_version, "git_commit": commit,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+
+def _higher_is_better(metric: str) -> bool | None:
+    if metric.endswith("_per_second"):
+        return True
+    if metric.endswith("_ms") or metric.endswith("_s"):
+        return False
+    return None
+
+def compare(baseline: dict, current: dict, tolerance: float = 0.10) -> list[dict]:
+    """
+    Lists metrics that got worse than baseline by more than tolerance (a fraction).
+    Results are matched on name and params; both arguments are run documents as written by run.py.
+    """
+    key = lambda result: (result["name"], tuple(sorted(result["params"].items())))
+    previous = {key(result): result["metrics"] for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        old_metrics = previous.get(key(result))
+        if not old_metrics:
+            continue
+        for metric, value in result["metrics"].items():
+            direction, old = _higher_is_better(metric), old_metrics.get(metric)
+            if direction is None or not old or metric == "elapsed_s":
+                continue
+            change = (value - old) / old
+            if (direction and change < -tolerance) or (not direction and change > tolerance):
+                regressions.append({"name": result["name"], "params": result["params"], "metric": metric,
+                                    "baseline": old, "current": value, "change": round(change, 4)})
+    return regressions
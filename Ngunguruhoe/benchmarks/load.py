@@ -0,0 +1,201 @@
+import argparse
+import asyncio
+import json
+import os
+import re
+import signal
+import socket
+import sys
+import tempfile
+import time
+from Ngunguruhoe.benchmarks.exchange_simulator import ExchangeSimulator, simulated_symbols
+from Ngunguruhoe.benchmarks.harness import BenchmarkResult, latency_summary
+
+# End-to-end load test: the full main.py stack (poll scheduler, strategy, SQLite, API)
+# in its own process, fed by the local exchange simulator instead of Alpaca, e.g.
+#   python -m Ngunguruhoe.benchmarks.load --symbols 5000 --duration 60 --latency 0.02 --error-rate 0.01
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_SAMPLE = re.compile(r'^(\w+?)(\{.*\})? (\S+)$')
+
+class HttpClient:
+    """Minimal keep-alive HTTP/1.1 GET client, so API latency excludes connection setup."""
+    def __init__(self, host: str, port: int):
+        self.host, self.port = host, port
+        self._reader = self._writer = None
+
+    async def get(self, path: str) -> tuple[int, bytes]:
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            self._writer.write(f"GET {path} HTTP/1.1\r\nHost: {self.host}\r\n\r\n".encode())
+            status = int((await self._reader.readline()).split()[1])
+            length = 0
+            while (line := await self._reader.readline()) not in (b"\r\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            return status, await self._reader.readexactly(length)
+        except (ConnectionError, asyncio.IncompleteReadError, IndexError, ValueError):
+            self.close()
+            raise ConnectionError(f"GET {path} failed")
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = None
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def scrape(text: str) -> dict[str, float]:
+    """Totals of the /metrics series the load report is built from."""
+    totals = {"cycles": 0.0, "evaluated": 0.0, "stored": 0.0, "errored": 0.0}
+    for line in text.splitlines():
+        match = _SAMPLE.match(line)
+        if match is None:
+            continue
+        name, labels, value = match.group(1), match.group(2) or "", float(match.group(3))
+        if name.endswith("stage_duration_seconds_count") and 'stage="total"' in labels:
+            totals["cycles"] += value
+        elif name.endswith("cycle_events_total"):
+            event = re.search(r'event="(\w+)"', labels)
+            event = event.group(1) if event else ""
+            if event in ("fetched", "no_data"):
+                totals["evaluated"] += value
+            elif event in ("stored", "errored"):
+                totals[event] += value
+    return totals
+
+async def wait_ready(client: HttpClient, process: asyncio.subprocess.Process, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.returncode is not None:
+            raise RuntimeError(f"main.py exited with status {process.returncode} before becoming ready")
+        try:
+            if (await client.get("/ready"))[0] == 200:
+                return
+        except ConnectionError:
+            pass
+        await asyncio.sleep(0.2)
+    raise TimeoutError(f"main.py was not ready within {timeout}s")
+
+async def probe_api(port: int, symbols: list[str], duration: float, concurrency: int) -> dict:
+    """Queries /latest-alert and /alerts from concurrency keep-alive clients for duration seconds."""
+    latencies, failures = [], 0
+    deadline = time.monotonic() + duration
+
+    async def client_loop(worker: int):
+        nonlocal failures
+        client = HttpClient("127.0.0.1", port)
+        i = worker
+        try:
+            while time.monotonic() < deadline:
+                symbol = symbols[i % len(symbols)]
+                path = f"/latest-alert?symbol={symbol}" if i % 2 else f"/alerts?symbol={symbol}&limit=100"
+                started = time.perf_counter()
+                try:
+                    status, _ = await client.get(path)
+                except ConnectionError:
+                    status = 0
+                if status in (200, 404):
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    failures += 1
+                i += concurrency
+        finally:
+            client.close()
+
+    await asyncio.gather(*(client_loop(worker) for worker in range(concurrency)))
+    return {"api_requests": len(latencies), "api_failures": failures,
+            "api_requests_per_second": round(len(latencies) / duration, 1),
+            **{f"api_{key}": value for key, value in latency_summary(latencies).items()}}
+
+async def stop_process(process: asyncio.subprocess.Process, timeout: float = 15.0):
+    if process.returncode is None:
+        process.send_signal(signal.SIGINT) # uvicorn shuts down gracefully and the repository drains
+        try:
+            await asyncio.wait_for(process.wait(), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+
+async def run_load_test(symbols: int = 1000, duration: float = 30.0, warmup: float = 5.0,
+                        poll_interval: float = 1.0, latency: float = 0.0, jitter: float = 0.0,
+                        error_rate: float = 0.0, rate_limit: int | None = None, api_concurrency: int = 8,
+                        ready_timeout: float = 60.0, env: dict | None = None) -> BenchmarkResult:
+    """
+    Runs main.py against the simulator for warmup + duration seconds and reports, over
+    the duration window: poll cycles, symbol evaluations and alert writes per second
+    (from the process's /metrics), and /latest-alert and /alerts latency measured
+    while ingestion runs. Alert deduplication is off by default, so every buy/sell
+    decision is written; env overrides any main.py variable.
+    """
+    names = simulated_symbols(symbols)
+    params = {"symbols": symbols, "duration_s": duration, "poll_interval_s": poll_interval,
+              "latency_s": latency, "jitter_s": jitter, "error_rate": error_rate, "rate_limit": rate_limit}
+    port = free_port()
+    async with ExchangeSimulator(names, latency=latency, jitter=jitter, error_rate=error_rate,
+                                 rate_limit=rate_limit, seed=0) as simulator:
+        with tempfile.TemporaryDirectory() as tmp:
+            child_env = {**os.environ,
+                         "ALPACA_API_KEY": "simulated", "ALPACA_SECRET_KEY": "simulated",
+                         "ALPACA_BASE_URL": simulator.url, "APCA_API_DATA_URL": simulator.url,
+                         "ALPACA_RATE_LIMIT": str(rate_limit or 1_000_000),
+                         "TRADING_SYMBOLS": ",".join(names), "POLL_INTERVAL_SECONDS": str(poll_interval),
+                         "ALERT_DB_PATH": os.path.join(tmp, "alerts.db"), "ALERT_DEDUPE": "false",
+                         "API_HOST": "127.0.0.1", "API_PORT": str(port), "LOG_LEVEL": "WARNING",
+                         **(env or {})}
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, "-m", "Ngunguruhoe.main", cwd=REPO_ROOT, env=child_env,
+                stdout=asyncio.subprocess.DEVNULL)
+            client = HttpClient("127.0.0.1", port)
+            try:
+                await wait_ready(client, process, ready_timeout)
+                await asyncio.sleep(warmup)
+                before_requests = simulator.requests
+                before = scrape((await client.get("/metrics"))[1].decode())
+                started = time.perf_counter()
+                api = await probe_api(port, names, duration, api_concurrency)
+                after = scrape((await client.get("/metrics"))[1].decode())
+                elapsed = time.perf_counter() - started
+                exchange_requests = simulator.requests - before_requests
+            finally:
+                client.close()
+                await stop_process(process)
+        stats = simulator.stats()
+    delta = {key: after[key] - before[key] for key in after}
+    metrics = {"elapsed_s": round(elapsed, 4),
+               "cycles_per_second": round(delta["cycles"] / elapsed, 1),
+               "symbol_evaluations_per_second": round(delta["evaluated"] / elapsed, 1),
+               "alert_writes_per_second": round(delta["stored"] / elapsed, 1),
+               "errored_symbols": int(delta["errored"]),
+               "exchange_requests_per_second": round(exchange_requests / elapsed, 1),
+               "exchange_errors_injected": stats["errors_injected"], "exchange_throttled": stats["throttled"],
+               **api}
+    return BenchmarkResult("load.main", params, metrics)
+
+async def run(quick: bool = False) -> list[BenchmarkResult]:
+    if quick:
+        return [await run_load_test(symbols=200, duration=5.0, warmup=2.0)]
+    return [await run_load_test(symbols=symbols, duration=30.0) for symbols in (1000, 5000)]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run main.py against the exchange simulator and report sustained rates.")
+    parser.add_argument("--symbols", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds measured after warm-up.")
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated exchange latency in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Mean extra exponential exchange latency in seconds.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of an HTTP 500 per exchange request.")
+    parser.add_argument("--rate-limit", type=int, default=None, help="Exchange requests per minute before HTTP 429.")
+    parser.add_argument("--api-concurrency", type=int, default=8)
+    args = parser.parse_args()
+    result = asyncio.run(run_load_test(symbols=args.symbols, duration=args.duration, warmup=args.warmup,
+                                       poll_interval=args.poll_interval, latency=args.latency, jitter=args.jitter,
+                                       error_rate=args.error_rate, rate_limit=args.rate_limit,
+                                       api_concurrency=args.api_concurrency))
+    print(json.dumps(result.to_dict(), indent=2))
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import time
+import numpy as np
+from Ngunguruhoe.adapters.alert_repo_memory import InMemoryAlertRepository
+from Ngunguruhoe.adapters.alert_repo_sqlite import SQLiteAlertRepository
+from Ngunguruhoe.application.services.alert_service import AlertService, SimpleMarketTrendStrategy
+from Ngunguruhoe.benchmarks.harness import BenchmarkResult, quiet, run_load
+from Ngunguruhoe.domain.models.market_snapshot import SnapshotRow
+
+class StubMarketData:
+    """Offline market data provider: each call returns a fresh trade on a per-symbol random walk."""
+    def __init__(self, seed: int = 0):
+        self.rng = np.random.default_rng(seed)
+        self.prices: dict[str, float] = {}
+        self.clock_ns = time.time_ns()
+
+    def _next_trade(self, symbol: str) -> SnapshotRow:
+        price = self.prices.get(symbol, 100.0) * float(np.exp(self.rng.normal(0, 0.001)))
+        self.prices[symbol] = price
+        self.clock_ns += 1000
+        return SnapshotRow(symbol, price, 100.0, self.clock_ns)
+
+    async def get_latest_trade(self, symbol: str) -> SnapshotRow:
+        return self._next_trade(symbol)
+
+    async def get_latest_trades(self, symbols) -> dict:
+        return {symbol: self._next_trade(symbol) for symbol in symbols}
+
+async def bench_run_strategy_and_store(operations: int = 20_000, symbols: int = 100, concurrency: int = 1,
+                                       repository: str = "memory") -> BenchmarkResult:
+    """AlertService.run_strategy_and_store end to end with stubbed market data."""
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = (SQLiteAlertRepository(db_path=os.path.join(tmp, "bench.db")) if repository == "sqlite"
+                else InMemoryAlertRepository(max_alerts=10_000))
+        with quiet():
+            await repo.init_db()
+        service = AlertService(repo, StubMarketData(), SimpleMarketTrendStrategy())
+        names = [f"SYM{i}" for i in range(symbols)]
+        try:
+            with quiet():
+                metrics = await run_load(lambda i: service.run_strategy_and_store(names[i % symbols]),
+                                         operations, concurrency)
+        finally:
+            await repo.close()
+    return BenchmarkResult("pipeline.run_strategy_and_store",
+                           {"symbols": symbols, "concurrency": concurrency, "repository": repository}, metrics)
+
+async def bench_run_batch_and_store(cycles: int = 500, symbols: int = 500) -> BenchmarkResult:
+    """One AlertService.run_batch_and_store call per cycle over all symbols (the poll scheduler's batch path)."""
+    repo = InMemoryAlertRepository(max_alerts=10_000)
+    service = AlertService(repo, StubMarketData(), SimpleMarketTrendStrategy())
+    names = [f"SYM{i}" for i in range(symbols)]
+    with quiet():
+        metrics = await run_load(lambda i: service.run_batch_and_store(names), cycles)
+    metrics["symbols_per_second"] = round(metrics["ops_per_second"] * symbols, 1)
+    return BenchmarkResult("pipeline.run_batch_and_store", {"symbols": symbols}, metrics)
+
+async def run(quick: bool = False) -> list[BenchmarkResult]:
+    scale = 10 if quick else 1
+    return [
+        await bench_run_strategy_and_store(20_000 // scale),
+        await bench_run_strategy_and_store(20_000 // scale, concurrency=32),
+        await bench_run_strategy_and_store(20_000 // scale, concurrency=32, repository="sqlite"),
+        await bench_run_batch_and_store(500 // scale),
+    ]
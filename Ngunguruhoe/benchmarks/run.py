@@ -0,0 +1,74 @@
+import argparse
+import asyncio
+import json
+import sys
+from Ngunguruhoe.benchmarks import api, load, pipeline, storage
+from Ngunguruhoe.benchmarks.harness import compare, environment, parse_count
+
+# Offline benchmark suite, e.g.
+#   python -m Ngunguruhoe.benchmarks.run --out bench.json
+#   python -m Ngunguruhoe.benchmarks.run pipeline api --quick --compare bench.json
+#   python -m Ngunguruhoe.benchmarks.run load --quick
+# Exits with status 1 when --compare finds a regression beyond --tolerance.
+
+SUITES = ("pipeline", "sqlite", "api")
+# Run only when named: the load suite starts main.py in a separate process.
+OPT_IN_SUITES = ("load",)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the alert pipeline, SQLite storage and HTTP API.")
+    parser.add_argument("suites", nargs="*", help=f"suites to run: {', '.join(SUITES + OPT_IN_SUITES)} "
+                        f"(default: {', '.join(SUITES)})")
+    parser.add_argument("--quick", action="store_true", help="fewer operations and only the smallest table, for smoke runs")
+    parser.add_argument("--rows", default="10k,1m,10m", help="comma-separated SQLite table sizes (default: 10k,1m,10m)")
+    parser.add_argument("--db-dir", help="directory for the temporary benchmark databases (default: system temp)")
+    parser.add_argument("--out", help="write results as JSON to this file (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results of an earlier run to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative slowdown for --compare")
+    args = parser.parse_args(argv)
+    unknown = set(args.suites) - set(SUITES + OPT_IN_SUITES)
+    if unknown:
+        parser.error(f"unknown suite(s): {', '.join(sorted(unknown))}")
+    return args
+
+async def run_suites(args) -> dict:
+    suites = args.suites or SUITES
+    rows = [parse_count(value) for value in args.rows.split(",")]
+    if args.quick:
+        rows = rows[:1]
+    results = []
+    for suite in suites:
+        print(f"Running {suite} benchmarks...", file=sys.stderr)
+        if suite == "pipeline":
+            results += await pipeline.run(quick=args.quick)
+        elif suite == "sqlite":
+            results += await storage.run(rows, quick=args.quick, db_dir=args.db_dir)
+        elif suite == "api":
+            results += await api.run(quick=args.quick)
+        elif suite == "load":
+            results += await load.run(quick=args.quick)
+    return {"environment": environment(), "quick": args.quick, "results": [r.to_dict() for r in results]}
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    report = asyncio.run(run_suites(args))
+    status = 0
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.tolerance)
+        report["regressions"] = regressions
+        status = 1 if regressions else 0
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+        print(f"Wrote {len(report['results'])} results to {args.out}", file=sys.stderr)
+    else:
+        print(output)
+    for regression in report.get("regressions", []):
+        print(f"REGRESSION {regression['name']} {regression['params']} {regression['metric']}: "
+              f"{regression['baseline']} -> {regression['current']} ({regression['change']:+.1%})", file=sys.stderr)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import time
+import numpy as np
+from Ngunguruhoe.adapters.alert_repo_sqlite import SQLiteAlertRepository
+from Ngunguruhoe.benchmarks.harness import BenchmarkResult, quiet, run_load
+from Ngunguruhoe.domain.models.alert import Alert, from_epoch_ns
+from Ngunguruhoe.domain.models.alert_batch import AlertBatch
+from Ngunguruhoe.domain.models.alert_query import AlertQuery
+
+SYMBOLS = np.array([f"SYM{i}" for i in range(500)])
+START_NS = 1_704_067_200 * 1_000_000_000 # 2024-01-01
+STEP_NS = 1_000_000_000 # one alert per second
+
+def synthetic_batch(start: int, count: int, rng: np.random.Generator) -> AlertBatch:
+    """count alerts with ids start..start+count-1, one second apart, over SYMBOLS."""
+    timestamps = START_NS + np.arange(start, start + count, dtype=np.int64) * STEP_NS
+    return AlertBatch.from_columns(timestamps, SYMBOLS[rng.integers(0, len(SYMBOLS), count)],
+                                   np.where(rng.random(count) < 0.5, "buy", "sell"),
+                                   np.round(rng.uniform(0.55, 0.75, count), 2))
+
+async def _fill(repo: SQLiteAlertRepository, rows: int, chunk: int = 100_000) -> dict:
+    rng = np.random.default_rng(0)
+    started = time.perf_counter()
+    for start in range(0, rows, chunk):
+        await repo.save_alerts(synthetic_batch(start, min(chunk, rows - start), rng))
+    await repo.flush()
+    elapsed = time.perf_counter() - started
+    return {"rows": rows, "elapsed_s": round(elapsed, 4), "rows_per_second": round(rows / elapsed, 1)}
+
+async def bench_sqlite(rows: int, queries: int = 1000, db_dir: str | None = None) -> list[BenchmarkResult]:
+    """Bulk insert rate into an empty database of the given size, then query rates against it."""
+    params = {"rows": rows}
+    results = []
+    with tempfile.TemporaryDirectory(dir=db_dir) as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        repo = SQLiteAlertRepository(db_path=db_path, batch_size=5000, max_pending=200_000)
+        with quiet():
+            await repo.init_db()
+        try:
+            insert = await _fill(repo, rows)
+            insert["bytes_per_row"] = round(os.path.getsize(db_path) / rows, 1)
+            results.append(BenchmarkResult("sqlite.insert_batch", params, insert))
+
+            rng = np.random.default_rng(1)
+            single = await run_load(
+                lambda i: repo.save_alert(Alert(from_epoch_ns(START_NS + (rows + i) * STEP_NS), "SYM0", "buy", 0.6)),
+                queries)
+            started = time.perf_counter()
+            await repo.flush()
+            single["flush_ms"] = round((time.perf_counter() - started) * 1000, 4)
+            results.append(BenchmarkResult("sqlite.save_alert", params, single))
+
+            results.append(BenchmarkResult("sqlite.get_latest_alert", params, await run_load(
+                lambda i: repo.get_latest_alert(str(SYMBOLS[i % len(SYMBOLS)])), queries)))
+
+            results.append(BenchmarkResult("sqlite.query_symbol_page", params, await run_load(
+                lambda i: repo.query_alerts(AlertQuery(symbol=str(SYMBOLS[i % len(SYMBOLS)]), limit=100)),
+                queries, concurrency=repo.reader_pool_size)))
+
+            windows = rng.integers(0, max(rows - 3600, 1), queries)
+            results.append(BenchmarkResult("sqlite.query_time_range", params, await run_load(
+                lambda i: repo.query_alerts(AlertQuery(since=from_epoch_ns(START_NS + int(windows[i]) * STEP_NS),
+                                                       until=from_epoch_ns(START_NS + int(windows[i] + 3600) * STEP_NS),
+                                                       limit=500)),
+                queries, concurrency=repo.reader_pool_size)))
+
+            async def walk_pages(i):
+                query = AlertQuery(limit=100)
+                for _ in range(20):
+                    page = await repo.query_alerts(query)
+                    if page.next_cursor is None:
+                        break
+                    query = AlertQuery(limit=100, after=page.next_cursor)
+            results.append(BenchmarkResult("sqlite.paginate_20_pages", params,
+                                           await run_load(walk_pages, max(queries // 20, 1))))
+        finally:
+            await repo.close()
+    return results
+
+async def run(rows=(10_000, 1_000_000, 10_000_000), quick: bool = False, db_dir: str | None = None) -> list[BenchmarkResult]:
+    results = []
+    for count in rows:
+        results.extend(await bench_sqlite(count, queries=100 if quick else 1000, db_dir=db_dir))
+    return results
@@ -0,0 +1,166 @@
+import math
+from array import array
+import numpy as np
+
+# Column positions in SymbolIndicators.values
+PRICE, SMA, EMA, RSI, VWAP, VOLATILITY, COUNT = range(7)
+INDICATOR_NAMES = ("price", "sma", "ema", "rsi", "vwap", "volatility", "count")
+
+class SymbolIndicators:
+    """
+    Rolling indicators for one symbol, updated in O(1) per trade.
+
+    Prices, sizes and log returns live in fixed-size array-backed ring buffers, so
+    memory per symbol is bounded by the window. Window sums are maintained
+    incrementally (and re-summed from the buffers every resync_every updates to shed
+    floating-point drift). Current values are kept in the `values` NumPy array, which
+    strategies can read directly without copying; a value is NaN until enough trades
+    have been seen to compute it.
+    """
+    def __init__(self, window: int = 20, ema_span: int | None = None, rsi_period: int = 14,
+                 resync_every: int = 10000):
+        if window < 2 or rsi_period < 1:
+            raise ValueError("window must be at least 2 and rsi_period at least 1.")
+        self.window = window
+        self.rsi_period = rsi_period
+        self.resync_every = resync_every
+        self._alpha = 2.0 / ((ema_span or window) + 1)
+        self._prices = array("d", bytes(8 * window))
+        self._sizes = array("d", bytes(8 * window))
+        self._returns = array("d", bytes(8 * window))
+        self._pos = 0
+        self._filled = 0
+        self._returns_filled = 0
+        self._sum_price = 0.0
+        self._sum_pv = 0.0
+        self._sum_size = 0.0
+        self._sum_ret = 0.0
+        self._sum_ret2 = 0.0
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+        self._last_price = math.nan
+        self.last_timestamp = 0
+        self.values = np.full(len(INDICATOR_NAMES), np.nan)
+        self.values[COUNT] = 0
+
+    def update(self, price: float, size: float = 0.0, timestamp: int = 0) -> bool:
+        """
+        Folds one trade into the indicators. A trade whose timestamp is not newer than
+        the last one seen (e.g. the same latest trade polled twice) is ignored.
+        Returns True if the indicators changed.
+        """
+        if timestamp and timestamp <= self.last_timestamp:
+            return False
+        if timestamp:
+            self.last_timestamp = timestamp
+        values = self.values
+        count = int(values[COUNT]) + 1
+        pos = self._pos
+        window = self.window
+
+        # Price/size ring: SMA and VWAP window sums.
+        if self._filled == window:
+            old_price, old_size = self._prices[pos], self._sizes[pos]
+            self._sum_price -= old_price
+            self._sum_pv -= old_price * old_size
+            self._sum_size -= old_size
+        else:
+            self._filled += 1
+        self._prices[pos] = price
+        self._sizes[pos] = size
+        self._sum_price += price
+        self._sum_pv += price * size
+        self._sum_size += size
+
+        previous = self._last_price
+        if not math.isnan(previous) and previous > 0 and price > 0:
+            # Log-return ring for volatility; shares the write position with the price ring.
+            ret = math.log(price / previous)
+            if self._returns_filled == window:
+                old_ret = self._returns[pos]
+                self._sum_ret -= old_ret
+                self._sum_ret2 -= old_ret * old_ret
+            else:
+                self._returns_filled += 1
+            self._returns[pos] = ret
+            self._sum_ret += ret
+            self._sum_ret2 += ret * ret
+
+            # Wilder's RSI: simple average over the first period changes, then smoothing.
+            change = price - previous
+            gain, loss = (change, 0.0) if change > 0 else (0.0, -change)
+            changes = count - 1
+            period = self.rsi_period
+            if changes <= period:
+                self._avg_gain += (gain - self._avg_gain) / changes
+                self._avg_loss += (loss - self._avg_loss) / changes
+            else:
+                self._avg_gain = (self._avg_gain * (period - 1) + gain) / period
+                self._avg_loss = (self._avg_loss * (period - 1) + loss) / period
+            if changes >= period:
+                values[RSI] = 100.0 if self._avg_loss == 0 else 100.0 - 100.0 / (1.0 + self._avg_gain / self._avg_loss)
+        self._last_price = price
+        self._pos = (pos + 1) % window
+
+        if count % self.resync_every == 0:
+            self._resync()
+
+        values[PRICE] = price
+        values[COUNT] = count
+        values[EMA] = price if count == 1 else values[EMA] + self._alpha * (price - values[EMA])
+        if self._filled == window:
+            values[SMA] = self._sum_price / window
+            values[VWAP] = self._sum_pv / self._sum_size if self._sum_size > 0 else values[SMA]
+        if self._returns_filled >= 2:
+            n = self._returns_filled
+            variance = (self._sum_ret2 - self._sum_ret * self._sum_ret / n) / (n - 1)
+            values[VOLATILITY] = math.sqrt(variance) if variance > 0 else 0.0
+        return True
+
+    def _resync(self):
+        # Unused slots are zero, so summing whole buffers is exact.
+        self._sum_price = math.fsum(self._prices)
+        self._sum_pv = math.fsum(p * s for p, s in zip(self._prices, self._sizes))
+        self._sum_size = math.fsum(self._sizes)
+        self._sum_ret = math.fsum(self._returns)
+        self._sum_ret2 = math.fsum(r * r for r in self._returns)
+
+    @property
+    def count(self) -> int:
+        return int(self.values[COUNT])
+
+    @property
+    def is_warm(self) -> bool:
+        """True once the window is full, i.e. SMA and VWAP are defined."""
+        return self._filled == self.window
+
+    def __getattr__(self, name):
+        # Named read access, e.g. indicators.sma or indicators.rsi
+        try:
+            return float(self.__dict__["values"][INDICATOR_NAMES.index(name)])
+        except (KeyError, ValueError):
+            raise AttributeError(name) from None
+
+class IndicatorEngine:
+    """Keeps a SymbolIndicators per symbol, created on first trade."""
+    def __init__(self, window: int = 20, ema_span: int | None = None, rsi_period: int = 14):
+        self.window = window
+        self.ema_span = ema_span
+        self.rsi_period = rsi_period
+        self._symbols: dict[str, SymbolIndicators] = {}
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._symbols
+
+    def get(self, symbol: str) -> SymbolIndicators | None:
+        return self._symbols.get(symbol)
+
+    def update(self, symbol: str, price: float, size: float = 0.0, timestamp: int = 0) -> SymbolIndicators:
+        indicators = self._symbols.get(symbol)
+        if indicators is None:
+            indicators = self._symbols[symbol] = SymbolIndicators(self.window, self.ema_span, self.rsi_period)
+        indicators.update(price, size, timestamp)
+        return indicators
@@ -1,5 +1,28 @@
+import sys
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from enum import StrEnum
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+class Action(StrEnum):
+    """Trading actions. Members compare equal to their string values ('buy' == Action.BUY)."""
+    HOLD = "hold"
+    BUY = "buy"
+    SELL = "sell"
+
+    @property
+    def code(self) -> int:
+        """Small integer code used by columnar storage."""
+        return _ACTION_CODES[self]
+
+    @classmethod
+    def from_code(cls, code: int) -> "Action":
+        return ACTIONS[code]
+
+# Index = Action.code; append new actions at the end so stored codes stay valid.
+ACTIONS = (Action.HOLD, Action.BUY, Action.SELL)
+_ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
 
 @dataclass
 class Alert:
@@ -7,3 +30,36 @@ class Alert:
     symbol: str
     action: str  # 'buy', 'sell', etc.
     confidence: float
+
+@dataclass(frozen=True, slots=True)
+class CompactAlert:
+    """
+    Memory-lean, immutable alert: no per-instance dict, an integer-nanosecond UTC
+    timestamp instead of a datetime, an Action member instead of a free-form string and
+    an interned symbol. Converts to and from Alert without loss (timestamps keep
+    Alert's microsecond precision; naive datetimes are read as UTC and come back aware).
+    """
+    timestamp_ns: int
+    symbol: str
+    action: Action
+    confidence: float
+
+    @property
+    def timestamp(self) -> datetime:
+        return from_epoch_ns(self.timestamp_ns)
+
+    @classmethod
+    def from_alert(cls, alert: Alert) -> "CompactAlert":
+        return cls(to_epoch_ns(alert.timestamp), sys.intern(alert.symbol), Action(alert.action), float(alert.confidence))
+
+    def to_alert(self) -> Alert:
+        return Alert(from_epoch_ns(self.timestamp_ns), self.symbol, self.action.value, self.confidence)
+
+def to_epoch_ns(ts: datetime) -> int:
+    """Converts a datetime to integer nanoseconds since the Unix epoch. Naive datetimes are taken as UTC."""
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return (ts - _EPOCH) // timedelta(microseconds=1) * 1000
+
+def from_epoch_ns(ns: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=ns // 1000)
@@ -0,0 +1,111 @@
+from array import array
+from typing import Iterable, Iterator, Sequence
+import numpy as np
+from Ngunguruhoe.domain.models.alert import ACTIONS, Action, Alert, CompactAlert, from_epoch_ns, to_epoch_ns
+
+class AlertBatch:
+    """
+    Columnar collection of alerts for bulk paths (repositories, the web layer, backtests).
+
+    Each field is a typed array.array column, so a batch costs a few bytes per alert and
+    no per-row objects: int64 nanosecond timestamps, uint32 indexes into a per-batch symbol
+    dictionary, uint8 Action codes and float64 confidences. Rows can still be read as
+    Alert or CompactAlert, and to_numpy() exposes the columns as zero-copy NumPy views.
+    """
+    __slots__ = ("timestamp_ns", "symbol_ids", "action_codes", "confidence", "symbols", "_symbol_index")
+
+    def __init__(self):
+        self.timestamp_ns = array("q")
+        self.symbol_ids = array("I")
+        self.action_codes = array("B")
+        self.confidence = array("d")
+        self.symbols: list[str] = []
+        self._symbol_index: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.timestamp_ns)
+
+    def _symbol_id(self, symbol: str) -> int:
+        symbol_id = self._symbol_index.get(symbol)
+        if symbol_id is None:
+            symbol_id = self._symbol_index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return symbol_id
+
+    def append(self, timestamp_ns: int, symbol: str, action: str, confidence: float):
+        self.action_codes.append(Action(action).code) # validate before touching the other columns
+        self.timestamp_ns.append(timestamp_ns)
+        self.symbol_ids.append(self._symbol_id(symbol))
+        self.confidence.append(confidence)
+
+    def append_alert(self, alert: Alert | CompactAlert):
+        timestamp_ns = alert.timestamp_ns if isinstance(alert, CompactAlert) else to_epoch_ns(alert.timestamp)
+        self.append(timestamp_ns, alert.symbol, alert.action, alert.confidence)
+
+    def extend(self, other: "AlertBatch"):
+        remap = array("I", (self._symbol_id(symbol) for symbol in other.symbols))
+        self.timestamp_ns.extend(other.timestamp_ns)
+        self.symbol_ids.extend(remap[i] for i in other.symbol_ids)
+        self.action_codes.extend(other.action_codes)
+        self.confidence.extend(other.confidence)
+
+    @classmethod
+    def from_alerts(cls, alerts: Iterable[Alert | CompactAlert]) -> "AlertBatch":
+        batch = cls()
+        for alert in alerts:
+            batch.append_alert(alert)
+        return batch
+
+    @classmethod
+    def from_columns(cls, timestamp_ns, symbols: Sequence[str], actions: Sequence[str], confidence) -> "AlertBatch":
+        """Builds a batch from aligned column sequences (lists or NumPy arrays) in one pass per column."""
+        batch = cls()
+        n = len(symbols)
+        timestamp_ns = np.broadcast_to(np.asarray(timestamp_ns, dtype=np.int64), (n,))
+        batch.timestamp_ns.frombytes(np.ascontiguousarray(timestamp_ns).tobytes())
+        batch.symbol_ids.extend(batch._symbol_id(str(symbol)) for symbol in symbols)
+        batch.action_codes.extend(Action(str(action)).code for action in actions)
+        batch.confidence.frombytes(np.ascontiguousarray(confidence, dtype=np.float64).tobytes())
+        if not len(batch.action_codes) == len(batch.confidence) == len(batch.timestamp_ns) == n:
+            raise ValueError("AlertBatch columns must all have the same length.")
+        return batch
+
+    def symbol_at(self, i: int) -> str:
+        return self.symbols[self.symbol_ids[i]]
+
+    def action_at(self, i: int) -> Action:
+        return ACTIONS[self.action_codes[i]]
+
+    def compact(self, i: int) -> CompactAlert:
+        return CompactAlert(self.timestamp_ns[i], self.symbol_at(i), self.action_at(i), self.confidence[i])
+
+    def __getitem__(self, i: int) -> Alert:
+        return Alert(from_epoch_ns(self.timestamp_ns[i]), self.symbol_at(i), self.action_at(i).value, self.confidence[i])
+
+    def __iter__(self) -> Iterator[Alert]:
+        return (self[i] for i in range(len(self)))
+
+    def to_alerts(self) -> list[Alert]:
+        return list(self)
+
+    def rows(self) -> Iterator[tuple[int, str, str, float]]:
+        """(timestamp_ns, symbol, action, confidence) tuples, e.g. for executemany."""
+        symbols = self.symbols
+        return zip(self.timestamp_ns, (symbols[i] for i in self.symbol_ids),
+                   (ACTIONS[code].value for code in self.action_codes), self.confidence)
+
+    def to_numpy(self) -> dict[str, np.ndarray]:
+        """Zero-copy NumPy views of the columns; appending to the batch invalidates them."""
+        return {
+            "timestamp_ns": np.frombuffer(self.timestamp_ns, dtype=np.int64),
+            "symbol_id": np.frombuffer(self.symbol_ids, dtype=np.uint32),
+            "action_code": np.frombuffer(self.action_codes, dtype=np.uint8),
+            "confidence": np.frombuffer(self.confidence, dtype=np.float64),
+        }
+
+    def action_counts(self) -> dict[str, int]:
+        counts = np.bincount(np.frombuffer(self.action_codes, dtype=np.uint8), minlength=len(ACTIONS))
+        return {action.value: int(count) for action, count in zip(ACTIONS, counts) if count}
+
+    def __repr__(self) -> str:
+        return f"AlertBatch({len(self)} alerts, {len(self.symbols)} symbols)"
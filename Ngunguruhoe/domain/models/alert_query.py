@@ -0,0 +1,75 @@
+import base64
+import struct
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import NamedTuple
+from Ngunguruhoe.domain.models.alert import Alert, to_epoch_ns
+from Ngunguruhoe.domain.models.alert_batch import AlertBatch
+
+class AlertCursor(NamedTuple):
+    """Keyset position: the (timestamp, id) of the last alert on the previous page."""
+    timestamp_ns: int
+    id: int
+
+    def encode(self) -> str:
+        return base64.urlsafe_b64encode(struct.pack(">qq", self.timestamp_ns, self.id)).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> "AlertCursor":
+        """Parses a token produced by encode(); raises ValueError if it is malformed."""
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            return cls(*struct.unpack(">qq", raw))
+        except (ValueError, struct.error) as e:
+            raise ValueError(f"Invalid cursor: {token!r}") from e
+
+@dataclass(frozen=True)
+class AlertQuery:
+    """
+    Filters for a page of alerts, newest first. since is inclusive and until exclusive;
+    after continues from the cursor of a previous page.
+    """
+    symbol: str | None = None
+    action: str | None = None
+    since: datetime | None = None
+    until: datetime | None = None
+    min_confidence: float | None = None
+    limit: int = 100
+    after: AlertCursor | None = None
+
+    def matches(self, alert_id: int, alert: Alert) -> bool:
+        """Reference filter for repositories that scan alerts in memory."""
+        if self.symbol is not None and alert.symbol != self.symbol:
+            return False
+        if self.action is not None and alert.action != self.action:
+            return False
+        if self.min_confidence is not None and alert.confidence < self.min_confidence:
+            return False
+        ts = to_epoch_ns(alert.timestamp)
+        if self.since is not None and ts < to_epoch_ns(self.since):
+            return False
+        if self.until is not None and ts >= to_epoch_ns(self.until):
+            return False
+        return self.after is None or (ts, alert_id) < self.after
+
+@dataclass
+class AlertPage:
+    batch: AlertBatch = field(default_factory=AlertBatch)
+    next_cursor: AlertCursor | None = None
+
+    @property
+    def alerts(self) -> list[Alert]:
+        return self.batch.to_alerts()
+
+def page_from_scan(query: AlertQuery, alerts_with_ids) -> AlertPage:
+    """Builds a page from (id, alert) pairs held in memory: filters, orders newest first and slices."""
+    matching = sorted(
+        ((to_epoch_ns(alert.timestamp), alert_id, alert) for alert_id, alert in alerts_with_ids
+         if query.matches(alert_id, alert)),
+        key=lambda item: item[:2],
+        reverse=True,
+    )
+    page = matching[:query.limit]
+    has_more = len(matching) > query.limit
+    next_cursor = AlertCursor(page[-1][0], page[-1][1]) if has_more else None
+    return AlertPage(AlertBatch.from_alerts(alert for _, _, alert in page), next_cursor)
@@ -0,0 +1,35 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from Ngunguruhoe.domain.models.alert import from_epoch_ns
+
+@dataclass(frozen=True)
+class AlertRollup:
+    """
+    Aggregate of one symbol's alerts over one interval bucket, kept after the alerts
+    themselves have expired. Sums rather than ratios are stored so buckets can be merged.
+    """
+    symbol: str
+    bucket_start_ns: int
+    interval_seconds: int
+    alerts: int
+    buys: int
+    sells: int
+    confidence_sum: float
+
+    @property
+    def bucket_start(self) -> datetime:
+        return from_epoch_ns(self.bucket_start_ns)
+
+    @property
+    def bucket_end(self) -> datetime:
+        return self.bucket_start + timedelta(seconds=self.interval_seconds)
+
+    @property
+    def buy_ratio(self) -> float:
+        """Buys as a fraction of buy and sell alerts (0.5 when there were neither)."""
+        decided = self.buys + self.sells
+        return self.buys / decided if decided else 0.5
+
+    @property
+    def mean_confidence(self) -> float:
+        return self.confidence_sum / self.alerts if self.alerts else 0.0
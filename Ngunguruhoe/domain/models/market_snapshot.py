@@ -0,0 +1,99 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Iterable, Mapping, NamedTuple
+import numpy as np
+
+class SnapshotRow(NamedTuple):
+    """
+    One symbol's row of a MarketSnapshot. Attribute names mirror Alpaca's trade entity
+    (S=symbol, p=price, s=size, t=timestamp in epoch ns), so per-item strategies that
+    read market_data.p keep working when handed a row.
+    """
+    S: str
+    p: float
+    s: float
+    t: int
+
+def timestamp_to_ns(value: Any) -> int:
+    """Best-effort conversion of a trade timestamp (pandas Timestamp, datetime, ISO string or int) to epoch ns."""
+    if value is None:
+        return 0
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if hasattr(value, "value") and isinstance(value.value, (int, np.integer)): # pandas.Timestamp
+        return int(value.value)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp()) * 1_000_000_000 + value.microsecond * 1000
+    if isinstance(value, str):
+        text = value.strip()
+        if text.endswith("Z"):
+            text = text[:-1]
+        elif text.endswith("+00:00"):
+            text = text[:-6]
+        try:
+            return int(np.datetime64(text, "ns").astype(np.int64))
+        except ValueError:
+            return 0
+    return 0
+
+@dataclass
+class MarketSnapshot:
+    """
+    Columnar view of the latest market data for many symbols.
+    A NaN price marks a symbol for which no market data was available.
+    """
+    symbol: np.ndarray    # str
+    price: np.ndarray     # float64
+    size: np.ndarray      # float64
+    timestamp: np.ndarray # int64, epoch nanoseconds (0 if unknown)
+
+    def __len__(self) -> int:
+        return len(self.symbol)
+
+    def row(self, i: int) -> SnapshotRow | None:
+        """Returns row i, or None if the symbol has no market data."""
+        price = self.price[i]
+        if np.isnan(price):
+            return None
+        return SnapshotRow(str(self.symbol[i]), float(price), float(self.size[i]), int(self.timestamp[i]))
+
+    @classmethod
+    def from_columns(cls, symbol: Iterable[str], price: Iterable[float],
+                     size: Iterable[float] | None = None, timestamp: Iterable[int] | None = None) -> "MarketSnapshot":
+        symbol = np.asarray(list(symbol), dtype=str)
+        price = np.asarray(price, dtype=np.float64)
+        n = len(symbol)
+        size = np.zeros(n) if size is None else np.asarray(size, dtype=np.float64)
+        timestamp = np.zeros(n, dtype=np.int64) if timestamp is None else np.asarray(timestamp, dtype=np.int64)
+        return cls(symbol, price, size, timestamp)
+
+    @classmethod
+    def from_trades(cls, symbols: Iterable[str], trades: Mapping[str, Any]) -> "MarketSnapshot":
+        """
+        Builds a snapshot from {symbol: trade} as returned by AlpacaAdapter.get_latest_trades.
+        Symbols missing from trades, or whose trade has no price, get a NaN price.
+        """
+        symbols = list(symbols)
+        n = len(symbols)
+        price = np.full(n, np.nan)
+        size = np.zeros(n)
+        timestamp = np.zeros(n, dtype=np.int64)
+        for i, symbol in enumerate(symbols):
+            trade = trades.get(symbol)
+            trade_price = getattr(trade, "p", None) if trade is not None else None
+            if trade_price is None:
+                continue
+            price[i] = trade_price
+            trade_size = getattr(trade, "s", 0)
+            # Older trade entities use 's' for the symbol rather than the size.
+            size[i] = trade_size if isinstance(trade_size, (int, float)) else 0
+            timestamp[i] = timestamp_to_ns(getattr(trade, "t", None))
+        return cls(np.asarray(symbols, dtype=str), price, size, timestamp)
+
+    @classmethod
+    def from_market_data(cls, market_data: Any, symbol: str | None = None) -> "MarketSnapshot":
+        """Builds a one-row snapshot from a single trade-like object (anything with a 'p' price)."""
+        symbol = symbol or getattr(market_data, "S", None) or getattr(market_data, "symbol", None) or ""
+        return cls.from_trades([symbol], {symbol: market_data} if market_data else {})
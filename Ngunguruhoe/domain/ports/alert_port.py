@@ -1,11 +1,31 @@
 from abc import ABC, abstractmethod
 from Ngunguruhoe.domain.models.alert import Alert
+from Ngunguruhoe.domain.models.alert_batch import AlertBatch
+from Ngunguruhoe.domain.models.alert_query import AlertPage, AlertQuery
 
 class AlertPort(ABC):
+    # False for repositories that do not keep alerts they can read back (query_alerts
+    # then returns empty pages).
+    queryable: bool = True
+
     @abstractmethod
     async def save_alert(self, alert: Alert):
         pass
 
     @abstractmethod
-    async def get_latest_alert(self) -> Alert:
+    async def get_latest_alert(self, symbol: str | None = None) -> Alert | None:
+        """Returns the most recent alert, optionally restricted to one symbol."""
+        pass
+
+    async def save_alerts(self, batch: AlertBatch):
+        """Stores every alert in a columnar batch. Repositories with a bulk path should override this."""
+        for alert in batch:
+            await self.save_alert(alert)
+
+    @abstractmethod
+    async def query_alerts(self, query: AlertQuery) -> AlertPage:
+        """
+        Returns one page of alerts matching query, newest first, with a cursor for the
+        next page when more remain.
+        """
         pass
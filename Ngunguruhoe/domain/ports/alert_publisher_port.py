@@ -0,0 +1,11 @@
+from abc import ABC, abstractmethod
+from Ngunguruhoe.domain.models.alert import Alert
+
+class AlertPublisherPort(ABC):
+    @abstractmethod
+    async def publish(self, alert: Alert):
+        """
+        Pushes a stored alert to live subscribers. Must not wait on slow subscribers,
+        since it runs on the alert-generation path.
+        """
+        pass
@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
 from typing import Any, Tuple
+import numpy as np
+from Ngunguruhoe.domain.models.market_snapshot import MarketSnapshot
 
 class StrategyPort(ABC):
     @abstractmethod
@@ -16,3 +18,26 @@ class StrategyPort(ABC):
             and confidence (float, e.g., 0.0 to 1.0).
         """
         pass
+
+    async def decide_actions(self, snapshot: MarketSnapshot) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Decides trading actions for every symbol in a columnar market snapshot.
+
+        Args:
+            snapshot: MarketSnapshot with one row per symbol. Rows with a NaN price
+                      have no market data.
+
+        Returns:
+            A tuple of two arrays aligned with the snapshot rows: actions (str) and
+            confidences (float64).
+
+        The default implementation calls decide_action once per row (passing None for
+        rows without data), so per-item strategies work unchanged. Strategies that can
+        evaluate many symbols at once should override it.
+        """
+        n = len(snapshot)
+        actions = np.empty(n, dtype=object)
+        confidences = np.empty(n, dtype=np.float64)
+        for i in range(n):
+            actions[i], confidences[i] = await self.decide_action(snapshot.row(i))
+        return actions.astype(str), confidences
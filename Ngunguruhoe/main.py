@@ -1,85 +1,353 @@
 import asyncio
+import logging
 import os
-from Ngunguruhoe.adapters.alert_repo_sqlite import SQLiteAlertRepository
+import signal
+from Ngunguruhoe.adapters.alert_repo_mmap import MmapAlertRepository
+from Ngunguruhoe.adapters.alert_repo_queue import QueueAlertRepository
+from Ngunguruhoe.adapters.alert_repo_sqlite import RetentionPolicy, SQLiteAlertRepository
 from Ngunguruhoe.adapters.webserver_fastapi import create_app
+from Ngunguruhoe.adapters.alert_broadcaster import AlertBroadcaster
+from Ngunguruhoe.application.metrics import EventLoopLagMonitor, MetricsRegistry, PipelineMetrics
+from Ngunguruhoe.application.readiness import Readiness
+from Ngunguruhoe.application.structured_logging import LoggingPipeline, parse_sample_rates
 from Ngunguruhoe.application.services.alert_service import AlertService, SimpleMarketTrendStrategy # Import strategy
+from Ngunguruhoe.application.services.alert_stats import AlertStats
+from Ngunguruhoe.application.services.alert_suppressor import AlertSuppressor
+from Ngunguruhoe.application.services.poll_scheduler import AdaptiveIntervals, PollScheduler, parse_symbol_config
+from Ngunguruhoe.application.services.request_budget import RequestBudget
+from Ngunguruhoe.application.services.shard_supervisor import ShardSupervisor
+from Ngunguruhoe.application.services.stream_ingestor import StreamIngestor
 from Ngunguruhoe.adapters.alpaca_adapter import AlpacaAdapter
+from Ngunguruhoe.adapters.cached_market_data import CachedMarketDataProvider
+from Ngunguruhoe.adapters.process_pool_strategy import ProcessPoolStrategy
+from Ngunguruhoe.domain.ports.alert_port import AlertPort
+from Ngunguruhoe.domain.ports.strategy_port import StrategyPort
 import uvicorn
 
+logger = logging.getLogger(__name__)
+
 # It's good practice to load environment variables early, e.g. using dotenv for local dev,
 # but AlpacaAdapter reads them directly via os.getenv, which is fine.
 # from dotenv import load_dotenv
 # load_dotenv() # Load .env file if you use one for local development
 
+def start_logging() -> LoggingPipeline:
+    # Log records go through a queue to a writer thread as JSON lines, so logging never blocks the loop.
+    # LOG_SAMPLE_RATES="DEBUG=0.1" keeps a fraction of a level; LOG_SYMBOL_RATE caps records/s per symbol.
+    symbol_rate = os.getenv("LOG_SYMBOL_RATE")
+    log_pipeline = LoggingPipeline(
+        level=os.getenv("LOG_LEVEL", "INFO"),
+        sample_rates=parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", "")),
+        per_symbol_rate=float(symbol_rate) if symbol_rate else None,
+        queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+    )
+    log_pipeline.start()
+    return log_pipeline
+
 async def main():
-    print("Application starting...")
+    log_pipeline = start_logging()
+    try:
+        await run(log_pipeline)
+    except ValueError as ve:
+        # AlpacaAdapter raises ValueError if keys are missing; connection errors are retried in the background.
+        logger.critical("Configuration Error: %s", ve)
+    except Exception as e:
+        logger.critical("Unhandled application error: %s", e, exc_info=True)
+    finally:
+        # Stopped last, so a fatal error is still written as a JSON line by the pipeline.
+        log_pipeline.stop()
+
+def build_alert_repository():
+    """ALERT_BACKEND picks where alerts are stored: "sqlite" (default) or "mmap", an append-only log."""
+    backend = os.getenv("ALERT_BACKEND", "sqlite").lower()
+    if backend == "mmap":
+        log_dir = os.getenv("ALERT_LOG_DIR", "alert_log")
+        logger.info("Initializing alert log at: %s", log_dir)
+        if os.getenv("ALERT_RETENTION_DAYS"):
+            logger.warning("ALERT_RETENTION_DAYS only applies to the sqlite backend; the alert log keeps every alert.")
+        segment_seconds = os.getenv("ALERT_LOG_SEGMENT_SECONDS")
+        # ALERT_LOG_FSYNC_INTERVAL: seconds between fsyncs, 0 to fsync every write, "none" to leave it to the OS.
+        fsync_interval = os.getenv("ALERT_LOG_FSYNC_INTERVAL", "1")
+        return MmapAlertRepository(
+            log_dir=log_dir,
+            segment_records=int(os.getenv("ALERT_LOG_SEGMENT_RECORDS", str(1 << 20))),
+            segment_seconds=float(segment_seconds) if segment_seconds else None,
+            fsync_interval=None if fsync_interval.lower() in ("", "none") else float(fsync_interval),
+            index_interval=int(os.getenv("ALERT_LOG_INDEX_INTERVAL", "1024")),
+        )
+    if backend != "sqlite":
+        raise ValueError(f"Unknown ALERT_BACKEND {backend!r}; expected 'sqlite' or 'mmap'.")
+
+    db_path = os.getenv("ALERT_DB_PATH", "alerts.db")
+    logger.info("Initializing database at: %s", db_path)
+    # ALERT_RETENTION_DAYS enables retention: older days are rolled up, archived and dropped.
+    retention = None
+    if os.getenv("ALERT_RETENTION_DAYS"):
+        retention = RetentionPolicy(
+            hot_days=int(os.getenv("ALERT_RETENTION_DAYS")),
+            rollup_intervals=tuple(int(s) for s in os.getenv("ALERT_ROLLUP_INTERVALS", "3600,86400").split(",")),
+            archive_dir=os.getenv("ALERT_ARCHIVE_DIR", "alert_archive") or None,
+            interval=float(os.getenv("ALERT_RETENTION_INTERVAL", "3600")),
+        )
+    return SQLiteAlertRepository(
+        db_path=db_path,
+        batch_size=int(os.getenv("ALERT_DB_BATCH_SIZE", "500")),
+        flush_interval=float(os.getenv("ALERT_DB_FLUSH_INTERVAL", "0.05")),
+        synchronous=os.getenv("ALERT_DB_SYNCHRONOUS", "NORMAL"),
+        reader_pool_size=int(os.getenv("ALERT_DB_READERS", "2")),
+        retention=retention,
+    )
+
+def build_strategy(workers: int = 0) -> StrategyPort:
+    """The trading strategy; with workers > 0 it runs in that many worker processes, off the event loop."""
+    logger.info("Initializing strategy...")
+    if workers > 0:
+        strategy = ProcessPoolStrategy(SimpleMarketTrendStrategy, workers,
+                                       timeout=float(os.getenv("STRATEGY_TIMEOUT", "5")))
+    else:
+        strategy = SimpleMarketTrendStrategy()
+    logger.info("Strategy initialized.")
+    return strategy
+
+def build_service(alpaca_adapter: AlpacaAdapter, alert_repo, publisher=None, metrics: PipelineMetrics | None = None,
+                  strategy: StrategyPort | None = None, alert_stats: AlertStats | None = None) -> AlertService:
+    """AlertService over the (optionally cached) Alpaca adapter, with the configured suppression stage."""
+    if strategy is None:
+        strategy = build_strategy()
+
+    logger.info("Initializing AlertService...")
+    # Cache latest trades briefly so concurrent lookups for a symbol share one REST call.
+    market_data_provider = alpaca_adapter
+    cache_ttl = float(os.getenv("MARKET_DATA_CACHE_TTL", "1.0"))
+    if cache_ttl > 0:
+        market_data_provider = CachedMarketDataProvider(
+            alpaca_adapter,
+            ttl=cache_ttl,
+            max_size=int(os.getenv("MARKET_DATA_CACHE_SIZE", "10000")),
+        )
+    # Repeated or debounced decisions are dropped before storage (ALERT_DEDUPE=false keeps every one).
+    suppressor = None
+    min_delta = os.getenv("ALERT_MIN_CONFIDENCE_DELTA")
+    if os.getenv("ALERT_DEDUPE", "true").lower() == "true":
+        suppressor = AlertSuppressor(
+            min_confidence_delta=float(min_delta) if min_delta else None,
+            cooldown=float(os.getenv("ALERT_COOLDOWN_SECONDS", "0")),
+        )
+    service = AlertService(alert_repo=alert_repo, market_data_provider=market_data_provider, strategy=strategy,
+                           publisher=publisher, metrics=metrics, suppressor=suppressor, alert_stats=alert_stats)
+    logger.info("AlertService initialized.")
+    return service
+
+def price_move(strategy):
+    """Recent relative price move per symbol (per-trade volatility) from the strategy's indicators, if it keeps any."""
+    indicators = getattr(strategy, "indicators", None)
+    if indicators is None:
+        return None
+    def move(symbol: str) -> float | None:
+        symbol_indicators = indicators.get(symbol)
+        return symbol_indicators.volatility if symbol_indicators is not None else None
+    return move
+
+def ingestion_jobs(service: AlertService, trading_symbols: dict[str, float], default_interval: float,
+                   budget: RequestBudget | None = None) -> list:
+    """Coroutines that feed service market data for trading_symbols, per MARKET_DATA_MODE."""
+    # MARKET_DATA_MODE=poll fetches latest trades on a schedule; =stream reacts to pushed ticks.
+    market_data_mode = os.getenv("MARKET_DATA_MODE", "poll").lower()
+    logger.info("Creating background jobs for %s mode...", market_data_mode)
+    if market_data_mode == "stream":
+        # Only stream mode needs the websocket client.
+        from Ngunguruhoe.adapters.alpaca_stream_adapter import AlpacaStreamAdapter, ConflatingTickQueue
+        tick_queue = ConflatingTickQueue()
+        stream_adapter = AlpacaStreamAdapter(
+            trading_symbols,
+            tick_queue,
+            subscribe_quotes=os.getenv("STREAM_QUOTES", "false").lower() == "true",
+        )
+        ingestor = StreamIngestor(service, tick_queue, workers=int(os.getenv("STREAM_WORKERS", "4")))
+        return [stream_adapter.run(), ingestor.run()]
+    # POLL_ADAPTIVE polls active symbols more often and quiet ones less, within the request budget.
+    adaptive = None
+    if os.getenv("POLL_ADAPTIVE", "true").lower() == "true":
+        adaptive = AdaptiveIntervals(
+            min_factor=float(os.getenv("POLL_MIN_INTERVAL_FACTOR", "0.25")),
+            max_factor=float(os.getenv("POLL_MAX_INTERVAL_FACTOR", "4")),
+        )
+    scheduler = PollScheduler(
+        service,
+        trading_symbols,
+        default_interval=default_interval,
+        max_concurrency=int(os.getenv("POLL_MAX_CONCURRENCY", "32")),
+        batch_size=int(os.getenv("POLL_BATCH_SIZE", "50")),
+        adaptive=adaptive,
+        price_move=price_move(service.strategy),
+        budget=budget,
+    )
+    return [scheduler.run()]
+
+def request_budget(share: float = 1.0) -> RequestBudget:
+    """This process's share of the Alpaca request quota (ALPACA_RATE_LIMIT requests per minute)."""
+    return RequestBudget(limit=int(os.getenv("ALPACA_RATE_LIMIT", "200")), share=share)
+
+async def run_ingestion(trading_symbols: dict[str, float], default_interval: float, alert_repo, publisher=None,
+                        metrics: PipelineMetrics | None = None, connected: asyncio.Event | None = None,
+                        budget: RequestBudget | None = None, strategy_workers: int = 0,
+                        alert_stats: AlertStats | None = None):
+    """
+    Connects to Alpaca in the background, then runs the ingestion jobs. The adapter (and
+    with it the Alpaca SDK) is loaded on a worker thread, and the account check retries
+    with backoff up to ALPACA_CONNECT_MAX_DELAY seconds apart, so the API serves meanwhile.
+    strategy_workers > 0 evaluates the strategy in a pool of warm worker processes.
+    alert_stats, if given, is updated with every alert the service stores.
+    """
+    logger.info("Initializing AlpacaAdapter...")
+    try:
+        alpaca_adapter = await asyncio.to_thread(AlpacaAdapter, budget=budget)
+    except Exception as e:
+        logger.critical("Failed to initialize AlpacaAdapter: %s. Market data ingestion will not run.", e)
+        raise
+    logger.info("AlpacaAdapter initialized.")
+    strategy = build_strategy(strategy_workers)
+    try:
+        if isinstance(strategy, ProcessPoolStrategy):
+            if metrics is not None:
+                strategy.bind_metrics(metrics.registry)
+            await strategy.start() # every worker builds its strategy before the first cycle
+        await alpaca_adapter.connect(max_delay=float(os.getenv("ALPACA_CONNECT_MAX_DELAY", "30")))
+        if connected is not None:
+            connected.set()
+        service = build_service(alpaca_adapter, alert_repo, publisher, metrics, strategy, alert_stats)
+        await asyncio.gather(*ingestion_jobs(service, trading_symbols, default_interval, budget))
+    finally:
+        alpaca_adapter.close()
+        if isinstance(strategy, ProcessPoolStrategy):
+            await asyncio.to_thread(strategy.close)
+
+async def run_shard(shard_id: int, trading_symbols: dict[str, float], alert_queue, quota_share: float):
+    """One shard worker: its own Alpaca adapter and AlertService, sending alerts to the supervisor."""
+    logger.info("Shard %d starting for %d symbol(s).", shard_id, len(trading_symbols))
+    default_interval = float(os.getenv("POLL_INTERVAL_SECONDS", "60"))
+    # Every worker draws from the same account quota; the supervisor hands out the shares
+    # for the current worker count, so they still add up after a resize.
+    budget = request_budget(quota_share)
+    jobs = asyncio.ensure_future(run_ingestion(trading_symbols, default_interval,
+                                               QueueAlertRepository(alert_queue, shard_id), budget=budget))
+    # The supervisor stops workers with SIGTERM; finish cleanly so queued alerts are flushed to it.
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, jobs.cancel)
+    try:
+        await jobs
+    except asyncio.CancelledError:
+        pass
+    logger.info("Shard %d finished.", shard_id)
+
+def run_shard_worker(shard_id: int, trading_symbols: dict[str, float], alert_queue, quota_share: float):
+    """Process entry point for ShardSupervisor workers."""
+    log_pipeline = start_logging()
+    try:
+        asyncio.run(run_shard(shard_id, trading_symbols, alert_queue, quota_share))
+    except Exception as e:
+        logger.critical("Shard %d failed: %s", shard_id, e, exc_info=True)
+        raise
+    finally:
+        log_pipeline.stop()
+
+async def run(log_pipeline: LoggingPipeline):
+    logger.info("Application starting...")
     # Ensure API keys are set in environment: ALPACA_API_KEY, ALPACA_SECRET_KEY
     # ALPACA_PAPER can also be set (defaults to True in adapter if not present)
     if not os.getenv("ALPACA_API_KEY") or not os.getenv("ALPACA_SECRET_KEY"):
-        print("CRITICAL: ALPACA_API_KEY or ALPACA_SECRET_KEY environment variables not set.")
-        print("Please set them before running the application.")
+        logger.critical("ALPACA_API_KEY or ALPACA_SECRET_KEY environment variables not set. "
+                        "Please set them before running the application.")
         return # Exit if keys are not set
 
-    db_path = "alerts.db"
-    print(f"Initializing database at: {db_path}")
-    repo = SQLiteAlertRepository(db_path=db_path)
+    repo = build_alert_repository()
     await repo.init_db()
-    print("Database initialized.")
-
+    logger.info("Database initialized.")
     try:
-        print("Initializing AlpacaAdapter...")
-        alpaca_adapter = AlpacaAdapter()
-        print("AlpacaAdapter initialized.")
-    except Exception as e:
-        print(f"Failed to initialize AlpacaAdapter: {e}")
-        print("Application will exit.")
-        return
-
-    print("Initializing strategy...")
-    strategy = SimpleMarketTrendStrategy()
-    print("Strategy initialized.")
-
-    print("Initializing AlertService...")
-    service = AlertService(alert_repo=repo, market_data_provider=alpaca_adapter, strategy=strategy)
-    print("AlertService initialized.")
-
-    # Define the symbol to trade/monitor
-    # This should be a symbol your Alpaca account has access to and is formatted correctly.
-    # e.g., 'AAPL' for Apple stock, 'BTC/USD' or 'BTCUSD' for Bitcoin (check Alpaca's format)
-    trading_symbol = "AAPL"
-    print(f"Trading/monitoring symbol set to: {trading_symbol}")
-
-    async def poll_loop():
-        print("Starting polling loop...")
-        while True:
-            print(f"Polling for {trading_symbol}...") # Removed datetime for simplicity here
-            try:
-                await service.run_strategy_and_store(symbol=trading_symbol)
-            except Exception as e:
-                print(f"Error during polling cycle for {trading_symbol}: {e}")
-            await asyncio.sleep(60) # Poll every 60 seconds
-
-    app = create_app(repo) # FastAPI app still uses the repo for /latest-alert
-    print("FastAPI app created.")
-
-    config = uvicorn.Config(app, host="0.0.0.0", port=8000, loop="asyncio")
+        await serve(repo, log_pipeline)
+    finally:
+        # Also on a startup error, so the database's threads do not keep the process alive.
+        logger.info("Draining pending alert writes...")
+        await repo.close()
+    logger.info("Application finished.")
+
+async def serve(repo: AlertPort, log_pipeline: LoggingPipeline):
+    """Builds the pipeline and API around an open repository and serves until shutdown."""
+    # Sliding-window alert statistics for /alerts/stats, reloaded from the stored alerts.
+    alert_stats = AlertStats(
+        windows=tuple(int(s) for s in os.getenv("ALERT_STATS_WINDOWS", "3600,86400,604800").split(",")))
+    await alert_stats.rebuild(repo)
+
+    # Fans new alerts out to /alerts/stream and /ws/alerts subscribers without database reads.
+    broadcaster = AlertBroadcaster(
+        replay_size=int(os.getenv("ALERT_STREAM_REPLAY", "1000")),
+        max_queue=int(os.getenv("ALERT_STREAM_QUEUE", "256")),
+    )
+    # Stage latencies, per-symbol outcomes and event loop lag, served at /metrics.
+    metrics_registry = MetricsRegistry()
+    log_pipeline.bind_metrics(metrics_registry)
+    lag_monitor = EventLoopLagMonitor(metrics_registry, interval=float(os.getenv("LOOP_LAG_INTERVAL", "0.5")))
+    # /ready reports 503 until the database is open and market data is flowing.
+    readiness = Readiness()
+    readiness.add_check("database", lambda: repo.healthy)
+
+    # Define the symbols to trade/monitor, e.g. TRADING_SYMBOLS="AAPL,MSFT:30,TSLA:15".
+    # Each entry may carry its own poll interval in seconds; the rest use POLL_INTERVAL_SECONDS.
+    # Symbols must be ones your Alpaca account has access to and formatted as Alpaca expects.
+    default_interval = float(os.getenv("POLL_INTERVAL_SECONDS", "60"))
+    trading_symbols = parse_symbol_config(os.getenv("TRADING_SYMBOLS", "AAPL"), default_interval)
+    logger.info("Trading/monitoring %d symbol(s): %s", len(trading_symbols), ", ".join(trading_symbols))
+
+    # SHARD_WORKERS > 0 moves ingestion and strategies into that many worker processes, each owning
+    # a consistent-hash shard of the symbols; this process keeps the database writer, broadcaster and API.
+    shard_workers = int(os.getenv("SHARD_WORKERS", "0"))
+    if shard_workers > 0:
+        supervisor = ShardSupervisor(run_shard_worker, trading_symbols, shard_workers, repo, broadcaster,
+                                     alert_stats=alert_stats,
+                                     restart_delay=float(os.getenv("SHARD_RESTART_DELAY", "1.0")))
+        supervisor.bind_metrics(metrics_registry)
+        readiness.add_check("market_data", lambda: any(stats["alive"] for stats in supervisor.stats()))
+        # SIGUSR1 adds a worker and SIGUSR2 removes one; symbols are rebalanced over the new count.
+        loop = asyncio.get_running_loop()
+        for signum, step in ((signal.SIGUSR1, 1), (signal.SIGUSR2, -1)):
+            loop.add_signal_handler(signum, lambda step=step: asyncio.ensure_future(
+                supervisor.resize(max(1, supervisor.workers + step))))
+        background_jobs = [supervisor.run()]
+    else:
+        connected = asyncio.Event()
+        readiness.add_check("market_data", connected.is_set)
+        budget = request_budget()
+        budget.bind_metrics(metrics_registry)
+        # STRATEGY_WORKERS > 0 moves strategy evaluation into worker processes. Shard workers run
+        # their strategy outside this process already, so it only applies here.
+        background_jobs = [run_ingestion(trading_symbols, default_interval, repo, broadcaster,
+                                         PipelineMetrics(metrics_registry), connected, budget,
+                                         strategy_workers=int(os.getenv("STRATEGY_WORKERS", "0")), alert_stats=alert_stats)]
+    background_jobs.append(lag_monitor.run())
+    readiness.bind_metrics(metrics_registry)
+
+    # repo serves /latest-alert and /alerts; broadcaster the live streams; metrics_registry /metrics;
+    # alert_stats /alerts/stats
+    app = create_app(repo, broadcaster, metrics_registry, readiness, alert_stats)
+    logger.info("FastAPI app created.")
+
+    # Live alert streams never finish on their own, so bound how long shutdown waits for them.
+    config = uvicorn.Config(app, host=os.getenv("API_HOST", "0.0.0.0"), port=int(os.getenv("API_PORT", "8000")), loop="asyncio", timeout_graceful_shutdown=5)
     server = uvicorn.Server(config)
-    print("Uvicorn server configured.")
+    logger.info("Uvicorn server configured.")
 
-    print("Creating background task for polling loop...")
-    asyncio.create_task(poll_loop())
-    print("Polling loop task created.")
+    # Ingestion connects to Alpaca in the background, so the server starts without waiting on it.
+    background_tasks = [asyncio.create_task(job) for job in background_jobs]
+    logger.info("Background tasks created.")
 
-    print("Starting Uvicorn server...")
-    await server.serve()
-    print("Application finished.")
+    try:
+        logger.info("Starting Uvicorn server...")
+        await server.serve()
+    finally:
+        broadcaster.close()
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
 
 if __name__ == "__main__":
-    # Add a try-except block here if main() itself can raise critical startup errors
-    # For AlpacaAdapter, it might raise ValueError if keys are missing or APIError on connection issues.
-    try:
-        asyncio.run(main())
-    except ValueError as ve:
-        print(f"Configuration Error: {ve}")
-    except Exception as e:
-        print(f"Unhandled application error: {e}")
+    # main() logs fatal errors itself, through the logging pipeline, before stopping it.
+    asyncio.run(main())
@@ -1,5 +1,8 @@
+import numpy as np
 import pytest
 from Ngunguruhoe.application.services.alert_service import AlertService, SimpleMarketTrendStrategy
+from Ngunguruhoe.domain.models.market_snapshot import MarketSnapshot
+from Ngunguruhoe.domain.ports.strategy_port import StrategyPort
 from Ngunguruhoe.tests.mocks import MockAlpacaAdapter, MockAlertRepository
 
 # Pytest fixtures (can also be in a conftest.py in tests/e2e or tests/)
@@ -83,3 +86,41 @@ async def test_strategy_handles_market_data_missing_price_attr_via_service(
 
     assert result_alert is None, "Expected no alert returned for data missing price attribute"
     assert len(mock_alert_repo_e2e.alerts_saved) == 0, "Expected no alert saved for data missing price attribute"
+
+@pytest.mark.asyncio
+async def test_batch_strategy_matches_per_item_thresholds(simple_strategy_e2e):
+    snapshot = MarketSnapshot.from_columns(
+        symbol=["A", "B", "C", "D", "E"],
+        price=[150.0, 50.0, 100.01, 100.00, np.nan],
+    )
+
+    actions, confidences = await simple_strategy_e2e.decide_actions(snapshot)
+
+    assert list(actions) == ["buy", "sell", "buy", "sell", "hold"]
+    assert np.all((confidences[:4] >= 0.55) & (confidences[:4] <= 0.75))
+    assert confidences[4] == 0.1
+
+@pytest.mark.asyncio
+async def test_default_batch_adapter_wraps_per_item_strategy():
+    class PerItemStrategy(StrategyPort):
+        async def decide_action(self, market_data):
+            if market_data is None:
+                return "hold", 0.0
+            return ("buy" if market_data.p > 10 else "sell"), 0.9
+
+    snapshot = MarketSnapshot.from_columns(symbol=["X", "Y", "Z"], price=[11.0, 9.0, np.nan])
+
+    actions, confidences = await PerItemStrategy().decide_actions(snapshot)
+
+    assert list(actions) == ["buy", "sell", "hold"]
+    assert list(confidences) == [0.9, 0.9, 0.0]
+
+@pytest.mark.asyncio
+async def test_batch_cycle_via_service(alert_service_e2e, mock_alpaca_adapter_e2e, mock_alert_repo_e2e):
+    for i, price in enumerate([150.0, 50.0, 100.01, 100.00]):
+        mock_alpaca_adapter_e2e.add_trade_data(symbol=f"E2E_BATCH_{i}", price=price)
+
+    alerts = await alert_service_e2e.run_batch_and_store([f"E2E_BATCH_{i}" for i in range(5)])
+
+    assert [a.action for a in alerts] == ["buy", "sell", "buy", "sell"] # E2E_BATCH_4 has no data
+    assert len(mock_alert_repo_e2e.alerts_saved) == 4
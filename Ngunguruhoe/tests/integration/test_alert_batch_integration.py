@@ -0,0 +1,72 @@
+import dataclasses
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pytest
+from Ngunguruhoe.adapters.alert_repo_memory import InMemoryAlertRepository
+from Ngunguruhoe.adapters.alert_repo_sqlite import SQLiteAlertRepository
+from Ngunguruhoe.domain.models.alert import Action, Alert, CompactAlert
+from Ngunguruhoe.domain.models.alert_batch import AlertBatch
+from Ngunguruhoe.domain.models.alert_query import AlertQuery
+
+START = datetime(2024, 1, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+
+def make_alerts(n=6):
+    return [Alert(START + timedelta(seconds=i), ["AAPL", "MSFT"][i % 2], ["buy", "sell"][i % 3 == 0], 0.5 + i / 100)
+            for i in range(n)]
+
+def test_compact_alert_is_slotted_frozen_and_lossless():
+    alert = make_alerts(1)[0]
+    compact = CompactAlert.from_alert(alert)
+
+    assert not hasattr(compact, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        compact.confidence = 1.0
+    assert compact.action is Action.SELL and compact.action == "sell"
+    assert compact.to_alert() == alert
+    assert CompactAlert.from_alert(Alert(START.replace(tzinfo=None), "F", "buy", 0.6)).timestamp == START
+    with pytest.raises(ValueError):
+        CompactAlert.from_alert(Alert(START, "F", "short", 0.6))
+
+def test_batch_round_trips_alerts_through_columns():
+    alerts = make_alerts()
+    batch = AlertBatch.from_alerts(alerts)
+
+    assert len(batch) == 6 and batch.symbols == ["AAPL", "MSFT"]
+    assert batch.to_alerts() == alerts
+    assert batch.compact(1) == CompactAlert.from_alert(alerts[1])
+    assert batch.action_counts() == {"buy": 4, "sell": 2}
+
+    columns = batch.to_numpy()
+    assert columns["timestamp_ns"].dtype == np.int64
+    columns["confidence"][0] = 0.99 # views share memory with the batch
+    assert batch[0].confidence == 0.99
+
+    assert list(batch.rows())[2] == (batch.timestamp_ns[2], "AAPL", "buy", alerts[2].confidence)
+
+def test_batch_from_columns_and_extend_remap_symbols():
+    first = AlertBatch.from_columns(1000, np.array(["MSFT", "F"]), np.array(["buy", "sell"]), np.array([0.6, 0.7]))
+    second = AlertBatch.from_alerts(make_alerts(2))
+
+    second.extend(first)
+
+    assert [a.symbol for a in second] == ["AAPL", "MSFT", "MSFT", "F"]
+    assert second.symbols == ["AAPL", "MSFT", "F"]
+    assert second.timestamp_ns[2:].tolist() == [1000, 1000]
+
+@pytest.mark.asyncio
+async def test_repositories_store_batches(tmp_path):
+    batch = AlertBatch.from_alerts(make_alerts(50))
+    sqlite_repo = SQLiteAlertRepository(db_path=str(tmp_path / "alerts.db"), flush_interval=0.01)
+    await sqlite_repo.init_db()
+    memory_repo = InMemoryAlertRepository(max_alerts=10)
+    try:
+        for repo in (sqlite_repo, memory_repo):
+            await repo.save_alerts(batch)
+        await sqlite_repo.flush() # SQLite caches the latest alert once it is committed
+        for repo in (sqlite_repo, memory_repo):
+            assert await repo.get_latest_alert("AAPL") == batch[48]
+        page = await sqlite_repo.query_alerts(AlertQuery(limit=100))
+        assert page.batch.to_alerts() == batch.to_alerts()[::-1]
+        assert memory_repo.total_saved == 50 and len(memory_repo.alerts) == 10
+    finally:
+        await sqlite_repo.close()
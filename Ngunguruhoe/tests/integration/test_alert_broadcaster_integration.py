@@ -0,0 +1,108 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+import pytest
+from Ngunguruhoe.adapters.alert_broadcaster import AlertBroadcaster
+from Ngunguruhoe.adapters.webserver_fastapi import create_app
+from Ngunguruhoe.application.services.alert_service import AlertService, SimpleMarketTrendStrategy
+from Ngunguruhoe.domain.models.alert import Alert
+from Ngunguruhoe.tests.mocks import MockAlpacaAdapter, MockAlertRepository
+
+def make_alert(symbol="AAPL", confidence=0.6):
+    return Alert(datetime(2024, 1, 1, tzinfo=timezone.utc), symbol, "buy", confidence)
+
+async def drain(subscription, count):
+    return [await asyncio.wait_for(subscription.get(), 1) for _ in range(count)]
+
+@pytest.mark.asyncio
+async def test_alerts_fan_out_to_matching_subscribers():
+    broadcaster = AlertBroadcaster()
+    everything = broadcaster.subscribe()
+    aapl_only = broadcaster.subscribe(symbols=["AAPL"])
+
+    for symbol in ["AAPL", "MSFT", "AAPL"]:
+        await broadcaster.publish(make_alert(symbol))
+
+    assert [e.alert.symbol for e in await drain(everything, 3)] == ["AAPL", "MSFT", "AAPL"]
+    assert [e.id for e in await drain(aapl_only, 2)] == [1, 3]
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_is_evicted_without_blocking_others():
+    broadcaster = AlertBroadcaster(max_queue=2)
+    slow = broadcaster.subscribe()
+    fast = broadcaster.subscribe()
+
+    for i in range(3):
+        await broadcaster.publish(make_alert(confidence=0.5 + i / 10))
+        await fast.get()
+
+    assert slow.evicted and slow.closed
+    assert [event async for event in slow] == [] # stream ends; client reconnects and resumes
+    assert broadcaster.stats()["evicted"] == 1
+    assert len(broadcaster) == 1
+
+@pytest.mark.asyncio
+async def test_resume_from_last_event_id_replays_then_goes_live():
+    broadcaster = AlertBroadcaster(replay_size=3)
+    for i in range(5):
+        await broadcaster.publish(make_alert("AAPL" if i % 2 == 0 else "MSFT"))
+
+    resumed = broadcaster.subscribe(last_event_id=1)
+    await broadcaster.publish(make_alert())
+
+    # Event 2 fell out of the 3-event replay ring.
+    assert [e.id for e in await drain(resumed, 4)] == [3, 4, 5, 6]
+    # The ring now holds 4-6, of which 5 and 6 are AAPL.
+    assert [e.id for e in await drain(broadcaster.subscribe(["AAPL"], last_event_id=0), 2)] == [5, 6]
+
+@pytest.mark.asyncio
+async def test_service_publishes_stored_alerts():
+    broadcaster = AlertBroadcaster()
+    adapter = MockAlpacaAdapter()
+    adapter.set_trade_data(symbol="TESTBUY", price=150.0)
+    service = AlertService(MockAlertRepository(), adapter, SimpleMarketTrendStrategy(), publisher=broadcaster)
+    subscription = broadcaster.subscribe()
+
+    alert = await service.run_strategy_and_store("TESTBUY")
+
+    assert (await subscription.get(timeout=1)).alert is alert
+
+@pytest.mark.asyncio
+async def test_sse_endpoint_streams_events_without_repository_reads():
+    class NoReadRepository(MockAlertRepository):
+        async def get_latest_alert(self, symbol=None):
+            raise AssertionError("stream must not read the repository")
+
+    broadcaster = AlertBroadcaster()
+    app = create_app(NoReadRepository(), broadcaster)
+    chunks, disconnected = [], asyncio.Event()
+
+    async def receive():
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": "/alerts/stream", "raw_path": b"/alerts/stream",
+             "query_string": b"symbols=AAPL", "root_path": "", "headers": [],
+             "client": ("127.0.0.1", 50000), "server": ("testserver", 80)}
+    request = asyncio.create_task(app(scope, receive, send))
+    while len(broadcaster) == 0:
+        await asyncio.sleep(0.01)
+
+    await broadcaster.publish(make_alert("MSFT"))
+    await broadcaster.publish(make_alert("AAPL", confidence=0.7))
+    while not any(b"event: alert" in chunk for chunk in chunks):
+        await asyncio.sleep(0.01)
+    disconnected.set()
+    await asyncio.wait_for(request, 1)
+
+    body = b"".join(chunks).decode()
+    assert body.startswith("retry: 3000\n\n")
+    assert "id: 2\nevent: alert\n" in body
+    data = json.loads(body.split("data: ")[1].split("\n")[0])
+    assert data["symbol"] == "AAPL" and data["confidence"] == 0.7 and data["id"] == 2
+    assert len(broadcaster) == 0 # subscription released on disconnect
@@ -0,0 +1,160 @@
+import asyncio
+import os
+import threading
+import numpy as np
+import pytest
+from datetime import datetime, timedelta, timezone
+from Ngunguruhoe.adapters.alert_repo_mmap import MmapAlertRepository, SEGMENT_SUFFIX, _Segment
+from Ngunguruhoe.domain.models.alert import Alert, to_epoch_ns
+from Ngunguruhoe.domain.models.alert_batch import AlertBatch
+from Ngunguruhoe.domain.models.alert_query import AlertQuery
+
+START = datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+def make_alert(symbol="AAPL", action="buy", confidence=0.6, offset_seconds=0):
+    return Alert(timestamp=START + timedelta(seconds=offset_seconds), symbol=symbol, action=action,
+                 confidence=confidence)
+
+def segment_files(log_dir):
+    return sorted(name for name in os.listdir(log_dir) if name.endswith(SEGMENT_SUFFIX))
+
+@pytest.mark.asyncio
+async def test_segments_roll_and_survive_reopen(tmp_path):
+    log_dir = str(tmp_path / "log")
+    repo = MmapAlertRepository(log_dir=log_dir, segment_records=16, index_interval=4)
+    await repo.init_db()
+    for i in range(20):
+        await repo.save_alert(make_alert(symbol=f"S{i % 3}", offset_seconds=i))
+    await repo.save_alerts(AlertBatch.from_alerts([make_alert(symbol="BULK", offset_seconds=20 + i) for i in range(30)]))
+    await repo.close()
+
+    assert len(segment_files(log_dir)) == 4 # 50 records in segments of 16
+
+    reopened = MmapAlertRepository(log_dir=log_dir, segment_records=16, index_interval=4)
+    await reopened.init_db()
+    try:
+        assert reopened.symbols == ["S0", "S1", "S2", "BULK"]
+        assert (await reopened.get_latest_alert()).timestamp == START + timedelta(seconds=49)
+        assert (await reopened.get_latest_alert(symbol="S1")).timestamp == START + timedelta(seconds=19)
+        page = await reopened.query_alerts(AlertQuery(limit=100))
+        assert len(page.alerts) == 50 and page.next_cursor is None
+        await reopened.save_alert(make_alert(symbol="AFTER", offset_seconds=60))
+        assert (await reopened.get_latest_alert()).symbol == "AFTER"
+    finally:
+        await reopened.close()
+
+@pytest.mark.asyncio
+async def test_read_range_yields_views_of_in_order_segments(tmp_path):
+    repo = MmapAlertRepository(log_dir=str(tmp_path / "log"), segment_records=32, index_interval=4)
+    await repo.init_db()
+    try:
+        await repo.save_alerts(AlertBatch.from_alerts([make_alert(offset_seconds=i) for i in range(80)]))
+        since, until = to_epoch_ns(START + timedelta(seconds=10)), to_epoch_ns(START + timedelta(seconds=70))
+
+        chunks = list(repo.read_range(since, until))
+
+        assert [len(chunk) for chunk in chunks] == [22, 32, 6]
+        for chunk in chunks:
+            assert not chunk.flags.owndata # a view of the mapped segment, not a copy
+        timestamps = np.concatenate([chunk["timestamp_ns"] for chunk in chunks])
+        assert timestamps[0] == since and timestamps[-1] < until and len(timestamps) == 60
+    finally:
+        await repo.close()
+
+@pytest.mark.asyncio
+async def test_out_of_order_writes_are_queried_newest_first(tmp_path):
+    repo = MmapAlertRepository(log_dir=str(tmp_path / "log"), segment_records=16, index_interval=4)
+    await repo.init_db()
+    try:
+        offsets = [(i * 37) % 40 for i in range(40)] # every offset once, shuffled
+        for i, offset in enumerate(offsets):
+            await repo.save_alert(make_alert(symbol="AAPL" if i % 2 else "MSFT", confidence=offset / 100,
+                                             offset_seconds=offset))
+
+        seen, cursor = [], None
+        while True:
+            page = await repo.query_alerts(AlertQuery(limit=6, after=cursor))
+            seen.extend(page.alerts)
+            if (cursor := page.next_cursor) is None:
+                break
+        assert [a.timestamp for a in seen] == [START + timedelta(seconds=s) for s in range(39, -1, -1)]
+
+        page = await repo.query_alerts(AlertQuery(symbol="AAPL", since=START + timedelta(seconds=10),
+                                                  until=START + timedelta(seconds=20)))
+        expected = sorted((o for i, o in enumerate(offsets) if i % 2 and 10 <= o < 20), reverse=True)
+        assert [a.timestamp for a in page.alerts] == [START + timedelta(seconds=s) for s in expected]
+
+        ranged = np.concatenate(list(repo.read_range(to_epoch_ns(START + timedelta(seconds=5)),
+                                                     to_epoch_ns(START + timedelta(seconds=15)))))
+        assert sorted(ranged["timestamp_ns"]) == [to_epoch_ns(START + timedelta(seconds=s)) for s in range(5, 15)]
+    finally:
+        await repo.close()
+
+@pytest.mark.asyncio
+async def test_torn_tail_is_ignored_on_reopen(tmp_path):
+    log_dir = str(tmp_path / "log")
+    repo = MmapAlertRepository(log_dir=log_dir, segment_records=16, fsync_interval=0)
+    await repo.init_db()
+    for i in range(5):
+        await repo.save_alert(make_alert(offset_seconds=i))
+    await repo.close()
+
+    # A crash between writing records and the header count leaves the count too high.
+    path = os.path.join(log_dir, segment_files(log_dir)[0])
+    with open(path, "r+b") as f:
+        f.seek(24)
+        f.write((9).to_bytes(8, "little"))
+
+    reopened = MmapAlertRepository(log_dir=log_dir, segment_records=16)
+    await reopened.init_db()
+    try:
+        page = await reopened.query_alerts(AlertQuery(limit=100))
+        assert len(page.alerts) == 5
+        await reopened.save_alert(make_alert(symbol="NEXT", offset_seconds=5))
+        assert (await reopened.get_latest_alert()).symbol == "NEXT"
+    finally:
+        await reopened.close()
+
+@pytest.mark.asyncio
+async def test_rolled_segment_is_flushed_off_the_event_loop(tmp_path, monkeypatch):
+    synced = []
+    original = _Segment.sync
+    def sync(segment):
+        synced.append((segment.base_id, threading.current_thread() is threading.main_thread()))
+        original(segment)
+    monkeypatch.setattr(_Segment, "sync", sync)
+
+    repo = MmapAlertRepository(log_dir=str(tmp_path / "log"), segment_records=4, fsync_interval=60)
+    await repo.init_db()
+    try:
+        for i in range(5):
+            await repo.save_alert(make_alert(offset_seconds=i))
+        assert synced == [] # the save that rolled did not msync
+        for _ in range(100):
+            if synced:
+                break
+            await asyncio.sleep(0.01)
+        # Flushed by the background task long before its 60s interval, on a worker thread.
+        assert (1, False) in synced
+    finally:
+        await repo.close()
+
+@pytest.mark.asyncio
+async def test_epoch_timestamps_survive_reopen(tmp_path):
+    log_dir = str(tmp_path / "log")
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    repo = MmapAlertRepository(log_dir=log_dir, segment_records=16)
+    await repo.init_db()
+    await repo.save_alert(make_alert(offset_seconds=0))
+    await repo.save_alert(Alert(timestamp=epoch, symbol="ZERO", action="sell", confidence=0.7))
+    await repo.save_alerts(AlertBatch.from_alerts([make_alert(offset_seconds=1)]))
+    await repo.close()
+
+    reopened = MmapAlertRepository(log_dir=log_dir, segment_records=16)
+    await reopened.init_db()
+    try:
+        page = await reopened.query_alerts(AlertQuery(limit=100))
+        assert len(page.alerts) == 3
+        assert (await reopened.get_latest_alert(symbol="ZERO")).timestamp == epoch
+    finally:
+        await reopened.close()
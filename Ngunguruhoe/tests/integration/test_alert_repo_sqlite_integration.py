@@ -0,0 +1,309 @@
+import pytest
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from Ngunguruhoe.adapters.alert_repo_mmap import MmapAlertRepository
+from Ngunguruhoe.adapters.alert_repo_sqlite import (AlertWriteError, RetentionPolicy, SQLiteAlertRepository, SCHEMA_VERSION,
+                                                    read_alert_archive)
+from Ngunguruhoe.domain.models.alert import Alert
+from Ngunguruhoe.domain.models.alert_query import AlertQuery
+
+# Backends that must behave the same for every AlertPort test below; path is a file or directory to use.
+REPOSITORIES = {
+    "sqlite": lambda path, **options: SQLiteAlertRepository(db_path=str(path) + ".db", **options),
+    "mmap": lambda path, **options: MmapAlertRepository(log_dir=str(path), segment_records=64, index_interval=8),
+}
+
+@pytest.fixture(params=sorted(REPOSITORIES))
+def open_repo(request):
+    return REPOSITORIES[request.param]
+
+@pytest.fixture
+async def alert_repo(tmp_path, open_repo):
+    repo = open_repo(tmp_path / "alerts", batch_size=50, flush_interval=0.01)
+    await repo.init_db()
+    yield repo
+    await repo.close()
+
+@pytest.fixture
+async def sqlite_repo(tmp_path):
+    repo = SQLiteAlertRepository(db_path=str(tmp_path / "alerts.db"), batch_size=50, flush_interval=0.01)
+    await repo.init_db()
+    yield repo
+    await repo.close()
+
+def make_alert(symbol="AAPL", action="buy", confidence=0.6, offset_seconds=0):
+    return Alert(
+        timestamp=datetime(2024, 1, 1, 12, 0, 0) + timedelta(seconds=offset_seconds),
+        symbol=symbol,
+        action=action,
+        confidence=confidence,
+    )
+
+@pytest.mark.asyncio
+async def test_save_and_get_latest_alert(alert_repo):
+    await alert_repo.save_alert(make_alert(offset_seconds=0))
+    await alert_repo.save_alert(make_alert(symbol="MSFT", action="sell", offset_seconds=10))
+    await alert_repo.flush()
+
+    latest = await alert_repo.get_latest_alert()
+
+    assert latest is not None
+    assert latest.symbol == "MSFT"
+    assert latest.action == "sell"
+
+@pytest.mark.asyncio
+async def test_get_latest_alert_empty_db(alert_repo):
+    assert await alert_repo.get_latest_alert() is None
+
+@pytest.mark.asyncio
+async def test_batched_writes_are_all_committed(alert_repo):
+    for i in range(175): # More than several batches worth
+        await alert_repo.save_alert(make_alert(symbol=f"SYM{i}", offset_seconds=i))
+    await alert_repo.flush()
+
+    latest = await alert_repo.get_latest_alert()
+    assert latest.symbol == "SYM174"
+
+@pytest.mark.asyncio
+async def test_close_drains_pending_writes(tmp_path, open_repo):
+    db_path = tmp_path / "drain"
+    repo = open_repo(db_path, flush_interval=1.0)
+    await repo.init_db()
+    await repo.save_alert(make_alert(symbol="DRAIN"))
+    await repo.close() # Must not lose the queued alert
+
+    reopened = open_repo(db_path)
+    await reopened.init_db()
+    try:
+        latest = await reopened.get_latest_alert()
+        assert latest is not None
+        assert latest.symbol == "DRAIN"
+    finally:
+        await reopened.close()
+
+def test_invalid_synchronous_level_rejected():
+    with pytest.raises(ValueError):
+        SQLiteAlertRepository(synchronous="SOMETIMES")
+
+@pytest.mark.asyncio
+async def test_failed_writes_are_retried_then_reported(tmp_path):
+    repo = SQLiteAlertRepository(db_path=str(tmp_path / "failing.db"), flush_interval=0.01, retry_delay=0.01)
+    await repo.init_db()
+    await repo.save_alert(make_alert(symbol="KEPT", offset_seconds=0))
+    await repo.flush()
+    await repo._writer.execute(
+        "CREATE TRIGGER reject_alerts BEFORE INSERT ON alerts BEGIN SELECT RAISE(ABORT, 'disk unavailable'); END")
+    await repo._writer.commit()
+
+    await repo.save_alert(make_alert(symbol="LOST", offset_seconds=10))
+    with pytest.raises(AlertWriteError):
+        await repo.flush()
+    # The dropped alert never became the latest one, and the error is reported once.
+    assert (await repo.get_latest_alert()).symbol == "KEPT"
+    assert await repo.get_latest_alert(symbol="LOST") is None
+    assert repo.failed_writes == 1
+    await repo.flush()
+
+    # A commit that fails once is retried and lands.
+    await repo._writer.execute("DROP TRIGGER reject_alerts")
+    await repo._writer.commit()
+    write_batch, failures = repo._write_batch, [RuntimeError("database is locked")]
+    async def flaky_write(rows):
+        if failures:
+            raise failures.pop()
+        await write_batch(rows)
+    repo._write_batch = flaky_write
+    await repo.save_alert(make_alert(symbol="RETRIED", offset_seconds=20))
+    await repo.flush()
+    assert (await repo.get_latest_alert()).symbol == "RETRIED"
+    assert repo.healthy
+
+    await repo._writer.execute(
+        "CREATE TRIGGER reject_alerts BEFORE INSERT ON alerts BEGIN SELECT RAISE(ABORT, 'disk unavailable'); END")
+    await repo._writer.commit()
+    await repo.save_alert(make_alert(symbol="LOST", offset_seconds=30))
+    with pytest.raises(AlertWriteError):
+        await repo.close() # still closes the connections
+    assert not repo.healthy
+
+@pytest.mark.asyncio
+async def test_latest_alert_per_symbol(alert_repo):
+    await alert_repo.save_alert(make_alert(symbol="AAPL", action="buy", offset_seconds=0))
+    await alert_repo.save_alert(make_alert(symbol="MSFT", action="sell", offset_seconds=5))
+    await alert_repo.save_alert(make_alert(symbol="AAPL", action="sell", offset_seconds=10))
+    await alert_repo.save_alert(make_alert(symbol="MSFT", action="buy", offset_seconds=1)) # Older than MSFT's latest
+    await alert_repo.flush()
+
+    assert (await alert_repo.get_latest_alert(symbol="AAPL")).action == "sell"
+    assert (await alert_repo.get_latest_alert(symbol="MSFT")).action == "sell"
+    assert (await alert_repo.get_latest_alert(symbol="NOPE")) is None
+    assert (await alert_repo.get_latest_alert()).symbol == "AAPL"
+
+@pytest.mark.asyncio
+async def test_latest_cache_is_warmed_from_disk(tmp_path, open_repo):
+    db_path = tmp_path / "warm"
+    repo = open_repo(db_path)
+    await repo.init_db()
+    await repo.save_alert(make_alert(symbol="AAPL", offset_seconds=0))
+    await repo.save_alert(make_alert(symbol="MSFT", action="sell", offset_seconds=30))
+    await repo.close()
+
+    reopened = open_repo(db_path)
+    await reopened.init_db()
+    try:
+        latest = await reopened.get_latest_alert()
+        assert latest.symbol == "MSFT"
+        assert latest.timestamp == datetime(2024, 1, 1, 12, 0, 30, tzinfo=timezone.utc)
+        assert (await reopened.get_latest_alert(symbol="AAPL")).action == "buy"
+    finally:
+        await reopened.close()
+
+@pytest.mark.asyncio
+async def test_legacy_database_is_migrated_in_place(tmp_path):
+    db_path = str(tmp_path / "legacy.db")
+    legacy = sqlite3.connect(db_path)
+    legacy.execute("CREATE TABLE alerts (timestamp TEXT, symbol TEXT, action TEXT, confidence REAL)")
+    legacy.executemany("INSERT INTO alerts VALUES (?, ?, ?, ?)", [
+        ("2024-01-01T12:00:00.123456", "AAPL", "buy", 0.6),
+        ("2024-01-02T09:30:00", "MSFT", "sell", 0.7),
+    ])
+    legacy.commit()
+    legacy.close()
+
+    repo = SQLiteAlertRepository(db_path=db_path)
+    await repo.init_db()
+    try:
+        latest = await repo.get_latest_alert()
+        assert latest.symbol == "MSFT"
+        assert latest.timestamp == datetime(2024, 1, 2, 9, 30, tzinfo=timezone.utc)
+        aapl = await repo.get_latest_alert(symbol="AAPL")
+        assert aapl.timestamp == datetime(2024, 1, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+    finally:
+        await repo.close()
+
+    migrated = sqlite3.connect(db_path)
+    try:
+        assert migrated.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        rows = migrated.execute("SELECT id, timestamp, symbol FROM alerts ORDER BY id").fetchall()
+        assert rows == [(1, 1704110400123456000, "AAPL"), (2, 1704187800000000000, "MSFT")]
+        indexes = {row[1] for row in migrated.execute("PRAGMA index_list(alerts)")}
+        assert {"idx_alerts_timestamp", "idx_alerts_symbol_timestamp"} <= indexes
+    finally:
+        migrated.close()
+
+@pytest.mark.asyncio
+async def test_query_alerts_pages_with_keyset_cursor(alert_repo):
+    for i in range(25):
+        # Pairs of alerts share a timestamp, so pages must break ties by id.
+        await alert_repo.save_alert(make_alert(symbol="AAPL" if i % 3 else "MSFT", confidence=0.5 + i / 100,
+                                                offset_seconds=i // 2))
+    await alert_repo.flush()
+
+    seen, cursor = [], None
+    while True:
+        page = await alert_repo.query_alerts(AlertQuery(limit=7, after=cursor))
+        seen.extend(page.alerts)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert len(seen) == 25
+    assert [a.confidence for a in seen] == sorted((a.confidence for a in seen), reverse=True)
+
+    page = await alert_repo.query_alerts(AlertQuery(
+        symbol="AAPL", min_confidence=0.6,
+        since=datetime(2024, 1, 1, 12, 0, 5), until=datetime(2024, 1, 1, 12, 0, 10),
+    ))
+    assert page.next_cursor is None
+    assert page.alerts and all(a.symbol == "AAPL" and a.confidence >= 0.6 for a in page.alerts)
+    assert all(datetime(2024, 1, 1, 12, 0, 5, tzinfo=timezone.utc) <= a.timestamp
+               < datetime(2024, 1, 1, 12, 0, 10, tzinfo=timezone.utc) for a in page.alerts)
+
+@pytest.mark.asyncio
+async def test_retention_rolls_up_archives_and_drops_expired_days(tmp_path):
+    db_path = str(tmp_path / "retention.db")
+    policy = RetentionPolicy(hot_days=1, rollup_intervals=(3600, 86_400), archive_dir=str(tmp_path / "archive"),
+                             interval=3600, chunk_size=2, pause=0)
+    repo = SQLiteAlertRepository(db_path=db_path, flush_interval=0.01, retention=policy)
+    await repo.init_db()
+    try:
+        day = timedelta(days=1)
+        await repo.save_alert(make_alert("AAPL", "buy", 0.6, 0))           # 2024-01-01 12:00, expired
+        await repo.save_alert(make_alert("AAPL", "sell", 0.8, 60))         # same hour
+        await repo.save_alert(make_alert("AAPL", "buy", 0.7, 3600))        # next hour
+        await repo.save_alert(make_alert("MSFT", "sell", 0.5, 30))
+        await repo.save_alert(make_alert("MSFT", "buy", 0.9, day.total_seconds()))      # 2024-01-02, hot
+        await repo.save_alert(make_alert("AAPL", "sell", 0.4, 2 * day.total_seconds())) # 2024-01-03, today
+        await repo.flush()
+
+        report = await repo.apply_retention(now=datetime(2024, 1, 3, 8, 0, tzinfo=timezone.utc))
+        assert (report.partitions, report.archived, report.deleted) == (1, 4, 4)
+
+        remaining = await repo.query_alerts(AlertQuery())
+        assert [a.symbol for a in remaining.alerts] == ["AAPL", "MSFT"]
+        hourly = await repo.get_rollups(3600, symbol="AAPL")
+        assert [(r.bucket_start.hour, r.alerts, r.buys, r.sells) for r in hourly] == [(12, 2, 1, 1), (13, 1, 1, 0)]
+        assert hourly[0].buy_ratio == 0.5 and hourly[0].mean_confidence == pytest.approx(0.7)
+        daily = await repo.get_rollups(86_400)
+        assert [(r.symbol, r.alerts) for r in daily] == [("AAPL", 3), ("MSFT", 1)]
+
+        (archive_path,) = report.archive_files
+        assert archive_path.endswith("alerts-2024-01-01.part1.npz")
+        archived = read_alert_archive(archive_path)
+        assert sorted((a.symbol, a.action, a.confidence) for a in archived) == [
+            ("AAPL", "buy", 0.6), ("AAPL", "buy", 0.7), ("AAPL", "sell", 0.8), ("MSFT", "sell", 0.5)]
+
+        # A late alert for an expired day becomes a second part and is added to the rollups.
+        await repo.save_alert(make_alert("AAPL", "sell", 0.2, 10))
+        await repo.flush()
+        report = await repo.apply_retention(now=datetime(2024, 1, 3, 8, 0, tzinfo=timezone.utc))
+        assert report.archive_files[0].endswith("part2.npz") and report.deleted == 1
+        assert (await repo.get_rollups(86_400, symbol="AAPL"))[0].alerts == 4
+        assert (await repo.apply_retention(now=datetime(2024, 1, 3, 8, 0, tzinfo=timezone.utc))).partitions == 0
+    finally:
+        await repo.close()
+
+    db = sqlite3.connect(db_path)
+    try:
+        assert db.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        assert db.execute("SELECT day, parts, alerts FROM alert_partitions").fetchall() == [(19723, 2, 5)]
+    finally:
+        db.close()
+
+@pytest.mark.asyncio
+async def test_retention_resumes_deletion_without_recounting(sqlite_repo):
+    for i in range(3):
+        await sqlite_repo.save_alert(make_alert(offset_seconds=i))
+    await sqlite_repo.flush()
+    # As if a previous pass committed the rollups and then stopped before deleting anything.
+    async with sqlite_repo._write_lock:
+        await sqlite_repo._writer.execute("INSERT INTO alert_partitions VALUES (19723, 3, 1, 3)")
+        await sqlite_repo._writer.commit()
+
+    report = await sqlite_repo.apply_retention(now=datetime(2024, 2, 1, tzinfo=timezone.utc))
+    assert (report.archived, report.deleted) == (0, 3)
+    assert await sqlite_repo.get_rollups(3600) == []
+
+@pytest.mark.asyncio
+async def test_retention_reads_expired_days_in_chunks(tmp_path):
+    policy = RetentionPolicy(hot_days=1, archive_dir=str(tmp_path / "archive"), chunk_size=3, pause=0)
+    repo = SQLiteAlertRepository(db_path=str(tmp_path / "alerts.db"), flush_interval=0.01, retention=policy)
+    await repo.init_db()
+    try:
+        # Ties on timestamp straddle the chunk boundaries; each alert must be handled exactly once.
+        for i in range(10):
+            await repo.save_alert(make_alert(["AAPL", "MSFT"][i % 2], ["buy", "sell"][i % 3 == 0], 0.5, i // 4))
+        await repo.flush()
+
+        report = await repo.apply_retention(now=datetime(2024, 2, 1, tzinfo=timezone.utc))
+
+        assert (report.archived, report.deleted) == (10, 10)
+        assert len(read_alert_archive(report.archive_files[0])) == 10
+        daily = await repo.get_rollups(86_400)
+        assert [(r.symbol, r.alerts, r.buys, r.sells) for r in daily] == [("AAPL", 5, 3, 2), ("MSFT", 5, 3, 2)]
+    finally:
+        await repo.close()
+
+def test_retention_policy_rejects_uneven_rollup_intervals():
+    with pytest.raises(ValueError):
+        RetentionPolicy(rollup_intervals=(7,))
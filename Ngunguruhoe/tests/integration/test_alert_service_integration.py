@@ -1,7 +1,10 @@
 import pytest
 from datetime import datetime, timezone
+from types import SimpleNamespace
 from Ngunguruhoe.application.services.alert_service import AlertService, SimpleMarketTrendStrategy
+from Ngunguruhoe.domain.indicators import SMA
 from Ngunguruhoe.domain.models.alert import Alert
+from Ngunguruhoe.domain.ports.strategy_port import StrategyPort
 from Ngunguruhoe.tests.mocks import MockAlpacaAdapter, MockAlertRepository
 from alpaca_trade_api.entity import Trade # For type hinting mock trade data
 
@@ -126,3 +129,52 @@ async def test_alert_timestamp_is_recent(alert_service, mock_alpaca_adapter, moc
     alert_timestamp_utc = saved_alert.timestamp.astimezone(timezone.utc)
 
     assert before_call_utc <= alert_timestamp_utc <= after_call_utc
+
+@pytest.mark.asyncio
+async def test_run_batch_and_store_uses_one_round_trip(alert_service, mock_alpaca_adapter, mock_alert_repo):
+    mock_alpaca_adapter.add_trade_data(symbol="BATCHBUY", price=150.0)
+    mock_alpaca_adapter.add_trade_data(symbol="BATCHSELL", price=50.0)
+
+    alerts = await alert_service.run_batch_and_store(["BATCHBUY", "BATCHSELL", "BATCHMISSING"])
+
+    assert mock_alpaca_adapter.batch_requests == 1
+    assert [(a.symbol, a.action) for a in alerts] == [("BATCHBUY", "buy"), ("BATCHSELL", "sell")]
+    assert len(mock_alert_repo.alerts_saved) == 2
+
+@pytest.mark.asyncio
+async def test_per_symbol_path_keeps_indicators_apart_for_v2_trades(mock_alert_repo):
+    # TradeV2 has no S/symbol attribute; only the symbol the service fetched for identifies it.
+    def trade_v2(price, second):
+        return SimpleNamespace(t=f"2024-01-01T12:00:{second:02d}Z", x="V", p=price, s=100, c=["@"], i=second, z="C")
+
+    strategy = SimpleMarketTrendStrategy()
+    service = AlertService(alert_repo=mock_alert_repo, market_data_provider=MockAlpacaAdapter(), strategy=strategy)
+    for second in range(25):
+        await service.process_market_data("BIG", trade_v2(500.0, second))
+        await service.process_market_data("SMALL", trade_v2(5.0, second))
+
+    assert sorted(strategy.indicators._symbols) == ["BIG", "SMALL"]
+    assert strategy.indicators.get("BIG").values[SMA] == pytest.approx(500.0)
+    assert strategy.indicators.get("SMALL").values[SMA] == pytest.approx(5.0)
+    # Every tick of both symbols was evaluated, none treated as another symbol's duplicate.
+    assert [a.symbol for a in mock_alert_repo.alerts_saved].count("SMALL") == 25
+
+class TradeReadingStrategy(StrategyPort):
+    """Per-item strategy that only implements decide_action and reads the trade's own fields."""
+    def __init__(self):
+        self.seen = []
+
+    async def decide_action(self, market_data):
+        self.seen.append(market_data)
+        return ("buy" if market_data.x == "V" else "sell"), 0.7
+
+@pytest.mark.asyncio
+async def test_per_item_strategy_receives_the_trade_object(mock_alert_repo):
+    trade = SimpleNamespace(t="2024-01-01T12:00:00Z", x="V", p=150.0, s=100, c=["@"], i=1, z="C")
+    strategy = TradeReadingStrategy()
+    service = AlertService(alert_repo=mock_alert_repo, market_data_provider=MockAlpacaAdapter(), strategy=strategy)
+
+    alert = await service.process_market_data("AAPL", trade)
+
+    assert strategy.seen == [trade]
+    assert alert.symbol == "AAPL" and alert.action == "buy"
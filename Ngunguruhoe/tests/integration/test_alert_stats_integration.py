@@ -0,0 +1,90 @@
+import queue
+import pytest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from Ngunguruhoe.adapters.alert_repo_memory import InMemoryAlertRepository
+from Ngunguruhoe.adapters.alert_repo_queue import QueueAlertRepository
+from Ngunguruhoe.application.services.alert_service import AlertService
+from Ngunguruhoe.application.services.alert_stats import AlertStats, window_label
+from Ngunguruhoe.domain.models.alert import Alert, to_epoch_ns
+from Ngunguruhoe.domain.models.market_snapshot import MarketSnapshot
+from Ngunguruhoe.domain.ports.strategy_port import StrategyPort
+
+MINUTE = 60 * 1_000_000_000
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+class ManualClock:
+    def __init__(self, now_ns: int):
+        self.now_ns = now_ns
+
+    def __call__(self) -> int:
+        return self.now_ns
+
+def test_windows_slide_bucket_by_bucket():
+    clock = ManualClock(to_epoch_ns(START))
+    stats = AlertStats(windows=(3600, 86_400), resolution=60, clock=clock)
+    for minute in range(90):
+        clock.now_ns = to_epoch_ns(START) + minute * MINUTE
+        stats.record(clock.now_ns, "AAPL" if minute % 3 else "MSFT", "buy" if minute % 2 else "sell", 0.6)
+
+    windows = stats.snapshot()["windows"]
+    assert windows["1h"]["total"]["alerts"] == 61 # minutes 29-89: the bucket straddling the start still counts
+    assert windows["24h"]["total"]["alerts"] == 90
+    assert windows["24h"]["symbols"]["MSFT"]["alerts"] == 30
+    assert windows["24h"]["total"]["avg_confidence"] == pytest.approx(0.6)
+
+    clock.now_ns += 2 * 3600 * 1_000_000_000
+    windows = stats.snapshot()["windows"]
+    assert windows["1h"]["total"] == {"alerts": 0, "buys": 0, "sells": 0, "buy_sell_ratio": None,
+                                      "avg_confidence": None}
+    assert windows["1h"]["symbols"] == {}
+    assert windows["24h"]["total"]["alerts"] == 90
+
+def test_out_of_order_and_expired_alerts():
+    now = to_epoch_ns(START) + 120 * MINUTE
+    stats = AlertStats(windows=(3600,), clock=lambda: now)
+    stats.record(now - 10 * MINUTE, "AAPL", "buy", 0.8)
+    stats.record(now - 50 * MINUTE, "AAPL", "sell", 0.6) # older than the newest bucket
+    stats.record(now - 30 * MINUTE, "AAPL", "buy", 0.7) # between existing buckets
+    stats.record(now - 90 * MINUTE, "AAPL", "buy", 0.9) # already outside the window
+    aapl = stats.snapshot("AAPL")["windows"]["1h"]["symbols"]["AAPL"]
+    assert aapl == {"alerts": 3, "buys": 2, "sells": 1, "buy_sell_ratio": 2.0, "avg_confidence": pytest.approx(0.7)}
+    assert [window_label(s) for s in (3600, 86_400, 604_800, 900)] == ["1h", "24h", "7d", "15m"]
+    with pytest.raises(ValueError):
+        AlertStats(windows=())
+
+@pytest.mark.asyncio
+async def test_service_updates_stats_on_both_store_paths():
+    class FixedStrategy(StrategyPort):
+        async def decide_action(self, market_data):
+            return ("buy", 0.6) if market_data.p > 100 else ("sell", 0.8)
+
+    stats = AlertStats(clock=lambda: to_epoch_ns(START + timedelta(minutes=1)))
+    service = AlertService(InMemoryAlertRepository(), None, FixedStrategy(), clock=lambda: START,
+                           alert_stats=stats)
+    await service.process_market_data("AAPL", SimpleNamespace(p=150.0))
+    await service.process_snapshot(MarketSnapshot.from_columns(["AAPL", "MSFT"], [150.0, 50.0]))
+
+    windows = stats.snapshot()["windows"]
+    assert windows["1h"]["symbols"]["AAPL"]["buys"] == 2
+    assert windows["7d"]["total"] == {"alerts": 3, "buys": 2, "sells": 1, "buy_sell_ratio": 2.0,
+                                      "avg_confidence": pytest.approx(2.0 / 3)}
+
+@pytest.mark.asyncio
+async def test_rebuild_reads_only_the_longest_window():
+    repo = InMemoryAlertRepository()
+    for days in (0, 1, 3, 10):
+        await repo.save_alert(Alert(START - timedelta(days=days), "AAPL", "buy", 0.5))
+    stats = AlertStats(clock=lambda: to_epoch_ns(START))
+    assert await stats.rebuild(repo) == 3
+    totals = {label: window["total"]["alerts"] for label, window in stats.snapshot()["windows"].items()}
+    assert totals == {"1h": 1, "24h": 2, "7d": 3}
+
+@pytest.mark.asyncio
+async def test_rebuild_starts_empty_from_a_repository_that_cannot_be_queried():
+    repo = QueueAlertRepository(queue.Queue())
+    await repo.save_alert(Alert(START, "AAPL", "buy", 0.5))
+    stats = AlertStats(clock=lambda: to_epoch_ns(START))
+    assert not repo.queryable
+    assert await stats.rebuild(repo) == 0
+    assert stats.snapshot()["windows"]["1h"]["total"]["alerts"] == 0
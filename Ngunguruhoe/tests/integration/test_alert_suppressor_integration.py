@@ -0,0 +1,162 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from Ngunguruhoe.adapters.alert_repo_memory import InMemoryAlertRepository
+from Ngunguruhoe.application.metrics import PipelineMetrics
+from Ngunguruhoe.application.services.alert_service import AlertService
+from Ngunguruhoe.application.services.alert_suppressor import AlertSuppressor
+from Ngunguruhoe.domain.models.market_snapshot import MarketSnapshot
+from Ngunguruhoe.domain.ports.strategy_port import StrategyPort
+
+SECOND = 1_000_000_000
+
+class ScriptedStrategy(StrategyPort):
+    """Returns the queued (action, confidence) decisions in order."""
+    def __init__(self, decisions):
+        self.decisions = list(decisions)
+
+    async def decide_action(self, market_data):
+        return self.decisions.pop(0)
+
+class SteppingClock:
+    def __init__(self, step: timedelta):
+        self.now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.step = step
+
+    def __call__(self) -> datetime:
+        self.now += self.step
+        return self.now
+
+class FailingRepository(InMemoryAlertRepository):
+    """Fails the first save_alert/save_alerts call, then stores normally."""
+    def __init__(self):
+        super().__init__()
+        self.failures = 1
+
+    async def save_alert(self, alert):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk unavailable")
+        await super().save_alert(alert)
+
+    async def save_alerts(self, batch):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk unavailable")
+        await super().save_alerts(batch)
+
+def offer(suppressor, symbol, action, confidence, timestamp_ns):
+    """Checks a decision and reports the outcome, as AlertService does after a successful save."""
+    reason = suppressor.check(symbol, action, confidence, timestamp_ns)
+    if reason is None:
+        suppressor.mark_emitted(symbol, action, confidence, timestamp_ns)
+    else:
+        suppressor.mark_suppressed(reason)
+    return reason
+
+def test_on_change_only_suppresses_repeated_actions():
+    suppressor = AlertSuppressor()
+    decisions = [("buy", 0.6), ("buy", 0.7), ("sell", 0.6), ("sell", 0.6), ("buy", 0.6)]
+    emitted = [offer(suppressor, "AAPL", a, c, i * SECOND) is None for i, (a, c) in enumerate(decisions)]
+    assert emitted == [True, False, True, False, True]
+    assert offer(suppressor, "MSFT", "buy", 0.6, 0) is None # state is per symbol
+    assert suppressor.stats() == {"emitted": 4, "suppressed": {"cooldown": 0, "duplicate": 2},
+                                  "suppressed_ratio": pytest.approx(2 / 6)}
+
+def test_min_confidence_delta_lets_large_moves_through():
+    suppressor = AlertSuppressor(min_confidence_delta=0.1)
+    assert offer(suppressor, "AAPL", "buy", 0.60, 0) is None
+    assert offer(suppressor, "AAPL", "buy", 0.65, 1) == "duplicate"
+    assert offer(suppressor, "AAPL", "buy", 0.72, 2) is None # compared with the last emitted 0.60
+    assert offer(suppressor, "AAPL", "buy", 0.75, 3) == "duplicate"
+
+def test_cooldown_debounces_every_action():
+    suppressor = AlertSuppressor(on_change_only=False, cooldown=10)
+    assert offer(suppressor, "AAPL", "buy", 0.6, 0) is None
+    assert offer(suppressor, "AAPL", "sell", 0.6, 5 * SECOND) == "cooldown"
+    assert offer(suppressor, "AAPL", "sell", 0.6, 10 * SECOND) is None
+    assert offer(suppressor, "AAPL", "sell", 0.6, 20 * SECOND) is None # repeats allowed without on_change_only
+    suppressor.reset("AAPL")
+    assert offer(suppressor, "AAPL", "sell", 0.6, 21 * SECOND) is None
+
+def test_check_does_not_record_anything():
+    suppressor = AlertSuppressor()
+    assert suppressor.check("AAPL", "buy", 0.6, 0) is None
+    assert suppressor.check("AAPL", "buy", 0.6, 1) is None # the first was never marked emitted
+    assert suppressor.stats()["emitted"] == 0
+
+def test_invalid_settings_rejected():
+    with pytest.raises(ValueError):
+        AlertSuppressor(cooldown=-1)
+
+@pytest.mark.asyncio
+async def test_service_stores_only_changes_and_counts_suppressed():
+    repo = InMemoryAlertRepository()
+    metrics = PipelineMetrics()
+    strategy = ScriptedStrategy([("buy", 0.6), ("buy", 0.6), ("hold", 0.1), ("buy", 0.6), ("sell", 0.7)])
+    service = AlertService(repo, None, strategy, clock=SteppingClock(timedelta(seconds=1)),
+                           metrics=metrics, suppressor=AlertSuppressor())
+    trade = SimpleNamespace(p=150.0)
+
+    stored = [await service.process_market_data("AAPL", trade) for _ in range(5)]
+
+    assert [alert.action if alert else None for alert in stored] == ["buy", None, None, None, "sell"]
+    events = {event: child.value for (symbol, event), child in metrics._events.items()}
+    assert events["stored"] == 2 and events["suppressed"] == 2 and events["held"] == 1
+
+@pytest.mark.asyncio
+async def test_batch_path_filters_rows_through_the_suppressor():
+    repo = InMemoryAlertRepository()
+    metrics = PipelineMetrics()
+    service = AlertService(repo, None, None, clock=SteppingClock(timedelta(seconds=1)),
+                           metrics=metrics, suppressor=AlertSuppressor())
+
+    class FixedStrategy(StrategyPort):
+        async def decide_action(self, market_data):
+            return ("buy", 0.6) if market_data.p > 100 else ("hold", 0.1)
+
+    service.strategy = FixedStrategy()
+    snapshot = MarketSnapshot.from_columns(["AAPL", "MSFT", "TSLA"], [150.0, 50.0, 150.0])
+    first = await service.process_snapshot(snapshot)
+    second = await service.process_snapshot(snapshot)
+
+    assert sorted(alert.symbol for alert in first) == ["AAPL", "TSLA"]
+    assert len(second) == 0
+    assert metrics._events["AAPL", "stored"].value == 1
+    assert metrics._events["AAPL", "suppressed"].value == 1
+    assert metrics._events["MSFT", "held"].value == 2
+
+@pytest.mark.asyncio
+async def test_failed_save_does_not_suppress_the_retry():
+    repo = FailingRepository()
+    suppressor = AlertSuppressor()
+    service = AlertService(repo, None, ScriptedStrategy([("buy", 0.6)] * 3),
+                           clock=SteppingClock(timedelta(seconds=1)), suppressor=suppressor)
+    trade = SimpleNamespace(p=150.0)
+
+    with pytest.raises(OSError):
+        await service.process_market_data("AAPL", trade)
+    stored = await service.process_market_data("AAPL", trade) # same signal, now saved
+    repeat = await service.process_market_data("AAPL", trade)
+
+    assert stored is not None and repeat is None
+    assert [alert.action for alert in repo.alerts] == ["buy"]
+    assert suppressor.stats()["emitted"] == 1
+
+@pytest.mark.asyncio
+async def test_failed_batch_save_does_not_suppress_the_retry():
+    repo = FailingRepository()
+    service = AlertService(repo, None, None, clock=SteppingClock(timedelta(seconds=1)), suppressor=AlertSuppressor())
+
+    class FixedStrategy(StrategyPort):
+        async def decide_action(self, market_data):
+            return "buy", 0.6
+
+    service.strategy = FixedStrategy()
+    snapshot = MarketSnapshot.from_columns(["AAPL", "MSFT"], [150.0, 150.0])
+    with pytest.raises(OSError):
+        await service.process_snapshot(snapshot)
+    retried = await service.process_snapshot(snapshot)
+
+    assert sorted(alert.symbol for alert in retried) == ["AAPL", "MSFT"]
+    assert len(await service.process_snapshot(snapshot)) == 0
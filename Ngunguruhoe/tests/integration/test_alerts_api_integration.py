@@ -0,0 +1,101 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+from Ngunguruhoe.adapters.alert_repo_sqlite import SQLiteAlertRepository
+from Ngunguruhoe.adapters.webserver_fastapi import MAX_PAGE_SIZE, create_app
+from Ngunguruhoe.application.readiness import Readiness
+from Ngunguruhoe.application.services.alert_stats import AlertStats
+from Ngunguruhoe.benchmarks.asgi_client import asgi_get
+from Ngunguruhoe.domain.models.alert import Alert, to_epoch_ns
+
+START = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+@pytest.fixture
+async def app_and_repo(tmp_path):
+    repo = SQLiteAlertRepository(db_path=str(tmp_path / "alerts.db"), flush_interval=0.01)
+    await repo.init_db()
+    for i in range(30):
+        await repo.save_alert(Alert(START + timedelta(minutes=i), ["AAPL", "MSFT", "F"][i % 3],
+                                    "buy" if i % 2 else "sell", round(0.5 + i / 100, 2)))
+    await repo.flush()
+    yield create_app(repo), repo
+    await repo.close()
+
+@pytest.mark.asyncio
+async def test_alerts_are_paged_with_cursor_and_filters(app_and_repo):
+    app, _ = app_and_repo
+    collected, cursor = [], None
+    while True:
+        response = await asgi_get(app, "/alerts", {"symbol": "AAPL", "limit": 4, "cursor": cursor})
+        assert response.status == 200
+        payload = json.loads(response.body)
+        collected.extend(payload["alerts"])
+        cursor = payload["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(collected) == 10
+    assert all(alert["symbol"] == "AAPL" for alert in collected)
+    assert datetime.fromisoformat(collected[0]["timestamp"]) == START + timedelta(minutes=27)
+
+    response = await asgi_get(app, "/alerts", {"action": "buy", "min_confidence": 0.7,
+                                               "since": (START + timedelta(minutes=25)).isoformat()})
+    alerts = json.loads(response.body)["alerts"]
+    assert [a["confidence"] for a in alerts] == [0.79, 0.77, 0.75]
+
+@pytest.mark.asyncio
+async def test_unchanged_page_revalidates_with_304(app_and_repo):
+    app, repo = app_and_repo
+    first = await asgi_get(app, "/alerts", {"limit": 5})
+    etag, last_modified = first.headers["etag"], first.headers["last-modified"]
+    assert last_modified == "Mon, 01 Jan 2024 12:29:00 GMT"
+
+    assert (await asgi_get(app, "/alerts", {"limit": 5}, {"If-None-Match": etag})).status == 304
+    assert (await asgi_get(app, "/alerts", {"limit": 5}, {"If-Modified-Since": last_modified})).status == 304
+
+    await repo.save_alert(Alert(START + timedelta(hours=1), "AAPL", "buy", 0.9))
+    await repo.flush()
+    changed = await asgi_get(app, "/alerts", {"limit": 5}, {"If-None-Match": etag})
+    assert changed.status == 200
+    assert changed.headers["etag"] != etag
+
+@pytest.mark.asyncio
+async def test_page_size_is_capped_and_bad_cursor_rejected(app_and_repo):
+    app, _ = app_and_repo
+    assert (await asgi_get(app, "/alerts", {"limit": MAX_PAGE_SIZE + 1})).status == 422
+    assert (await asgi_get(app, "/alerts", {"cursor": "not-a-cursor"})).status == 400
+
+@pytest.mark.asyncio
+async def test_ready_reports_503_until_every_check_passes(app_and_repo):
+    _, repo = app_and_repo
+    connected = asyncio.Event()
+    readiness = Readiness()
+    readiness.add_check("database", lambda: repo.healthy)
+    readiness.add_check("market_data", connected.is_set)
+    app = create_app(repo, readiness=readiness)
+
+    response = await asgi_get(app, "/ready")
+    assert response.status == 503
+    assert json.loads(response.body) == {"ready": False, "checks": {"database": True, "market_data": False}}
+
+    connected.set()
+    assert (await asgi_get(app, "/ready")).status == 200
+
+@pytest.mark.asyncio
+async def test_alert_stats_are_rebuilt_from_the_database_and_served(app_and_repo):
+    _, repo = app_and_repo
+    # The fixture's 30 alerts span 12:00-12:29; "now" is 13:15, so 1h covers 12:15 onwards.
+    stats = AlertStats(windows=(3600, 86_400), clock=lambda: to_epoch_ns(START + timedelta(minutes=75)))
+    assert await stats.rebuild(repo, page_size=7) == 30
+    app = create_app(repo, alert_stats=stats)
+
+    body = json.loads((await asgi_get(app, "/alerts/stats")).body)
+    assert body["windows"]["24h"]["total"]["alerts"] == 30
+    assert body["windows"]["1h"]["total"]["alerts"] == 15
+    assert set(body["windows"]["24h"]["symbols"]) == {"AAPL", "MSFT", "F"}
+
+    aapl = json.loads((await asgi_get(app, "/alerts/stats", {"symbol": "AAPL"})).body)["windows"]["24h"]
+    assert list(aapl["symbols"]) == ["AAPL"]
+    assert aapl["symbols"]["AAPL"] == {"alerts": 10, "buys": 5, "sells": 5, "buy_sell_ratio": 1.0,
+                                       "avg_confidence": pytest.approx(0.5 + 13.5 / 100)}
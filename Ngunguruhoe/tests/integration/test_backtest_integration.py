@@ -0,0 +1,61 @@
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+import pytest
+from Ngunguruhoe.adapters.alert_repo_memory import InMemoryAlertRepository
+from Ngunguruhoe.adapters.historical_data_source import BAR_COLUMNS, iter_historical_snapshots
+from Ngunguruhoe.application.services.alert_service import SimpleMarketTrendStrategy
+from Ngunguruhoe.application.services.backtest_service import BacktestEngine
+from Ngunguruhoe.domain.indicators import IndicatorEngine
+
+SYMBOLS = ["AAPL", "MSFT", "F"]
+MINUTES = 100
+START = datetime(2024, 1, 2, 14, 30, tzinfo=timezone.utc)
+
+@pytest.fixture
+def bars_csv(tmp_path):
+    rng = np.random.default_rng(7)
+    timestamps = pd.date_range(START, periods=MINUTES, freq="min")
+    frames = []
+    for symbol in SYMBOLS:
+        close = 50 * np.exp(np.cumsum(rng.normal(0, 0.002, MINUTES)))
+        frames.append(pd.DataFrame({"timestamp": timestamps.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                                    "symbol": symbol, "close": close, "volume": rng.integers(100, 1000, MINUTES)}))
+    path = tmp_path / "bars.csv"
+    pd.concat(frames).sort_values("timestamp", kind="stable").to_csv(path, index=False)
+    return path
+
+@pytest.mark.asyncio
+async def test_backtest_replays_file_in_chunks_with_simulated_clock(bars_csv):
+    repo = InMemoryAlertRepository()
+    engine = BacktestEngine(SimpleMarketTrendStrategy(indicators=IndicatorEngine(window=5)), repo)
+
+    chunks = iter_historical_snapshots(str(bars_csv), chunksize=64, columns=BAR_COLUMNS)
+    report = await engine.run(chunks)
+
+    ticks = MINUTES * len(SYMBOLS)
+    assert report.ticks == ticks
+    assert report.snapshots >= MINUTES # a minute may straddle a chunk boundary
+    assert report.alerts == repo.total_saved == ticks # every priced bar is a buy or sell
+    assert report.actions["buy"] + report.actions["sell"] == ticks
+    assert report.ticks_per_second > 0
+
+    # Alerts are stamped with market time, not wall time.
+    assert report.first_timestamp == START
+    assert report.last_timestamp == START + pd.Timedelta(minutes=MINUTES - 1)
+    assert min(a.timestamp for a in repo.alerts) == START
+    assert (await repo.get_latest_alert("MSFT")).timestamp == report.last_timestamp
+
+    summary = report.to_dict()
+    assert set(summary["top_symbols"]) == set(SYMBOLS)
+    assert 0.55 <= summary["mean_confidence"]["buy"] <= 0.75
+
+@pytest.mark.asyncio
+async def test_backtest_keeps_only_recent_alerts_when_bounded(bars_csv):
+    repo = InMemoryAlertRepository(max_alerts=10)
+    engine = BacktestEngine(SimpleMarketTrendStrategy(), repo)
+
+    report = await engine.run(iter_historical_snapshots(str(bars_csv), columns=BAR_COLUMNS))
+
+    assert len(repo.alerts) == 10
+    assert repo.total_saved == report.alerts
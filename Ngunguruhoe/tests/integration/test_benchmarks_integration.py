@@ -0,0 +1,59 @@
+import json
+import logging
+import pytest
+from Ngunguruhoe.benchmarks import api, pipeline, storage
+from Ngunguruhoe.benchmarks.harness import compare, parse_count, quiet, run_load
+from Ngunguruhoe.benchmarks.run import main
+
+@pytest.mark.asyncio
+async def test_benchmarks_produce_metrics_at_small_scale():
+    results = [await pipeline.bench_run_strategy_and_store(200, symbols=10, concurrency=4),
+               await pipeline.bench_run_batch_and_store(5, symbols=20),
+               *await storage.bench_sqlite(2000, queries=20),
+               *await api.run(quick=True, rows=500, concurrency_levels=(4,))]
+
+    by_name = {result.name: result.metrics for result in results}
+    assert by_name["pipeline.run_strategy_and_store"]["operations"] == 200
+    assert by_name["sqlite.insert_batch"]["rows"] == 2000
+    assert by_name["sqlite.insert_batch"]["rows_per_second"] > 0
+    for metrics in by_name.values():
+        if "p99_ms" in metrics:
+            assert metrics["p50_ms"] <= metrics["p99_ms"]
+    assert {"api.latest_alert", "api.alerts_page", "sqlite.paginate_20_pages"} <= by_name.keys()
+
+@pytest.mark.asyncio
+async def test_run_load_respects_total_and_concurrency():
+    calls = []
+    async def operation(i):
+        calls.append(i)
+    metrics = await run_load(operation, 50, concurrency=8)
+    assert sorted(calls) == list(range(50))
+    assert metrics["operations"] == 50
+
+def test_quiet_silences_the_services_logs_while_timing(caplog):
+    service_logger = logging.getLogger("Ngunguruhoe.application.services.alert_service")
+    with caplog.at_level(logging.INFO):
+        with quiet():
+            service_logger.info("AlertService: Alert stored")
+        service_logger.info("AlertService: Alert stored after timing")
+    assert [record.getMessage() for record in caplog.records] == ["AlertService: Alert stored after timing"]
+
+def test_compare_flags_regressions_only_beyond_tolerance():
+    def run(ops, p99):
+        return {"results": [{"name": "x", "params": {"rows": 10}, "metrics": {"ops_per_second": ops, "p99_ms": p99}}]}
+    assert compare(run(1000, 1.0), run(950, 1.05)) == []
+    regressions = compare(run(1000, 1.0), run(800, 1.5))
+    assert {r["metric"] for r in regressions} == {"ops_per_second", "p99_ms"}
+    assert parse_count("10M") == 10_000_000 and parse_count("10k") == 10_000
+
+def test_cli_writes_json_and_exits_nonzero_on_regression(tmp_path):
+    out = tmp_path / "bench.json"
+    assert main(["pipeline", "--quick", "--out", str(out)]) == 0
+    report = json.loads(out.read_text())
+    assert report["environment"]["python"] and report["results"]
+
+    for result in report["results"]:
+        result["metrics"]["ops_per_second"] *= 1000 # pretend the baseline was far faster
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(report))
+    assert main(["pipeline", "--quick", "--out", str(out), "--compare", str(baseline)]) == 1
@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+from Ngunguruhoe.adapters.cached_market_data import CachedMarketDataProvider
+
+class CountingProvider:
+    """Market data provider stub that counts upstream calls and answers after a short delay."""
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.single_calls = 0
+        self.batch_calls = 0
+        self.fail = False
+
+    async def get_latest_trade(self, symbol):
+        self.single_calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return f"trade-{symbol}"
+
+    async def get_latest_trades(self, symbols):
+        self.batch_calls += 1
+        await asyncio.sleep(self.delay)
+        return {symbol: f"trade-{symbol}" for symbol in symbols if symbol != "NODATA"}
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_coalesced():
+    provider = CountingProvider()
+    cache = CachedMarketDataProvider(provider, ttl=5)
+
+    results = await asyncio.gather(*(cache.get_latest_trade("AAPL") for _ in range(10)))
+
+    assert results == ["trade-AAPL"] * 10
+    assert provider.single_calls == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["coalesced"] == 9
+
+@pytest.mark.asyncio
+async def test_entries_expire_after_ttl():
+    provider = CountingProvider(delay=0)
+    clock = FakeClock()
+    cache = CachedMarketDataProvider(provider, ttl=1.0, ttl_overrides={"FAST": 0.1}, clock=clock)
+
+    await cache.get_latest_trade("AAPL")
+    await cache.get_latest_trade("FAST")
+    clock.now = 0.5
+    await cache.get_latest_trade("AAPL") # still fresh
+    await cache.get_latest_trade("FAST") # expired by its shorter TTL
+    clock.now = 1.5
+    await cache.get_latest_trade("AAPL") # expired
+
+    assert provider.single_calls == 4
+    assert cache.stats()["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_lru_is_bounded():
+    provider = CountingProvider(delay=0)
+    cache = CachedMarketDataProvider(provider, ttl=60, max_size=2)
+
+    for symbol in ("A", "B", "A", "C"): # B is least recently used when C arrives
+        await cache.get_latest_trade(symbol)
+    await cache.get_latest_trade("A")
+    await cache.get_latest_trade("B")
+
+    assert cache.stats()["evictions"] >= 1
+    assert cache.stats()["size"] == 2
+    assert provider.single_calls == 4 # A, B, C, then B again
+
+@pytest.mark.asyncio
+async def test_batch_lookup_mixes_hits_in_flight_and_misses():
+    provider = CountingProvider()
+    cache = CachedMarketDataProvider(provider, ttl=60)
+    await cache.get_latest_trade("HIT")
+
+    single = asyncio.create_task(cache.get_latest_trade("PENDING"))
+    await asyncio.sleep(0) # let the single fetch start
+    trades = await cache.get_latest_trades(["HIT", "PENDING", "NEW1", "NEW2", "NODATA"])
+    await single
+
+    assert trades == {s: f"trade-{s}" for s in ("HIT", "PENDING", "NEW1", "NEW2")}
+    assert provider.batch_calls == 1
+    assert provider.single_calls == 2
+    assert cache.stats()["coalesced"] == 1
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_all_waiters_and_are_not_cached():
+    provider = CountingProvider()
+    provider.fail = True
+    cache = CachedMarketDataProvider(provider, ttl=60)
+
+    results = await asyncio.gather(*(cache.get_latest_trade("AAPL") for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    provider.fail = False
+    assert await cache.get_latest_trade("AAPL") == "trade-AAPL"
+    assert provider.single_calls == 2
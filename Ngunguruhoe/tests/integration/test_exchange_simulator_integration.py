@@ -0,0 +1,86 @@
+import json
+import pytest
+from Ngunguruhoe.adapters.alpaca_adapter import AlpacaAdapter
+from Ngunguruhoe.application.services.request_budget import RateLimited, RequestBudget
+from Ngunguruhoe.benchmarks.exchange_simulator import ExchangeSimulator, PricePaths
+from Ngunguruhoe.benchmarks.load import HttpClient, scrape
+
+@pytest.mark.asyncio
+async def test_simulator_serves_alpaca_shaped_latest_trades():
+    async with ExchangeSimulator(["AAPL", "MSFT"], tick_interval=0.01, seed=1) as simulator:
+        client = HttpClient(simulator.host, simulator.port)
+        try:
+            status, body = await client.get("/v2/stocks/AAPL/trades/latest")
+            single = json.loads(body)
+            status_batch, body = await client.get("/v2/stocks/trades/latest?symbols=AAPL%2CMSFT,NOPE")
+            batch = json.loads(body)
+            assert (await client.get("/v2/account"))[0] == 200
+            assert (await client.get("/v2/stocks/NOPE/trades/latest"))[0] == 404
+        finally:
+            client.close()
+
+    assert status == status_batch == 200
+    assert single["symbol"] == "AAPL" and {"t", "x", "p", "s", "c", "i", "z"} <= single["trade"].keys()
+    assert single["trade"]["t"].endswith("Z") and single["trade"]["p"] > 0
+    assert batch["trades"].keys() == {"AAPL", "MSFT"}
+    assert simulator.stats()["trades_served"] == 3
+
+@pytest.mark.asyncio
+async def test_simulator_injects_errors_and_enforces_rate_limit():
+    async with ExchangeSimulator(["AAPL"], error_rate=1.0, seed=1) as failing:
+        client = HttpClient(failing.host, failing.port)
+        try:
+            status, body = await client.get("/v2/stocks/AAPL/trades/latest")
+        finally:
+            client.close()
+    assert status == 500 and "code" in json.loads(body) # the SDK raises APIError for this
+    assert failing.stats()["errors_injected"] == 1
+
+    async with ExchangeSimulator(["AAPL"], rate_limit=2, seed=1) as limited:
+        client = HttpClient(limited.host, limited.port)
+        try:
+            statuses = [(await client.get("/v2/stocks/AAPL/trades/latest"))[0] for _ in range(3)]
+        finally:
+            client.close()
+    assert statuses == [200, 200, 429]
+    assert limited.stats()["throttled"] == 1
+
+@pytest.mark.asyncio
+async def test_adapter_reports_its_own_throttled_fetch(monkeypatch):
+    async with ExchangeSimulator(["AAPL", "MSFT"], rate_limit=1, seed=1) as limited:
+        for name, value in {"ALPACA_API_KEY": "simulated", "ALPACA_SECRET_KEY": "simulated",
+                            "ALPACA_BASE_URL": limited.url, "APCA_API_DATA_URL": limited.url}.items():
+            monkeypatch.setenv(name, value)
+        # Another client of the account spends the quota, so the adapter's first request gets the 429.
+        client = HttpClient(limited.host, limited.port)
+        try:
+            assert (await client.get("/v2/stocks/AAPL/trades/latest"))[0] == 200
+        finally:
+            client.close()
+        budget = RequestBudget(limit=1000)
+        adapter = AlpacaAdapter(budget=budget)
+        try:
+            with pytest.raises(RateLimited):
+                await adapter.get_latest_trade("MSFT")
+        finally:
+            adapter.close()
+    assert budget.throttles == 1 and budget.paused
+
+def test_price_paths_move_and_burst():
+    paths = PricePaths([f"S{i}" for i in range(1000)], volatility=0.001, burst_rate=1.0, seed=3)
+    start = paths.price.copy()
+    paths.advance(1.0)
+    assert paths.bursting > 0
+    assert (paths.price != start).all() and (paths.price > 0).all()
+    assert paths.trade(0)["i"] == 1
+
+def test_scrape_totals_the_load_report_series():
+    text = "\n".join([
+        '# TYPE ngunguruhoe_stage_duration_seconds histogram',
+        'ngunguruhoe_stage_duration_seconds_count{path="batch",stage="total"} 4',
+        'ngunguruhoe_stage_duration_seconds_count{path="batch",stage="fetch"} 4',
+        'ngunguruhoe_cycle_events_total{symbol="A",event="fetched"} 10',
+        'ngunguruhoe_cycle_events_total{symbol="B",event="no_data"} 2',
+        'ngunguruhoe_cycle_events_total{symbol="A",event="stored"} 7',
+    ])
+    assert scrape(text) == {"cycles": 4.0, "evaluated": 12.0, "stored": 7.0, "errored": 0.0}
@@ -0,0 +1,78 @@
+import math
+import numpy as np
+import pytest
+from Ngunguruhoe.application.services.alert_service import SimpleMarketTrendStrategy
+from Ngunguruhoe.domain.indicators import IndicatorEngine, SymbolIndicators, SMA, VWAP
+from Ngunguruhoe.domain.models.market_snapshot import MarketSnapshot
+
+WINDOW = 10
+
+@pytest.fixture
+def trades():
+    rng = np.random.default_rng(42)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 200)))
+    sizes = rng.integers(1, 500, 200).astype(float)
+    return prices, sizes
+
+def reference_rsi(prices, period):
+    changes = np.diff(prices)
+    gains, losses = np.clip(changes, 0, None), np.clip(-changes, 0, None)
+    avg_gain, avg_loss = gains[:period].mean(), losses[:period].mean()
+    for gain, loss in zip(gains[period:], losses[period:]):
+        avg_gain = (avg_gain * (period - 1) + gain) / period
+        avg_loss = (avg_loss * (period - 1) + loss) / period
+    return 100 - 100 / (1 + avg_gain / avg_loss)
+
+def test_rolling_indicators_match_full_recomputation(trades):
+    prices, sizes = trades
+    indicators = SymbolIndicators(window=WINDOW, rsi_period=14)
+    for price, size in zip(prices, sizes):
+        indicators.update(price, size)
+
+    recent_prices, recent_sizes = prices[-WINDOW:], sizes[-WINDOW:]
+    log_returns = np.diff(np.log(prices))[-WINDOW:]
+    ema = prices[0]
+    for price in prices[1:]:
+        ema += 2 / (WINDOW + 1) * (price - ema)
+
+    assert indicators.count == len(prices)
+    assert indicators.sma == pytest.approx(recent_prices.mean())
+    assert indicators.vwap == pytest.approx((recent_prices * recent_sizes).sum() / recent_sizes.sum())
+    assert indicators.volatility == pytest.approx(log_returns.std(ddof=1))
+    assert indicators.ema == pytest.approx(ema)
+    assert indicators.rsi == pytest.approx(reference_rsi(prices, 14))
+
+def test_values_are_nan_until_window_is_full():
+    indicators = SymbolIndicators(window=3)
+    indicators.update(10.0, 1)
+    indicators.update(11.0, 1)
+    assert not indicators.is_warm
+    assert math.isnan(indicators.sma)
+    indicators.update(12.0, 1)
+    assert indicators.is_warm
+    assert indicators.sma == pytest.approx(11.0)
+
+def test_stale_trades_are_ignored_and_values_are_views():
+    engine = IndicatorEngine(window=2)
+    first = engine.update("AAPL", 10.0, 1, timestamp=100)
+    values = first.values # view, not a copy
+    engine.update("AAPL", 12.0, 1, timestamp=200)
+    engine.update("AAPL", 99.0, 1, timestamp=200) # same trade polled again
+
+    assert values[SMA] == pytest.approx(11.0)
+    assert values[VWAP] == pytest.approx(11.0)
+    assert engine.get("AAPL").count == 2
+
+@pytest.mark.asyncio
+async def test_strategy_follows_trend_once_warm():
+    strategy = SimpleMarketTrendStrategy(indicators=IndicatorEngine(window=5))
+    # Well below the old fixed threshold of 100, but trending upwards.
+    for i, price in enumerate([10.0, 10.1, 10.2, 10.3, 10.4]):
+        await strategy.decide_actions(MarketSnapshot.from_columns(["UP"], [price], [1], [i + 1]))
+
+    actions, confidences = await strategy.decide_actions(MarketSnapshot.from_columns(["UP"], [11.0], [1], [10]))
+    assert actions[0] == "buy"
+    assert 0.55 <= confidences[0] <= 0.75
+
+    actions, _ = await strategy.decide_actions(MarketSnapshot.from_columns(["UP"], [9.0], [1], [11]))
+    assert actions[0] == "sell"
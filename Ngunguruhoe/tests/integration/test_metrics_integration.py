@@ -0,0 +1,118 @@
+import asyncio
+import re
+import time
+import pytest
+from Ngunguruhoe.adapters.alert_broadcaster import AlertBroadcaster
+from Ngunguruhoe.adapters.alert_repo_memory import InMemoryAlertRepository
+from Ngunguruhoe.adapters.webserver_fastapi import create_app
+from Ngunguruhoe.application.metrics import EventLoopLagMonitor, MetricsRegistry, PipelineMetrics
+from Ngunguruhoe.application.services.alert_service import AlertService, SimpleMarketTrendStrategy
+from Ngunguruhoe.benchmarks.asgi_client import asgi_get
+from Ngunguruhoe.tests.mocks import MockAlpacaAdapter
+
+def sample(text: str, name: str, **labels) -> float:
+    """Value of the sample with exactly these labels, from Prometheus text output."""
+    for line in text.splitlines():
+        match = re.fullmatch(r"(\w+)(?:\{(.*)\})? (\S+)", line)
+        if match and match.group(1) == name:
+            found = dict(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', match.group(2) or ""))
+            if found == labels:
+                return float(match.group(3))
+    raise AssertionError(f"no sample {name}{labels}")
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry()
+
+@pytest.fixture
+def market_data():
+    return MockAlpacaAdapter()
+
+@pytest.fixture
+def service(registry, market_data):
+    return AlertService(InMemoryAlertRepository(), market_data, SimpleMarketTrendStrategy(),
+                        metrics=PipelineMetrics(registry))
+
+def test_histogram_renders_cumulative_buckets(registry):
+    histogram = registry.histogram("op_seconds", "An operation.", ("kind",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.labels("a").observe(value)
+    registry.counter("ops", "Operations.", ("name",)).labels('say "hi"\n').inc()
+    text = registry.render()
+
+    assert "# TYPE ngunguruhoe_op_seconds histogram" in text
+    assert sample(text, "ngunguruhoe_op_seconds_bucket", kind="a", le="0.1") == 2
+    assert sample(text, "ngunguruhoe_op_seconds_bucket", kind="a", le="1") == 3
+    assert sample(text, "ngunguruhoe_op_seconds_bucket", kind="a", le="+Inf") == 4
+    assert sample(text, "ngunguruhoe_op_seconds_count", kind="a") == 4
+    assert sample(text, "ngunguruhoe_op_seconds_sum", kind="a") == pytest.approx(3.65)
+    assert 'ngunguruhoe_ops_total{name="say \\"hi\\"\\n"} 1' in text
+
+def test_registry_rejects_conflicting_registration(registry):
+    assert registry.counter("ops", "Operations.") is registry.counter("ops", "Operations.")
+    with pytest.raises(ValueError):
+        registry.gauge("ops", "Operations.")
+
+@pytest.mark.asyncio
+async def test_service_records_stages_and_outcomes(registry, service, market_data):
+    market_data.set_trade_data("BUYME", 150.0)
+    await service.run_strategy_and_store("BUYME")
+    market_data.set_no_data()
+    await service.run_strategy_and_store("EMPTY")
+    market_data.set_api_error()
+    with pytest.raises(Exception):
+        await service.run_strategy_and_store("BROKEN")
+
+    text = registry.render()
+    events = "ngunguruhoe_cycle_events_total"
+    assert sample(text, events, symbol="BUYME", event="fetched") == 1
+    assert sample(text, events, symbol="BUYME", event="stored") == 1
+    assert sample(text, events, symbol="EMPTY", event="no_data") == 1
+    assert sample(text, events, symbol="BROKEN", event="errored") == 1
+    stages = "ngunguruhoe_stage_duration_seconds_count"
+    assert sample(text, stages, path="single", stage="fetch") == 2
+    assert sample(text, stages, path="single", stage="decide") == 1
+    assert sample(text, stages, path="single", stage="persist") == 1
+    assert sample(text, stages, path="single", stage="total") == 2
+
+@pytest.mark.asyncio
+async def test_batch_path_counts_every_symbol(registry, service, market_data):
+    market_data.set_trade_data("AAA", 150.0)
+    market_data.add_trade_data("BBB", 50.0)
+    await service.run_batch_and_store(["AAA", "BBB", "MISSING"])
+
+    text = registry.render()
+    events = "ngunguruhoe_cycle_events_total"
+    assert sample(text, events, symbol="AAA", event="stored") == 1
+    assert sample(text, events, symbol="BBB", event="stored") == 1
+    assert sample(text, events, symbol="MISSING", event="no_data") == 1
+    assert sample(text, "ngunguruhoe_stage_duration_seconds_count", path="batch", stage="total") == 1
+
+@pytest.mark.asyncio
+async def test_event_loop_lag_monitor_sees_blocking(registry):
+    monitor = EventLoopLagMonitor(registry, interval=0.01)
+    task = asyncio.create_task(monitor.run())
+    await asyncio.sleep(0.015)
+    time.sleep(0.05) # block the loop
+    await asyncio.sleep(0.03)
+    task.cancel()
+
+    text = registry.render()
+    assert sample(text, "ngunguruhoe_event_loop_lag_seconds_count") >= 1
+    assert sample(text, "ngunguruhoe_event_loop_lag_seconds_sum") >= 0.03
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_serves_prometheus_text(registry, service, market_data):
+    broadcaster = AlertBroadcaster()
+    subscription = broadcaster.subscribe()
+    app = create_app(service.alert_repo, broadcaster, registry)
+    market_data.set_trade_data("BUYME", 150.0)
+    await service.run_strategy_and_store("BUYME")
+
+    response = await asgi_get(app, "/metrics")
+    assert response.status == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.body.decode()
+    assert sample(text, "ngunguruhoe_cycle_events_total", symbol="BUYME", event="stored") == 1
+    assert sample(text, "ngunguruhoe_stream_subscribers") == 1
+    subscription.close()
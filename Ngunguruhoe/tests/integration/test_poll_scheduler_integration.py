@@ -0,0 +1,205 @@
+import asyncio
+import random
+import pytest
+from Ngunguruhoe.application.services.poll_scheduler import AdaptiveIntervals, PollScheduler, parse_symbol_config
+from Ngunguruhoe.application.services.request_budget import RateLimited, RequestBudget
+
+class RecordingService:
+    """Stands in for AlertService; records calls and can be made slow per symbol."""
+    def __init__(self, delays=None, alerting=()):
+        self.delays = delays or {}
+        self.alerting = set(alerting)
+        self.calls: dict[str, int] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.batches: list[list[str]] = []
+
+    async def run_strategy_and_store(self, symbol: str):
+        self.calls[symbol] = self.calls.get(symbol, 0) + 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delays.get(symbol, 0.001))
+        finally:
+            self.in_flight -= 1
+        return object() if symbol in self.alerting else None
+
+    async def run_batch_and_store(self, symbols):
+        self.batches.append(list(symbols))
+        for symbol in symbols:
+            self.calls[symbol] = self.calls.get(symbol, 0) + 1
+        await asyncio.sleep(0.001)
+        return []
+
+async def run_for(scheduler, seconds):
+    task = asyncio.create_task(scheduler.run())
+    await asyncio.sleep(seconds)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+def test_parse_symbol_config():
+    assert parse_symbol_config("aapl, MSFT:30,,TSLA:15 ", default_interval=60) == {
+        "AAPL": 60.0, "MSFT": 30.0, "TSLA": 15.0,
+    }
+
+@pytest.mark.asyncio
+async def test_scheduler_polls_every_symbol():
+    service = RecordingService()
+    scheduler = PollScheduler(service, [f"S{i}" for i in range(20)], default_interval=0.05, max_jitter=0.01)
+
+    await run_for(scheduler, 0.3)
+
+    assert set(service.calls) == {f"S{i}" for i in range(20)}
+    assert all(count >= 3 for count in service.calls.values())
+
+@pytest.mark.asyncio
+async def test_scheduler_bounds_concurrency():
+    service = RecordingService(delays={f"S{i}": 0.05 for i in range(10)})
+    scheduler = PollScheduler(service, [f"S{i}" for i in range(10)], default_interval=0.1,
+                              max_concurrency=3, max_jitter=0)
+
+    await run_for(scheduler, 0.3)
+
+    assert service.max_in_flight == 3
+
+@pytest.mark.asyncio
+async def test_slow_symbol_does_not_delay_others_and_skips_overruns():
+    service = RecordingService(delays={"SLOW": 0.25})
+    scheduler = PollScheduler(service, {"SLOW": 0.05, "FAST": 0.05}, cycle_timeout=1.0,
+                              max_jitter=0, rng=random.Random(1))
+
+    await run_for(scheduler, 0.6)
+
+    assert service.calls["FAST"] >= 8
+    assert service.calls["SLOW"] <= 3
+    assert scheduler.stats()["SLOW"]["skipped"] >= 4
+
+@pytest.mark.asyncio
+async def test_cycle_timeout_is_counted():
+    service = RecordingService(delays={"HUNG": 10})
+    scheduler = PollScheduler(service, {"HUNG": 0.05}, cycle_timeout=0.05, max_jitter=0)
+
+    await run_for(scheduler, 0.3)
+
+    assert scheduler.stats()["HUNG"]["timeouts"] >= 2
+    assert scheduler.stats()["HUNG"]["runs"] == 0
+
+@pytest.mark.asyncio
+async def test_batch_mode_groups_symbols_by_interval():
+    service = RecordingService()
+    symbols = {**{f"A{i}": 0.05 for i in range(5)}, **{f"B{i}": 0.1 for i in range(2)}}
+    scheduler = PollScheduler(service, symbols, batch_size=2, max_jitter=0)
+
+    assert sorted(len(s.symbols) for s in scheduler.schedules.values()) == [1, 2, 2, 2]
+
+    await run_for(scheduler, 0.12)
+
+    assert set(service.calls) == set(symbols)
+    assert all(len(batch) <= 2 for batch in service.batches)
+    assert all({s[0] for s in batch} in ({"A"}, {"B"}) for batch in service.batches)
+
+@pytest.mark.asyncio
+async def test_adaptive_intervals_follow_activity():
+    service = RecordingService(alerting={"HOT"})
+    moves = {"MOVING": 0.01, "FLAT": 0.0}
+    scheduler = PollScheduler(service, {"HOT": 0.04, "MOVING": 0.04, "FLAT": 0.04, "COLD": 0.04}, max_jitter=0,
+                              adaptive=AdaptiveIntervals(min_factor=0.5, max_factor=2.0), price_move=moves.get)
+
+    await run_for(scheduler, 0.4)
+
+    stats = scheduler.stats()
+    assert stats["HOT"]["interval"] == pytest.approx(0.02)
+    assert stats["MOVING"]["interval"] == pytest.approx(0.02)
+    assert stats["FLAT"]["interval"] == pytest.approx(0.08)
+    assert stats["COLD"]["interval"] == pytest.approx(0.08)
+    assert service.calls["HOT"] > 2 * service.calls["COLD"]
+
+@pytest.mark.asyncio
+async def test_adaptive_intervals_stay_within_the_request_budget():
+    service = RecordingService(alerting={f"S{i}" for i in range(10)})
+    budget = RequestBudget(limit=60, period=1.0, safety=1.0) # 60 requests/s
+    scheduler = PollScheduler(service, [f"S{i}" for i in range(10)], default_interval=0.2, max_jitter=0,
+                              adaptive=AdaptiveIntervals(min_factor=0.1), budget=budget)
+
+    await run_for(scheduler, 0.5)
+
+    # Every symbol wants 0.02s (500 requests/s), but the plan is stretched to the 60/s quota.
+    planned = sum(1 / s["interval"] for s in scheduler.stats().values())
+    assert planned == pytest.approx(60, rel=0.05)
+    assert all(s["interval"] < 0.2 for s in scheduler.stats().values())
+
+class ThrottledService(RecordingService):
+    """Hits the rate limit on the first cycle of each symbol in throttled only, like AlpacaAdapter would."""
+    def __init__(self, budget, throttled=("AAPL",)):
+        super().__init__()
+        self.budget = budget
+        self.throttled = set(throttled)
+
+    async def run_strategy_and_store(self, symbol: str):
+        await super().run_strategy_and_store(symbol)
+        if symbol in self.throttled:
+            self.throttled.discard(symbol)
+            self.budget.throttle(retry_after=0.1)
+            raise RateLimited(symbol)
+
+@pytest.mark.asyncio
+async def test_throttled_cycle_is_retried_after_the_pause():
+    budget = RequestBudget()
+    service = ThrottledService(budget)
+    scheduler = PollScheduler(service, {"AAPL": 10.0}, max_jitter=0, budget=budget)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    task = asyncio.create_task(scheduler.run())
+    while service.calls.get("AAPL", 0) < 2:
+        await asyncio.sleep(0.01)
+    elapsed = loop.time() - started
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    # Retried once the 0.1s pause ended, not a whole 10s interval later.
+    assert 0.1 <= elapsed < 1.0
+    assert scheduler.stats()["AAPL"]["throttled"] == 1
+    assert scheduler.stats()["AAPL"]["skipped"] == 0
+
+@pytest.mark.asyncio
+async def test_throttling_one_schedule_does_not_rerun_the_others():
+    budget = RequestBudget()
+    service = ThrottledService(budget, throttled=("AAPL",))
+    scheduler = PollScheduler(service, {"AAPL": 10.0, "MSFT": 10.0}, max_jitter=0, budget=budget)
+
+    task = asyncio.create_task(scheduler.run())
+    while service.calls.get("AAPL", 0) < 2:
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.2)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    # MSFT's own fetch succeeded while AAPL's got the 429, so only AAPL is retried.
+    assert service.calls == {"AAPL": 2, "MSFT": 1}
+    assert scheduler.stats()["AAPL"]["throttled"] == 1
+    assert scheduler.stats()["MSFT"]["throttled"] == 0
+
+class BudgetedService(RecordingService):
+    """Draws a token per fetch from the budget, like AlpacaAdapter would."""
+    def __init__(self, budget):
+        super().__init__()
+        self.budget = budget
+
+    async def run_strategy_and_store(self, symbol: str):
+        await self.budget.acquire()
+        return await super().run_strategy_and_store(symbol)
+
+@pytest.mark.asyncio
+async def test_cycles_wait_for_budget_tokens_outside_their_timeout():
+    # One token every 0.2s, four times longer than the 0.05s interval that also caps each cycle.
+    budget = RequestBudget(limit=5, period=1.0, burst=1, safety=1.0)
+    service = BudgetedService(budget)
+    scheduler = PollScheduler(service, {"AAPL": 0.05}, max_jitter=0, budget=budget)
+
+    await run_for(scheduler, 0.7)
+
+    stats = scheduler.stats()["AAPL"]
+    assert stats["timeouts"] == 0
+    assert stats["runs"] >= 3 and stats["runs"] == service.calls["AAPL"]
@@ -0,0 +1,92 @@
+import os
+import time
+from types import SimpleNamespace
+import pytest
+from Ngunguruhoe.adapters.process_pool_strategy import ProcessPoolStrategy
+from Ngunguruhoe.domain.models.market_snapshot import MarketSnapshot, SnapshotRow
+from Ngunguruhoe.domain.ports.strategy_port import StrategyPort
+
+# Strategies are built inside spawned workers, so they must be importable module-level classes.
+class CountingStrategy(StrategyPort):
+    """Buys above 100 with a confidence of (calls seen for the symbol) / 100, exposing per-worker state."""
+    def __init__(self):
+        self.calls: dict[str, int] = {}
+
+    async def decide_action(self, market_data):
+        symbol = market_data.S
+        self.calls[symbol] = self.calls.get(symbol, 0) + 1
+        return ("buy" if market_data.p > 100 else "sell"), self.calls[symbol] / 100
+
+class MisbehavingStrategy(StrategyPort):
+    """Hangs on SLOW, kills its process on CRASH and raises on FAIL."""
+    async def decide_action(self, market_data):
+        if market_data.S == "SLOW":
+            time.sleep(30)
+        elif market_data.S == "CRASH":
+            os._exit(1)
+        elif market_data.S == "FAIL":
+            raise RuntimeError("model error")
+        return "buy", 0.9
+
+@pytest.fixture
+def make_strategy():
+    strategies = []
+
+    def make(factory, **kwargs):
+        strategy = ProcessPoolStrategy(factory, **kwargs)
+        strategies.append(strategy)
+        return strategy
+
+    yield make
+    for strategy in strategies:
+        strategy.close()
+
+@pytest.mark.asyncio
+async def test_snapshot_is_evaluated_by_warm_workers_with_symbol_affinity(make_strategy):
+    strategy = make_strategy(CountingStrategy, workers=2, timeout=30)
+    await strategy.start()
+    symbols = [f"S{i}" for i in range(8)]
+    assert len({strategy.worker_for(s) for s in symbols}) == 2
+    snapshot = MarketSnapshot.from_columns(symbols, [150.0, 50.0] * 4)
+
+    for _ in range(3):
+        actions, confidences = await strategy.decide_actions(snapshot)
+
+    # Every symbol was seen three times by the one worker that owns it.
+    assert actions.tolist() == ["buy", "sell"] * 4
+    assert confidences.tolist() == [0.03] * 8
+    assert await strategy.decide_action(SnapshotRow("S0", 150.0, 1.0, 0)) == ("buy", 0.04)
+    assert strategy.stats() == {"evaluated": 25, "degraded": {"timeout": 0, "crashed": 0, "error": 0}, "restarts": 0}
+
+@pytest.mark.asyncio
+async def test_failed_evaluations_degrade_to_hold(make_strategy):
+    strategy = make_strategy(MisbehavingStrategy, workers=1, timeout=1.0)
+    await strategy.start()
+
+    for symbol, reason in (("SLOW", "timeout"), ("CRASH", "crashed"), ("FAIL", "error")):
+        actions, confidences = await strategy.decide_actions(MarketSnapshot.from_columns([symbol, "OK"], [150.0] * 2))
+        # The whole part sent to the failed worker holds; the cycle itself does not fail.
+        assert actions.tolist() == ["hold", "hold"]
+        assert confidences.tolist() == [0.0, 0.0]
+        assert strategy.stats()["degraded"][reason] == 2
+
+    # Timed-out and crashed workers were replaced and serve the next call.
+    assert strategy.stats()["restarts"] == 2
+    assert await strategy.decide_action(SnapshotRow("OK", 150.0, 1.0, 0)) == ("buy", 0.9)
+
+@pytest.mark.asyncio
+async def test_rows_without_a_symbol_are_not_all_sent_to_one_worker(make_strategy, monkeypatch):
+    strategy = make_strategy(CountingStrategy, workers=4)
+    dispatched = []
+    async def evaluate_part(worker, snapshot, rows):
+        dispatched.append((worker, snapshot.symbol[rows].tolist()))
+    monkeypatch.setattr(strategy, "_evaluate_part", evaluate_part)
+    trade_v2 = SimpleNamespace(t="2024-01-01T12:00:00Z", p=150.0, s=100) # no S/symbol attribute
+
+    await strategy.decide_action(trade_v2, symbol="BIG")
+    assert dispatched == [(strategy.worker_for("BIG"), ["BIG"])]
+
+    dispatched.clear()
+    for _ in range(4):
+        await strategy.decide_action(trade_v2)
+    assert sorted(worker for worker, _ in dispatched) == [0, 1, 2, 3]
@@ -0,0 +1,79 @@
+import asyncio
+import pytest
+from Ngunguruhoe.application.services.request_budget import RequestBudget
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_bucket_is_sized_to_the_quota_and_refills():
+    clock = FakeClock()
+    budget = RequestBudget(limit=200, period=60, safety=0.9, clock=clock)
+    assert budget.rate == pytest.approx(3.0)
+    assert budget.stats()["tokens"] == pytest.approx(18)
+    budget._tokens = 0.0
+    clock.now += 2
+    assert budget.stats()["tokens"] == pytest.approx(6)
+    clock.now += 60
+    assert budget.stats()["tokens"] == pytest.approx(18) # capped at the burst
+
+def test_share_splits_the_quota_between_processes():
+    assert RequestBudget(limit=200, period=60, safety=1.0, share=0.25).rate == pytest.approx(200 / 60 / 4)
+    with pytest.raises(ValueError):
+        RequestBudget(share=0)
+
+def test_headers_resize_and_drain_the_bucket():
+    clock, wall = FakeClock(), FakeClock()
+    budget = RequestBudget(limit=200, period=60, safety=0.9, clock=clock, wall_clock=wall)
+    budget.observe(limit=1000, remaining=1000)
+    assert budget.rate == pytest.approx(15.0)
+    # Another client of the account used most of the quota.
+    budget.observe(limit=1000, remaining=105)
+    assert budget.stats()["tokens"] == pytest.approx(5)
+    assert budget.remaining == 105
+    budget.observe(remaining=0, reset_at=wall.now + 30)
+    assert budget.paused
+    clock.now += 30
+    assert not budget.paused
+
+def test_throttle_backs_off_exponentially_until_a_success():
+    clock = FakeClock()
+    budget = RequestBudget(backoff=1.0, max_backoff=4.0, clock=clock)
+    pauses = []
+    for _ in range(4):
+        budget.throttle()
+        pauses.append(budget._paused_until - clock.now)
+        clock.now = budget._paused_until
+    assert pauses == [1.0, 2.0, 4.0, 4.0]
+    budget.observe(remaining=100)
+    budget.throttle()
+    assert budget._paused_until - clock.now == 1.0
+    budget.throttle(retry_after=7)
+    assert budget._paused_until - clock.now == 7
+    assert budget.throttles == 6
+
+@pytest.mark.asyncio
+async def test_acquire_paces_requests_at_the_rate():
+    budget = RequestBudget(limit=50, period=1.0, burst=5, safety=1.0)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    for _ in range(15):
+        await budget.acquire()
+    # 5 from the burst, then 10 more at 50/s.
+    assert 0.15 <= loop.time() - started < 0.5
+    assert budget.acquired == 15
+
+@pytest.mark.asyncio
+async def test_reserved_tokens_are_used_first_and_the_rest_returned():
+    clock = FakeClock()
+    budget = RequestBudget(limit=60, period=60.0, burst=3, safety=1.0, clock=clock)
+    async with budget.reserve(2):
+        assert budget.stats()["tokens"] == 1
+        await budget.acquire() # drawn from the reservation, not the bucket
+        assert budget.stats()["tokens"] == 1
+    # The unused reserved token went back.
+    assert budget.stats()["tokens"] == 2
+    assert budget.acquired == 1
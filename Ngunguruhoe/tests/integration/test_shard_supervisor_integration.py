@@ -0,0 +1,137 @@
+import asyncio
+import sys
+import time
+import pytest
+from Ngunguruhoe.adapters.alert_repo_memory import InMemoryAlertRepository
+from Ngunguruhoe.adapters.alert_repo_queue import QueueAlertRepository
+from Ngunguruhoe.application.services.shard_supervisor import ConsistentHashRing, ShardSupervisor, quota_share, shard_symbols
+from Ngunguruhoe.domain.models.alert_batch import AlertBatch
+
+SYMBOLS = {f"SYM{i}": 60.0 for i in range(6)}
+
+# Worker targets run in spawned processes, so they must be importable module-level functions.
+def emitting_worker(shard_id, symbols, alert_queue, quota_share):
+    """Sends one buy alert per symbol, then idles until terminated."""
+    repo = QueueAlertRepository(alert_queue, shard_id)
+    asyncio.run(repo.save_alerts(AlertBatch.from_columns(shard_id, list(symbols), ["buy"] * len(symbols),
+                                                         [0.6] * len(symbols))))
+    time.sleep(60)
+
+def crashing_worker(shard_id, symbols, alert_queue, quota_share):
+    sys.exit(3)
+
+class FlakyRepository(InMemoryAlertRepository):
+    """Fails the first failures save_alerts calls, then stores normally."""
+    def __init__(self, failures=2):
+        super().__init__()
+        self.failures = failures
+
+    async def save_alerts(self, batch):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("database unavailable")
+        await super().save_alerts(batch)
+
+class RecordingPublisher:
+    def __init__(self):
+        self.alerts = []
+
+    async def publish(self, alert):
+        self.alerts.append(alert)
+
+async def wait_until(predicate, timeout=30.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline, "Condition not met before timeout"
+        await asyncio.sleep(0.05)
+
+async def stop(task):
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+def test_shards_are_disjoint_and_stable_when_growing():
+    universe = {f"S{i}": 60.0 for i in range(1000)}
+    four = shard_symbols(universe, 4)
+    assert sorted(s for shard in four for s in shard) == sorted(universe)
+    assert all(len(shard) > 150 for shard in four) # roughly balanced
+    assert shard_symbols(universe, 4) == four
+
+    five = shard_symbols(universe, 5)
+    before = {s: i for i, shard in enumerate(four) for s in shard}
+    after = {s: i for i, shard in enumerate(five) for s in shard}
+    moved = [s for s in universe if before[s] != after[s]]
+    assert all(after[s] == 4 for s in moved) # symbols only move to the new shard
+    assert len(moved) < 300
+
+    with pytest.raises(ValueError):
+        ConsistentHashRing([])
+
+@pytest.mark.asyncio
+async def test_supervisor_relays_alerts_from_every_worker():
+    repo, publisher = InMemoryAlertRepository(), RecordingPublisher()
+    supervisor = ShardSupervisor(emitting_worker, SYMBOLS, 2, repo, publisher, check_interval=0.05)
+    task = asyncio.create_task(supervisor.run())
+    try:
+        await wait_until(lambda: repo.total_saved == len(SYMBOLS))
+        assert sorted(alert.symbol for alert in publisher.alerts) == sorted(SYMBOLS)
+        assert [stats["alive"] for stats in supervisor.stats()] == [True, True]
+    finally:
+        await stop(task)
+    assert supervisor.stats()[0]["alive"] is False
+
+@pytest.mark.asyncio
+async def test_supervisor_restarts_crashed_workers():
+    supervisor = ShardSupervisor(crashing_worker, SYMBOLS, 1, InMemoryAlertRepository(),
+                                 check_interval=0.02, restart_delay=0.02, max_restart_delay=0.05)
+    task = asyncio.create_task(supervisor.run())
+    try:
+        await wait_until(lambda: supervisor.stats()[0]["restarts"] >= 2)
+    finally:
+        await stop(task)
+
+@pytest.mark.asyncio
+async def test_resize_rebalances_symbols_over_new_workers():
+    repo = InMemoryAlertRepository()
+    supervisor = ShardSupervisor(emitting_worker, SYMBOLS, 1, repo, check_interval=0.05)
+    task = asyncio.create_task(supervisor.run())
+    try:
+        await wait_until(lambda: repo.total_saved == len(SYMBOLS))
+        await supervisor.resize(3)
+        assert supervisor.workers == 3
+        assert supervisor.assignment() == shard_symbols(SYMBOLS, 3)
+        # Every shard was restarted with its new symbols and reported them again.
+        await wait_until(lambda: repo.total_saved == 2 * len(SYMBOLS))
+        assert {alert.symbol for alert in list(repo.alerts)[len(SYMBOLS):]} == set(SYMBOLS)
+    finally:
+        await stop(task)
+
+def test_quota_shares_follow_poll_rates_and_add_up():
+    universe = {f"S{i}": 15.0 if i % 4 == 0 else 60.0 for i in range(200)}
+    for workers in (1, 3, 4):
+        shares = [quota_share(shard, universe) for shard in shard_symbols(universe, workers)]
+        assert sum(shares) == pytest.approx(1.0)
+    assert quota_share({"S0": 15.0, "S1": 60.0}, {"S0": 15.0, "S1": 60.0, "S2": 60.0, "S3": 60.0}) == pytest.approx(5 / 7)
+
+@pytest.mark.asyncio
+async def test_resize_hands_out_shares_for_the_new_worker_count():
+    supervisor = ShardSupervisor(emitting_worker, SYMBOLS, 1, InMemoryAlertRepository())
+    assert [stats["quota_share"] for stats in supervisor.stats()] == [pytest.approx(1.0)]
+    supervisor._start = lambda shard: None # only the bookkeeping is under test here
+    await supervisor.resize(3)
+    shares = [stats["quota_share"] for stats in supervisor.stats()]
+    assert sum(shares) == pytest.approx(1.0)
+    assert shares == [quota_share(shard, SYMBOLS) for shard in shard_symbols(SYMBOLS, 3)]
+
+@pytest.mark.asyncio
+async def test_relay_keeps_alerts_when_saving_fails():
+    repo, publisher = FlakyRepository(failures=2), RecordingPublisher()
+    supervisor = ShardSupervisor(emitting_worker, SYMBOLS, 2, repo, publisher, check_interval=0.05, retry_delay=0.05)
+    task = asyncio.create_task(supervisor.run())
+    try:
+        await wait_until(lambda: repo.total_saved == len(SYMBOLS))
+        assert sorted(alert.symbol for alert in publisher.alerts) == sorted(SYMBOLS)
+        assert supervisor.save_failures == 2 and supervisor.dropped == 0
+        assert not task.done() # the relay survived the failures
+    finally:
+        await stop(task)
@@ -0,0 +1,54 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from Ngunguruhoe.application.readiness import Readiness
+
+# Generous enough for a slow CI machine; the Alpaca SDK alone (with pandas) takes longer than this.
+IMPORT_BUDGET_SECONDS = 1.5
+HEAVY_MODULES = ("alpaca_trade_api", "pandas", "requests", "websockets")
+
+COLD_IMPORT = """
+import json, sys, time
+start = time.perf_counter()
+import Ngunguruhoe.application.services.alert_service
+import Ngunguruhoe.application.services.poll_scheduler
+import Ngunguruhoe.adapters.alpaca_adapter
+import Ngunguruhoe.adapters.alert_repo_sqlite
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "heavy": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+def test_core_modules_import_within_budget_without_heavy_dependencies():
+    # A fresh interpreter, so modules this test session already imported don't hide the cost.
+    root = Path(__file__).resolve().parents[3]
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(root), os.environ.get("PYTHONPATH")]))}
+    result = subprocess.run([sys.executable, "-c", COLD_IMPORT], capture_output=True, text=True, env=env,
+                            check=True, timeout=60)
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    assert report["heavy"] == []
+    assert report["elapsed"] < IMPORT_BUDGET_SECONDS
+
+def test_fatal_startup_error_is_logged_as_json_before_logging_stops(tmp_path):
+    root = Path(__file__).resolve().parents[3]
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(root), os.environ.get("PYTHONPATH")])),
+           "ALPACA_API_KEY": "test", "ALPACA_SECRET_KEY": "test", "TRADING_SYMBOLS": "AAPL:soon"}
+    result = subprocess.run([sys.executable, "-m", "Ngunguruhoe.main"], capture_output=True, text=True, env=env,
+                            cwd=tmp_path, timeout=60)
+    last = json.loads(result.stdout.strip().splitlines()[-1])
+    assert last["level"] == "CRITICAL" and last["msg"].startswith("Configuration Error")
+    assert result.stderr == ""
+
+def test_readiness_needs_every_check_and_treats_errors_as_not_ready():
+    def broken():
+        raise RuntimeError("unreachable")
+
+    readiness = Readiness()
+    assert readiness.ready # nothing to wait for
+    readiness.add_check("database", lambda: True)
+    readiness.add_check("market_data", broken)
+    assert readiness.status() == {"database": True, "market_data": False}
+    assert not readiness.ready
+    readiness.add_check("market_data", lambda: True)
+    assert readiness.ready
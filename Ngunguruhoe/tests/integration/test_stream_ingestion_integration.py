@@ -0,0 +1,108 @@
+import asyncio
+import os
+import pytest
+from Ngunguruhoe.adapters.alpaca_stream_adapter import AlpacaStreamAdapter, ConflatingTickQueue, StreamTick
+from Ngunguruhoe.application.services.alert_service import AlertService, SimpleMarketTrendStrategy
+from Ngunguruhoe.application.services.stream_ingestor import StreamIngestor
+from Ngunguruhoe.tests.mocks import MockAlpacaAdapter, MockAlertRepository
+from Ngunguruhoe.tests.replay_server import ReplayServer, load_ticks
+
+TICK_FILE = os.path.join(os.path.dirname(__file__), "..", "data", "recorded_ticks.jsonl")
+
+@pytest.fixture
+def mock_alert_repo():
+    return MockAlertRepository()
+
+@pytest.fixture
+def alert_service(mock_alert_repo):
+    return AlertService(alert_repo=mock_alert_repo,
+                        market_data_provider=MockAlpacaAdapter(),
+                        strategy=SimpleMarketTrendStrategy())
+
+async def wait_until(predicate, timeout=5.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline, "Condition not met before timeout"
+        await asyncio.sleep(0.01)
+
+async def run_pipeline(server, service, symbols, queue, **adapter_kwargs):
+    adapter = AlpacaStreamAdapter(symbols, queue, url=server.url, reconnect_delay=0.01, **adapter_kwargs)
+    ingestor = StreamIngestor(service, queue, workers=2)
+    tasks = [asyncio.create_task(adapter.run()), asyncio.create_task(ingestor.run())]
+    return adapter, ingestor, tasks
+
+async def cancel_all(tasks):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+@pytest.mark.asyncio
+async def test_conflating_queue_keeps_newest_tick_per_symbol():
+    queue = ConflatingTickQueue()
+    for price in (1.0, 2.0, 3.0):
+        await queue.put(StreamTick(S="AAPL", p=price, s=1, t=""))
+    await queue.put(StreamTick(S="MSFT", p=10.0, s=1, t=""))
+
+    first = await queue.get()
+    second = await queue.get()
+
+    assert (first.S, first.p) == ("AAPL", 3.0)
+    assert (second.S, second.p) == ("MSFT", 10.0)
+    assert queue.conflated == 2
+
+@pytest.mark.asyncio
+async def test_conflating_queue_serializes_a_symbol_while_in_progress():
+    queue = ConflatingTickQueue()
+    await queue.put(StreamTick(S="AAPL", p=1.0, s=1, t=""))
+    tick = await queue.get()
+    await queue.put(StreamTick(S="AAPL", p=2.0, s=1, t="")) # Arrives while AAPL is being processed
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(queue.get(), 0.05)
+    queue.task_done(tick.S)
+
+    assert (await asyncio.wait_for(queue.get(), 1)).p == 2.0
+
+@pytest.mark.asyncio
+async def test_conflating_queue_applies_backpressure():
+    queue = ConflatingTickQueue(max_pending=1)
+    await queue.put(StreamTick(S="AAPL", p=1.0, s=1, t=""))
+    blocked = asyncio.create_task(queue.put(StreamTick(S="MSFT", p=1.0, s=1, t="")))
+    await asyncio.sleep(0.02)
+    assert not blocked.done()
+
+    await queue.get()
+    await asyncio.wait_for(blocked, 1)
+    assert len(queue) == 1
+
+@pytest.mark.asyncio
+async def test_replayed_ticks_drive_alert_service(alert_service, mock_alert_repo):
+    ticks = load_ticks(TICK_FILE)
+    async with ReplayServer(ticks) as server:
+        queue = ConflatingTickQueue()
+        adapter, ingestor, tasks = await run_pipeline(server, alert_service, ["AAPL", "F"], queue)
+        try:
+            await wait_until(lambda: queue.received == 20 and len(queue) == 0 and ingestor.processed > 0)
+            await asyncio.sleep(0.05)
+        finally:
+            await cancel_all(tasks)
+
+    assert server.subscriptions[0]["trades"] == ["AAPL", "F"]
+    saved = {(a.symbol, a.action) for a in mock_alert_repo.alerts_saved}
+    assert saved == {("AAPL", "buy"), ("F", "sell")}
+    assert ingestor.processed + queue.conflated == queue.received
+
+@pytest.mark.asyncio
+async def test_adapter_reconnects_and_resubscribes(alert_service):
+    ticks = load_ticks(TICK_FILE)
+    async with ReplayServer(ticks, disconnect_after=3) as server:
+        queue = ConflatingTickQueue()
+        adapter, ingestor, tasks = await run_pipeline(server, alert_service, ["MSFT"], queue, subscribe_quotes=True)
+        try:
+            await wait_until(lambda: adapter.connections >= 2)
+        finally:
+            await cancel_all(tasks)
+
+    assert len(server.subscriptions) >= 2
+    assert all(sub == {"action": "subscribe", "trades": ["MSFT"], "quotes": ["MSFT"]} for sub in server.subscriptions)
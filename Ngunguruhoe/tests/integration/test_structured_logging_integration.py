@@ -0,0 +1,111 @@
+import io
+import json
+import logging
+import queue
+import sys
+import threading
+import pytest
+from Ngunguruhoe.application.metrics import MetricsRegistry
+from Ngunguruhoe.application.structured_logging import (
+    JsonFormatter, LoggingPipeline, NonBlockingQueueHandler, SamplingFilter, parse_sample_rates,
+)
+
+def make_record(level=logging.INFO, msg="hello %s", args=("world",), **extra) -> logging.LogRecord:
+    record = logging.LogRecord("test", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+@pytest.fixture
+def pipeline_output():
+    stream = io.StringIO()
+    pipeline = LoggingPipeline(level=logging.DEBUG, stream=stream)
+    pipeline.start()
+    yield pipeline, stream
+    pipeline.stop()
+
+def test_parse_sample_rates():
+    assert parse_sample_rates("debug=0.1, INFO=0.5,") == {logging.DEBUG: 0.1, logging.INFO: 0.5}
+    assert parse_sample_rates("") == {}
+    with pytest.raises(ValueError):
+        parse_sample_rates("LOUD=1")
+
+def test_json_formatter_emits_extra_fields_and_exceptions():
+    record = make_record(symbol="AAPL", price=150.5)
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["msg"] == "hello world"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "test"
+    assert entry["symbol"] == "AAPL" and entry["price"] == 150.5
+    assert entry["ts"].endswith("+00:00")
+
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        record = logging.LogRecord("test", logging.ERROR, __file__, 1, "failed", (), sys.exc_info())
+    assert "RuntimeError: boom" in json.loads(JsonFormatter().format(record))["exc"]
+
+def test_sampling_filter_samples_levels_below_warning():
+    draws = iter([0.05, 0.5, 0.05])
+    sampling = SamplingFilter(sample_rates={logging.DEBUG: 0.1, logging.WARNING: 0.0}, rng=lambda: next(draws))
+    assert sampling.filter(make_record(logging.DEBUG))
+    assert not sampling.filter(make_record(logging.DEBUG))
+    assert sampling.filter(make_record(logging.WARNING)) # never sampled
+    assert sampling.filter(make_record(logging.INFO)) # no rate for INFO
+    assert sampling.sampled == 1
+
+def test_sampling_filter_rate_limits_per_symbol():
+    now = [0.0]
+    sampling = SamplingFilter(per_symbol_rate=2.0, per_symbol_burst=2.0, clock=lambda: now[0])
+    kept = [sampling.filter(make_record(symbol="AAPL")) for _ in range(4)]
+    assert kept == [True, True, False, False]
+    assert sampling.filter(make_record(symbol="MSFT")) # separate bucket
+    assert sampling.filter(make_record()) # records without a symbol are not limited
+    assert sampling.filter(make_record(logging.ERROR, symbol="AAPL"))
+    now[0] = 0.5 # one token refilled
+    assert sampling.filter(make_record(symbol="AAPL"))
+    assert not sampling.filter(make_record(symbol="AAPL"))
+    assert sampling.rate_limited == 3
+
+def test_queue_handler_defers_formatting_and_drops_when_full():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(make_record())
+    handler.handle(make_record())
+    record = handler.queue.get_nowait()
+    assert record.msg == "hello %s" and record.args == ("world",)
+    assert handler.dropped == 1
+
+def test_pipeline_writes_json_lines_from_a_background_thread(pipeline_output):
+    pipeline, stream = pipeline_output
+    writers = []
+
+    class RecordingFormatter(JsonFormatter):
+        def format(self, record):
+            writers.append(threading.current_thread())
+            return super().format(record)
+
+    pipeline._listener.handlers[0].setFormatter(RecordingFormatter())
+    logging.getLogger("Ngunguruhoe.test").debug("Alert stored: %s", "buy", extra={"symbol": "AAPL"})
+    pipeline.stop()
+
+    entry = json.loads(stream.getvalue().splitlines()[-1])
+    assert entry["msg"] == "Alert stored: buy" and entry["symbol"] == "AAPL"
+    assert writers and threading.main_thread() not in writers
+
+def test_pipeline_restores_root_logger_and_reports_drops():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    pipeline = LoggingPipeline(level="WARNING", stream=io.StringIO(), sample_rates={logging.INFO: 0.0})
+    registry = MetricsRegistry()
+    pipeline.bind_metrics(registry)
+    pipeline.start()
+    assert root.handlers == [pipeline.handler]
+    assert root.level == logging.WARNING
+    root.setLevel(logging.INFO)
+    logging.getLogger("Ngunguruhoe.test").info("sampled away")
+    pipeline.stop()
+
+    assert root.handlers == handlers and root.level == level
+    assert pipeline.dropped() == {"sampled": 1, "rate_limited": 0, "queue_full": 0}
+    assert 'ngunguruhoe_log_records_dropped{reason="sampled"} 1' in registry.render()
+    with pytest.raises(ValueError):
+        LoggingPipeline(level="LOUD")
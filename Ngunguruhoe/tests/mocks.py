@@ -1,6 +1,7 @@
 import asyncio
 from typing import Any, List, Tuple, Optional
 from Ngunguruhoe.domain.models.alert import Alert
+from Ngunguruhoe.domain.models.alert_query import AlertPage, AlertQuery, page_from_scan
 from Ngunguruhoe.domain.ports.alert_port import AlertPort
 from Ngunguruhoe.adapters.alpaca_adapter import AlpacaAdapter # For type hinting if needed, or mock structure
 from alpaca_trade_api.rest import APIError # For simulating API errors
@@ -15,6 +16,8 @@ class MockAlpacaAdapter:
         self.error_message = "Mock API Error"
         self.connection_error = False
         self.connection_error_message = "Mock Connection Error"
+        self.trades_by_symbol: dict = {} # Extra per-symbol data for multi-symbol tests
+        self.batch_requests = 0
 
     def __call__(self, *args, **kwargs): # Allow instantiation like AlpacaAdapter()
         if self.connection_error:
@@ -37,6 +40,13 @@ class MockAlpacaAdapter:
         })
         self.simulate_api_error = False
 
+    def add_trade_data(self, symbol: str, price: float, ts: Optional[datetime] = None):
+        """Adds trade data for one more symbol, keeping data already set for others."""
+        previous = self.mock_trade_data
+        self.set_trade_data(symbol, price, ts)
+        self.trades_by_symbol[symbol] = self.mock_trade_data
+        self.mock_trade_data = previous
+
     def set_no_data(self):
         self.mock_trade_data = None
         self.simulate_api_error = False
@@ -55,6 +65,8 @@ class MockAlpacaAdapter:
         """Mocks fetching the latest trade."""
         if self.simulate_api_error:
             raise APIError({"message": self.error_message, "code": 400})
+        if symbol in self.trades_by_symbol:
+            return self.trades_by_symbol[symbol]
         # Ensure the symbol matches if multiple symbols are being tested, though current mock is simple
         if self.mock_trade_data and self.mock_trade_data.s == symbol:
             return self.mock_trade_data
@@ -63,6 +75,18 @@ class MockAlpacaAdapter:
             return None
         return self.mock_trade_data
 
+    async def get_latest_trades(self, symbols: List[str]) -> dict:
+        """Mocks the multi-symbol fetch; only symbols with data appear in the result."""
+        if self.simulate_api_error:
+            raise APIError({"message": self.error_message, "code": 400})
+        self.batch_requests += 1
+        trades = {}
+        for symbol in symbols:
+            trade = await self.get_latest_trade(symbol)
+            if trade is not None:
+                trades[symbol] = trade
+        return trades
+
 class MockAlertRepository(AlertPort):
     """Mocks the AlertPort (e.g., SQLiteAlertRepository) for testing purposes."""
     def __init__(self):
@@ -83,15 +107,21 @@ class MockAlertRepository(AlertPort):
         self.alerts_saved.append(alert)
         print(f"MockAlertRepository: Saved alert: {alert}")
 
-    async def get_latest_alert(self) -> Optional[Alert]:
+    async def get_latest_alert(self, symbol: Optional[str] = None) -> Optional[Alert]:
         if self.simulate_get_error:
             raise Exception(self.get_error_message)
-        if not self.alerts_saved:
+        candidates = [a for a in self.alerts_saved if symbol is None or a.symbol == symbol]
+        if not candidates:
             return None
         # Return a copy to mimic database behavior (optional, but good practice)
-        latest_alert_copy = Alert(**self.alerts_saved[-1].__dict__)
+        latest_alert_copy = Alert(**candidates[-1].__dict__)
         return latest_alert_copy
 
+    async def query_alerts(self, query: AlertQuery) -> AlertPage:
+        if self.simulate_get_error:
+            raise Exception(self.get_error_message)
+        return page_from_scan(query, enumerate(self.alerts_saved, start=1))
+
     def clear_alerts(self):
         self.alerts_saved = []
 
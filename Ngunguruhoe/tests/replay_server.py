@@ -0,0 +1,104 @@
+"""
+Local websocket server that replays recorded market data using Alpaca's stream protocol.
+
+Tick files are JSON lines, one Alpaca stream message per line, e.g.
+    {"T": "t", "S": "AAPL", "p": 189.5, "s": 100, "t": "2024-01-02T14:30:00.000Z"}
+
+Run standalone to develop against the streaming adapter offline:
+    python -m Ngunguruhoe.tests.replay_server Ngunguruhoe/tests/data/recorded_ticks.jsonl --port 8765
+    ALPACA_STREAM_URL=ws://127.0.0.1:8765 MARKET_DATA_MODE=stream python main.py
+"""
+import argparse
+import asyncio
+import json
+from datetime import datetime
+import websockets
+
+def load_ticks(path: str) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def _parse_time(value: str) -> float:
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+class ReplayServer:
+    """
+    Replays ticks to every client that authenticates and subscribes.
+
+    speed scales the recorded gaps between ticks (2.0 = twice as fast); 0 replays as
+    fast as possible. disconnect_after closes each connection after that many ticks
+    on the first connection only, to exercise client reconnects.
+    """
+    def __init__(self, ticks: list[dict], host: str = "127.0.0.1", port: int = 0,
+                 speed: float = 0.0, disconnect_after: int | None = None):
+        self.ticks = ticks
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.disconnect_after = disconnect_after
+        self.connections = 0
+        self.subscriptions: list[dict] = []
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await websockets.serve(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def _handle(self, ws, path=None):
+        self.connections += 1
+        connection = self.connections
+        await ws.send(json.dumps([{"T": "success", "msg": "connected"}]))
+        auth = json.loads(await ws.recv())
+        if auth.get("action") != "auth":
+            await ws.send(json.dumps([{"T": "error", "code": 401, "msg": "not authenticated"}]))
+            return
+        await ws.send(json.dumps([{"T": "success", "msg": "authenticated"}]))
+        subscription = json.loads(await ws.recv())
+        self.subscriptions.append(subscription)
+        trades, quotes = set(subscription.get("trades", [])), set(subscription.get("quotes", []))
+        await ws.send(json.dumps([{"T": "subscription", "trades": sorted(trades), "quotes": sorted(quotes)}]))
+
+        sent = 0
+        previous_time = None
+        for tick in self.ticks:
+            wanted = trades if tick.get("T") == "t" else quotes if tick.get("T") == "q" else set()
+            if tick.get("S") not in wanted and "*" not in wanted:
+                continue
+            if self.speed and previous_time is not None and tick.get("t"):
+                await asyncio.sleep(max(0.0, (_parse_time(tick["t"]) - previous_time) / self.speed))
+            if tick.get("t"):
+                previous_time = _parse_time(tick["t"])
+            await ws.send(json.dumps([tick]))
+            sent += 1
+            if connection == 1 and self.disconnect_after is not None and sent >= self.disconnect_after:
+                await ws.close()
+                return
+        await ws.wait_closed()
+
+async def _serve_forever(args):
+    async with ReplayServer(load_ticks(args.tick_file), host=args.host, port=args.port, speed=args.speed) as server:
+        print(f"Replaying {len(server.ticks)} tick(s) at {server.url}")
+        await asyncio.Future()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded ticks over Alpaca's websocket protocol.")
+    parser.add_argument("tick_file")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed factor; 0 for as fast as possible.")
+    asyncio.run(_serve_forever(parser.parse_args()))